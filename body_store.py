@@ -0,0 +1,239 @@
+import argparse
+import csv
+import hashlib
+import itertools
+import json
+import logging
+import mmap
+import os
+import sqlite3
+import sys
+import threading
+import time
+import zlib
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+
+BODY_STORE_PATH = "article_bodies"
+PACK_FILENAME = "bodies.pack"
+INDEX_FILENAME = "index.sqlite"
+BODY_CODEC = 'zstd' if zstandard is not None else 'zlib'
+COMPRESSION_LEVELS = {'zstd': 10, 'zlib': 6}
+INDEX_MMAP_BYTES = 256 * 1024 * 1024
+
+
+class BodyStore:
+    """
+    Content-addressed store for article bodies. Each distinct text is compressed once (zstd when
+    the zstandard package is installed, zlib otherwise) and appended to a pack file; a SQLite index
+    maps its hash to the offset, length and codec. Storing a text that is already there only returns
+    its hash, so syndicated copies cost nothing. Reads go through a memory map of the pack file
+    (and of the index), so looking up a body is a page-cache slice plus one decompression.
+    The pack is append-only; one process should write to a store at a time. Safe to share between threads.
+    """
+
+    def __init__(self, path=BODY_STORE_PATH, codec=BODY_CODEC):
+        if codec == 'zstd' and zstandard is None:
+            raise ImportError("zstd body compression needs the zstandard package: pip install zstandard")
+        self.path = path
+        self.codec = codec
+        self.stats = {'stored': 0, 'deduplicated': 0, 'raw_bytes': 0, 'stored_bytes': 0}
+        os.makedirs(path, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(os.path.join(path, INDEX_FILENAME), check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(f"PRAGMA mmap_size={INDEX_MMAP_BYTES}")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS bodies (
+                hash TEXT PRIMARY KEY,
+                offset INTEGER NOT NULL,
+                length INTEGER NOT NULL,
+                codec TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                stored_at REAL NOT NULL
+            ) WITHOUT ROWID
+        """)
+        self._pack = open(os.path.join(path, PACK_FILENAME), "ab")
+        self._reader = open(os.path.join(path, PACK_FILENAME), "rb")
+        self._map = None
+        self._compressor = zstandard.ZstdCompressor(level=COMPRESSION_LEVELS['zstd']) if codec == 'zstd' else None
+        self._decompressor = zstandard.ZstdDecompressor() if zstandard is not None else None
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM bodies").fetchone()[0]
+
+    def __contains__(self, body_hash):
+        with self._lock:
+            return self._conn.execute("SELECT 1 FROM bodies WHERE hash = ?", (body_hash,)).fetchone() is not None
+
+    def _compress(self, data):
+        if self.codec == 'zstd':
+            return self._compressor.compress(data)
+        return zlib.compress(data, COMPRESSION_LEVELS['zlib'])
+
+    def _decompress(self, codec, blob):
+        if codec == 'zlib':
+            return zlib.decompress(blob)
+        if self._decompressor is None:
+            raise ImportError("This store holds zstd-compressed bodies; reading them needs the zstandard package: pip install zstandard")
+        return self._decompressor.decompress(blob)
+
+    def put(self, text):
+        """Stores text unless an identical text is already stored, and returns its hash."""
+        data = text.encode('utf-8')
+        body_hash = hashlib.sha256(data).hexdigest()
+        with self._lock:
+            self.stats['raw_bytes'] += len(data)
+            if self._conn.execute("SELECT 1 FROM bodies WHERE hash = ?", (body_hash,)).fetchone() is not None:
+                self.stats['deduplicated'] += 1
+                return body_hash
+            blob = self._compress(data)
+            offset = self._pack.tell()
+            self._pack.write(blob)
+            self._pack.flush()
+            self._conn.execute(
+                "INSERT INTO bodies (hash, offset, length, codec, size, stored_at) VALUES (?, ?, ?, ?, ?, ?)",
+                (body_hash, offset, len(blob), self.codec, len(data), time.time())
+            )
+            self.stats['stored'] += 1
+            self.stats['stored_bytes'] += len(blob)
+        return body_hash
+
+    def get(self, body_hash):
+        """Returns the text stored under body_hash, or None if there is none."""
+        with self._lock:
+            row = self._conn.execute("SELECT offset, length, codec FROM bodies WHERE hash = ?", (body_hash,)).fetchone()
+            if row is None:
+                return None
+            offset, length, codec = row
+            if self._map is None or len(self._map) < offset + length:
+                if self._map is not None:
+                    self._map.close()
+                self._map = mmap.mmap(self._reader.fileno(), 0, access=mmap.ACCESS_READ)
+            blob = self._map[offset:offset + length]
+        return self._decompress(codec, blob).decode('utf-8')
+
+    def hydrate(self, record):
+        """Returns a copy of record with article_content loaded back from its article_content_hash."""
+        body_hash = record.get('article_content_hash')
+        if not body_hash or record.get('article_content'):
+            return record
+        return dict(record, article_content=self.get(body_hash))
+
+    def totals(self):
+        """Returns (bodies, raw text bytes, compressed bytes) over the whole store."""
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0), COALESCE(SUM(length), 0) FROM bodies").fetchone()
+
+    def summary(self):
+        saved = self.stats['raw_bytes'] - self.stats['stored_bytes']
+        return (f"Body store: {self.stats['stored']} new bodies stored, {self.stats['deduplicated']} already stored; "
+                f"{self.stats['raw_bytes']} bytes of content kept in {self.stats['stored_bytes']} bytes ({saved} saved)")
+
+    def close(self):
+        with self._lock:
+            if self._map is not None:
+                self._map.close()
+                self._map = None
+            self._pack.close()
+            self._reader.close()
+            self._conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class BodyStoreSink:
+    """
+    Wraps a sink so article_content is moved into a BodyStore: rows carry article_content_hash and
+    an empty article_content. BodyStore.hydrate (or `body_store.py hydrate`) brings the text back.
+    When the sink cannot write article_content_hash (a CSV appended to under an older header), the
+    content stays inline, since a body nothing points to would be lost.
+    """
+
+    def __init__(self, sink, store):
+        self.sink = sink
+        self.store = store
+        self.inline = 'article_content_hash' not in getattr(sink, 'fieldnames', ['article_content_hash'])
+        if self.inline:
+            logging.warning(f"{getattr(sink, 'path', 'Output')} has no article_content_hash column; keeping article content inline instead of in the body store.")
+            print("Warning: the output file has no article_content_hash column; article content is kept inline.")
+
+    @property
+    def rows_written(self):
+        return self.sink.rows_written
+
+    def write(self, record):
+        content = record.get('article_content')
+        if content and not self.inline:
+            record = dict(record, article_content='', article_content_hash=self.store.put(content))
+        self.sink.write(record)
+
+    def close(self):
+        self.sink.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def _read_records(path):
+    with open(path, newline="", encoding="utf-8") as records_file:
+        if path.endswith(('.jsonl', '.ndjson')):
+            for line in records_file:
+                if line.strip():
+                    yield json.loads(line)
+        else:
+            csv.field_size_limit(sys.maxsize)
+            yield from csv.DictReader(records_file)
+
+
+if __name__ == "__main__":
+    from sinks import open_sink, OUTPUT_FIELDNAMES
+
+    parser = argparse.ArgumentParser(description="Inspect the article body store, or move article content in and out of output files.")
+    parser.add_argument('--store', default=BODY_STORE_PATH)
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    subparsers.add_parser('stats', help="count stored bodies and their raw and compressed sizes")
+    get_parser = subparsers.add_parser('get', help="print the body stored under a hash")
+    get_parser.add_argument('hash')
+    for command, help_text in (('pack', "copy an output file with inline content, moving the content into the store"),
+                               ('hydrate', "copy an output file that references the store, with the content inlined again")):
+        convert_parser = subparsers.add_parser(command, help=help_text)
+        convert_parser.add_argument('input')
+        convert_parser.add_argument('output')
+    args = parser.parse_args()
+
+    with BodyStore(args.store) as store:
+        if args.command == 'stats':
+            count, raw, stored = store.totals()
+            print(f"{count} bodies, {raw} bytes of text stored in {stored} bytes ({raw / stored if stored else 0:.1f}x)")
+        elif args.command == 'get':
+            text = store.get(args.hash)
+            if text is None:
+                sys.exit(f"No body stored under {args.hash}")
+            print(text)
+        else:
+            records = _read_records(args.input)
+            first = next(records, None)
+            fieldnames = list(first) if first is not None else list(OUTPUT_FIELDNAMES)
+            if 'article_content_hash' not in fieldnames:
+                fieldnames.insert(fieldnames.index('article_content') + 1 if 'article_content' in fieldnames else len(fieldnames), 'article_content_hash')
+            with open_sink(args.output, fieldnames=fieldnames) as output_sink:
+                writer = BodyStoreSink(output_sink, store) if args.command == 'pack' else output_sink
+                for record in itertools.chain([first] if first is not None else [], records):
+                    writer.write(record if args.command == 'pack' else store.hydrate(record))
+            print(f"Wrote {output_sink.rows_written} records to {args.output}")
+            if args.command == 'pack':
+                print(store.summary())
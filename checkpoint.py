@@ -0,0 +1,92 @@
+import json
+import logging
+import os
+import time
+
+
+CHECKPOINT_PATH = "scraper_checkpoint.jsonl"
+
+
+class Checkpoint:
+    """
+    Append-only record of a scraping run's progress.
+    The first line identifies the run (query and ceid parameters); later lines record the search
+    offset to resume from and each article URL that has been written out. Only URLs marked as
+    submitted count towards submitted_count; canonical aliases and collapsed duplicates do not.
+    Every line is flushed as it is written, so the file stays usable if the process dies mid-run.
+    """
+
+    def __init__(self, path, query, ceid_param, start=0, completed_urls=None):
+        self.path = path
+        self.query = query
+        self.ceid_param = ceid_param
+        self.start = start
+        self.completed_urls = set(completed_urls or ())
+        self.submitted_count = 0
+        self._file = None
+
+    @classmethod
+    def load(cls, path):
+        """Replays a checkpoint file, returning None if it is missing or has no header."""
+        if not os.path.exists(path):
+            return None
+        checkpoint = None
+        with open(path, encoding='utf-8') as checkpoint_file:
+            for line in checkpoint_file:
+                try:
+                    event = json.loads(line)
+                except json.JSONDecodeError:
+                    logging.warning(f"Ignoring truncated checkpoint line in {path}")
+                    continue
+                if 'query' in event:
+                    checkpoint = cls(path, event['query'], event['ceid_param'])
+                elif checkpoint is None:
+                    continue
+                elif 'start' in event:
+                    checkpoint.start = event['start']
+                elif 'completed' in event:
+                    if event['completed'] not in checkpoint.completed_urls and event.get('submitted'):
+                        checkpoint.submitted_count += 1
+                    checkpoint.completed_urls.add(event['completed'])
+        return checkpoint
+
+    def matches(self, query, ceid_param):
+        return self.query == query and self.ceid_param == ceid_param
+
+    def begin(self):
+        """Starts a fresh checkpoint file for this run."""
+        self._file = open(self.path, 'w', encoding='utf-8')
+        self._append({'query': self.query, 'ceid_param': self.ceid_param, 'created_at': time.time()})
+
+    def reopen(self):
+        """Continues appending to an existing checkpoint file."""
+        self._file = open(self.path, 'a', encoding='utf-8')
+
+    def advance(self, start):
+        if start != self.start:
+            self.start = start
+            self._append({'start': start})
+
+    def mark_completed(self, url, submitted=False):
+        """Records url as written out; submitted marks a search link that was fetched (and counts towards the article limit)."""
+        if url not in self.completed_urls:
+            self.completed_urls.add(url)
+            if submitted:
+                self.submitted_count += 1
+                self._append({'completed': url, 'submitted': True})
+            else:
+                self._append({'completed': url})
+
+    def _append(self, event):
+        self._file.write(json.dumps(event) + "\n")
+        self._file.flush()
+
+    def close(self):
+        if self._file is not None and not self._file.closed:
+            self._file.close()
+
+    def clear(self):
+        """Removes the checkpoint once its run has finished."""
+        self.close()
+        if os.path.exists(self.path):
+            os.remove(self.path)
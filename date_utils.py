@@ -0,0 +1,145 @@
+import collections
+import datetime
+import email.utils
+import re
+
+
+# Relative date units as Google News writes them in the supported interface languages.
+RELATIVE_UNITS = {
+    'second': ('sec', 'secs', 'second', 'seconds', 'sekunde', 'sekunden', 'seconde', 'secondes', 'segundo', 'segundos'),
+    'minute': ('min', 'mins', 'minute', 'minutes', 'minuten', 'minuto', 'minutos'),
+    'hour': ('hr', 'hrs', 'hour', 'hours', 'stunde', 'stunden', 'heure', 'heures', 'hora', 'horas'),
+    'day': ('day', 'days', 'tag', 'tagen', 'tage', 'jour', 'jours', 'día', 'días', 'dia', 'dias'),
+    'week': ('week', 'weeks', 'woche', 'wochen', 'semaine', 'semaines', 'semana', 'semanas'),
+    'month': ('month', 'months', 'monat', 'monaten', 'monate', 'mois', 'mes', 'meses'),
+    'year': ('year', 'years', 'jahr', 'jahren', 'jahre', 'an', 'ans', 'année', 'années', 'año', 'años', 'ano', 'anos'),
+}
+UNIT_LENGTHS = {
+    'second': datetime.timedelta(seconds=1),
+    'minute': datetime.timedelta(minutes=1),
+    'hour': datetime.timedelta(hours=1),
+    'day': datetime.timedelta(days=1),
+    'week': datetime.timedelta(weeks=1),
+    'month': datetime.timedelta(days=30),
+    'year': datetime.timedelta(days=365),
+}
+# How each supported language words "N units ago"; a relative date must be one of these, whole.
+RELATIVE_FORMS = ('{n} {unit} ago', 'vor {n} {unit}', 'il y a {n} {unit}', 'hace {n} {unit}', 'há {n} {unit}', '{n} {unit} atrás')
+YESTERDAY_WORDS = ('yesterday', 'gestern', 'hier', 'ayer', 'ontem')
+JUST_NOW_WORDS = ('just now', 'now', 'gerade eben', "à l'instant", 'ahora')
+ABSOLUTE_DATE_FORMATS = ['%b %d, %Y', '%B %d, %Y', '%d %b %Y', '%d %B %Y', '%Y/%m/%d', '%m/%d/%Y', '%d.%m.%Y', '%Y%m%d']
+# How far off a timestamp without a timezone can be from UTC.
+NAIVE_TIME_PRECISION = datetime.timedelta(hours=14)
+
+_UNIT_BY_WORD = {word: unit for unit, words in RELATIVE_UNITS.items() for word in words}
+_UNIT_ALTERNATION = '|'.join(sorted(map(re.escape, _UNIT_BY_WORD), key=len, reverse=True))
+_RELATIVE_PATTERNS = [re.compile('^' + re.escape(form).replace(r'\ ', r'\s+').replace(r'\{n\}', r'(?P<n>\d+)').replace(r'\{unit\}', f'(?P<unit>{_UNIT_ALTERNATION})') + '$')
+                      for form in RELATIVE_FORMS]
+_PERIOD_PATTERN = re.compile(r"^(\d+)([hdwmy])$")
+_PERIOD_UNITS = {'h': 'hour', 'd': 'day', 'w': 'week', 'm': 'month', 'y': 'year'}
+
+DateEstimate = collections.namedtuple('DateEstimate', ['when', 'precision'])
+DateEstimate.__doc__ = "A UTC datetime and how far the real moment may be from it either way."
+
+
+def utc_now():
+    return datetime.datetime.now(datetime.timezone.utc)
+
+def to_utc_iso(when):
+    """Formats an aware datetime as an ISO 8601 UTC timestamp (2025-01-22T10:00:00Z)."""
+    return when.astimezone(datetime.timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+def _relative_date(text, now):
+    """Parses a whole relative date ("3 hours ago", "vor 2 Tagen", "Yesterday"); anything else, like "5 min read", is None."""
+    lowered = ' '.join(text.lower().split()).rstrip('.')
+    for pattern in _RELATIVE_PATTERNS:
+        match = pattern.match(lowered)
+        if match:
+            unit = _UNIT_BY_WORD[match.group('unit')]
+            return DateEstimate(now - int(match.group('n')) * UNIT_LENGTHS[unit], UNIT_LENGTHS[unit])
+    if lowered in YESTERDAY_WORDS:
+        return DateEstimate(now - UNIT_LENGTHS['day'], UNIT_LENGTHS['day'])
+    if lowered in JUST_NOW_WORDS:
+        return DateEstimate(now, UNIT_LENGTHS['minute'])
+    return None
+
+def parse_absolute_date(text):
+    """Parses an ISO 8601, RFC 2822 or common day-format date into a DateEstimate in UTC, or returns None."""
+    text = text.strip()
+    try:
+        when = datetime.datetime.fromisoformat(text.replace(' ', 'T', 1) if re.match(r"\d{4}-\d{2}-\d{2} \d", text) else text)
+        if len(text) <= 10:
+            return DateEstimate(when.replace(tzinfo=datetime.timezone.utc), UNIT_LENGTHS['day'])
+    except ValueError:
+        when = None
+    if when is None:
+        try:
+            when = email.utils.parsedate_to_datetime(text)
+        except (TypeError, ValueError, IndexError):
+            when = None
+    if when is None:
+        for date_format in ABSOLUTE_DATE_FORMATS:
+            try:
+                day = datetime.datetime.strptime(text, date_format)
+            except ValueError:
+                continue
+            return DateEstimate(day.replace(tzinfo=datetime.timezone.utc), UNIT_LENGTHS['day'])
+        return None
+    if when.tzinfo is None:
+        return DateEstimate(when.replace(tzinfo=datetime.timezone.utc), NAIVE_TIME_PRECISION)
+    return DateEstimate(when.astimezone(datetime.timezone.utc), datetime.timedelta(0))
+
+def parse_date(text, now=None, relative=True):
+    """
+    Parses a search result date ("3 hours ago", "vor 2 Tagen", "Yesterday", "Jan 5, 2025") or a
+    page's publish date (ISO 8601, RFC 2822, common day formats) into a DateEstimate in UTC, or
+    None when text holds no recognizable date. Relative dates count back from now (the fetch time,
+    current time by default); their precision is one unit, since Google rounds them down.
+    Pass relative=False for dates scraped from article pages, where relative wording is not a date.
+    """
+    if not text:
+        return None
+    if not relative:
+        return parse_absolute_date(text)
+    now = now or utc_now()
+    return parse_absolute_date(text) or _relative_date(text, now)
+
+def normalize_date(text, now=None, relative=True):
+    """Returns text as an ISO 8601 UTC timestamp (see parse_date), or '' when it cannot be parsed."""
+    estimate = parse_date(text, now, relative)
+    return to_utc_iso(estimate.when) if estimate else ''
+
+def _window_bound(value):
+    """Turns a start_date / end_date as accepted by main3 (tuple, datetime, date or YYYY-MM-DD string) into a UTC datetime."""
+    if isinstance(value, tuple):
+        value = datetime.datetime(*value[:3])
+    elif isinstance(value, str):
+        value = datetime.datetime.strptime(value[:10], "%Y-%m-%d")
+    elif not isinstance(value, datetime.datetime):
+        value = datetime.datetime(value.year, value.month, value.day)
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=datetime.timezone.utc)
+    return value.astimezone(datetime.timezone.utc)
+
+def date_window(period=None, start_date=None, end_date=None, now=None):
+    """
+    Returns the (start, end) UTC datetimes a search is restricted to, matching _construct_ceid:
+    after:start_date and before:end_date when either is given, otherwise the last period ('12h',
+    '7d', '2w', '1m', '1y'). Either end may be None; (None, None) means the search is unbounded.
+    """
+    if start_date or end_date:
+        return (_window_bound(start_date) if start_date else None, _window_bound(end_date) if end_date else None)
+    match = _PERIOD_PATTERN.match(period or '')
+    if match:
+        now = now or utc_now()
+        return (now - int(match.group(1)) * UNIT_LENGTHS[_PERIOD_UNITS[match.group(2)]], None)
+    return (None, None)
+
+def outside_window(estimate, window):
+    """True only when the estimated date is certainly before window start or on/after window end."""
+    start, end = window
+    if estimate is None:
+        return False
+    if start is not None and estimate.when + estimate.precision < start:
+        return True
+    return end is not None and estimate.when - estimate.precision >= end
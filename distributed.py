@@ -0,0 +1,271 @@
+import argparse
+import datetime
+import logging
+import math
+import multiprocessing
+import os
+import time
+
+import http_client
+import metrics
+from fanout import build_jobs, FANOUT_KEYWORD_SETS, FANOUT_LOCALES, FANOUT_DATE_WINDOWS, FANOUT_FIELDNAMES, ARTICLES_PER_JOB
+from body_store import BodyStore, BodyStoreSink
+from log_setup import configure_logging, LOG_PATH
+from http_cache import ResponseCache
+from link_resolver import LinkResolver
+from date_utils import parse_date, date_window, outside_window, utc_now
+from main3 import (build_search_query, fetch_search_page, fetch_article, get_random_delay, _construct_ceid, _format_date_param, _parse_search_item, _build_result,
+                   ARTICLE_CASCADES, SELECTOR_PROFILE_PATH, LINK_MEMO_PATH, RESPONSE_CACHE_PATH, RESPONSE_CACHE_TTL, RESPONSE_CACHE_MAX_BYTES, BODY_STORE_PATH)
+from selector_profile import SelectorProfile
+from sinks import open_sink
+from rate_limiter import HOST_RATE_OVERRIDES
+from url_utils import normalize_url
+from work_queue import open_broker, BrokerSink, QUEUE_PATH, LEASE_SECONDS
+
+
+DISTRIBUTED_OUTPUT_FILENAME = "advanced_ip_news_data_distributed.csv"
+WORKER_PROCESSES = 2
+WORKER_POLL_INTERVAL = 1.0
+RESULTS_QUEUE = 'results'
+# Article tasks first, so workers finish the links already found before paging further.
+WORK_QUEUES = ['article', 'search']
+# Search pages of all workers on a broker share one pace, Google's cap in HOST_RATE_OVERRIDES;
+# the per-process rate limiters would otherwise allow that rate once per worker.
+SEARCH_SLOT_INTERVAL = 1 / HOST_RATE_OVERRIDES['www.google.com'][1]
+
+
+def _search_key(task):
+    return f"search:{task['crawl_id']}:{task['query']}:{task['ceid']}:{task['start']}"
+
+def _task_url(task):
+    return task.payload['search_item']['search_link'] if task.queue == 'article' else None
+
+def enqueue_jobs(broker, jobs, crawl_id):
+    """
+    Enqueues the first search page of every job and returns the number of tasks added.
+    Search pages are deduplicated per crawl_id: enqueueing the same jobs twice for one crawl is
+    harmless, while a new crawl_id crawls them again.
+    """
+    added = 0
+    for job in jobs:
+        task = {
+            'crawl_id': crawl_id,
+            'query': build_search_query(job['keywords']),
+            'ceid': _construct_ceid(job['language'], job['country'], None, job['start_date'], job['end_date']),
+            'start': 0,
+            'max_pages': max(1, math.ceil(job['num_articles_limit'] / 10)),
+            'limit': job['num_articles_limit'],
+            'enqueued': 0,
+            'language': job['language'],
+            'country': job['country'],
+            'window': job['window'],
+            'start_date': _format_date_param(job['start_date']) if job['start_date'] else None,
+            'end_date': _format_date_param(job['end_date']) if job['end_date'] else None,
+        }
+        if broker.enqueue('search', task, dedup_key=_search_key(task)):
+            added += 1
+    return added
+
+
+class CrawlWorker:
+    """
+    Consumes search and article tasks from a broker until it runs dry.
+    A search task fetches one results page, enqueues an article task per link (deduplicated per
+    crawl on the normalized link) and the next page while results inside the job's dates keep coming and
+    fewer than the job's num_articles_limit article tasks have been enqueued for it. An article task
+    fetches and extracts the article and enqueues the finished record on the results queue, where
+    a collector picks it up. Search pages wait for a slot reserved on the broker, so all workers
+    together keep to SEARCH_SLOT_INTERVAL. Tasks are acked only after their work is done, so a worker that dies
+    mid-task leaves it to be leased again once its lease expires.
+    """
+
+    def __init__(self, broker, use_cache=True, lease_seconds=LEASE_SECONDS):
+        self.broker = broker
+        self.lease_seconds = lease_seconds
+        self.cache = ResponseCache(RESPONSE_CACHE_PATH, RESPONSE_CACHE_TTL, RESPONSE_CACHE_MAX_BYTES) if use_cache else None
+        self.selector_profile = SelectorProfile(ARTICLE_CASCADES, SELECTOR_PROFILE_PATH)
+        self.link_resolver = LinkResolver(LINK_MEMO_PATH)
+        self.result_sinks = {}
+        self.stats = {'search': 0, 'article': 0, 'failed': 0}
+
+    def run_once(self):
+        """Leases and processes one task. Returns False when every work queue is empty."""
+        for queue in WORK_QUEUES:
+            task = self.broker.lease(queue, self.lease_seconds)
+            if task is not None:
+                break
+        else:
+            return False
+        try:
+            if task.queue == 'search':
+                self._process_search(task.payload)
+            else:
+                self._process_article(task.payload)
+        except Exception as e:
+            state = self.broker.nack(task)
+            self.stats['failed'] += 1
+            logging.error("%s task %s failed (attempt %d, now %s): %s", task.queue, task.id, task.attempts, state, e, exc_info=True,
+                          extra={'url': _task_url(task), 'stage': task.queue})
+            return True
+        if not self.broker.ack(task):
+            logging.warning("Lease on %s task %s expired before it finished; another worker may repeat it.", task.queue, task.id,
+                            extra={'url': _task_url(task), 'stage': task.queue})
+        self.stats[task.queue] += 1
+        return True
+
+    def run(self, exit_when_idle=False, poll_interval=WORKER_POLL_INTERVAL):
+        while True:
+            if not self.run_once():
+                if exit_when_idle:
+                    return self.stats
+                time.sleep(poll_interval)
+
+    def _process_search(self, payload):
+        delay = self.broker.reserve_slot('search', SEARCH_SLOT_INTERVAL)
+        if delay > 0:
+            time.sleep(delay)
+        news_items = fetch_search_page(payload['query'], payload['ceid'], payload['start'])
+        fetched_at = utc_now()
+        window = date_window(None, payload.get('start_date'), payload.get('end_date'))
+        added = 0
+        inside_window = 0
+        outside = 0
+        limit = payload.get('limit')
+        enqueued = payload.get('enqueued', 0)
+        for item in news_items:
+            if limit and enqueued + added >= limit:
+                break
+            search_item = _parse_search_item(item, fetched_at)
+            if not search_item:
+                continue
+            if outside_window(parse_date(search_item['search_date'], fetched_at), window):
+                outside += 1
+                continue
+            inside_window += 1
+            search_item['search_link'] = self.link_resolver.resolve(search_item['search_link'])
+            article_task = {key: payload[key] for key in ('crawl_id', 'language', 'country', 'window')}
+            article_task['search_item'] = search_item
+            if self.broker.enqueue('article', article_task, dedup_key=f"article:{payload['crawl_id']}:{normalize_url(search_item['search_link'])}"):
+                added += 1
+        logging.info("Search page %d of %s (%s): %d items, %d new article tasks, %d outside the requested dates.",
+                     payload['start'] // 10 + 1, payload['query'], payload['ceid'], len(news_items), added, outside, extra={'stage': 'search'})
+        limit_reached = limit and enqueued + added >= limit
+        if news_items and not limit_reached and not (outside and not inside_window) and payload['start'] // 10 + 1 < payload['max_pages']:
+            next_page = dict(payload, start=payload['start'] + 10, enqueued=enqueued + added)
+            self.broker.enqueue('search', next_page, dedup_key=_search_key(next_page))
+        if http_client.get_rate_limiter() is None:
+            time.sleep(get_random_delay())
+
+    def _process_article(self, payload):
+        search_item = payload['search_item']
+        article = fetch_article(search_item['search_link'], self.cache, self.selector_profile)
+        if article.get('canonical_url'):
+            self.link_resolver.record(search_item['search_link'], article['canonical_url'])
+        record = _build_result(search_item, article)
+        record['search_language'] = payload['language']
+        record['search_country'] = payload['country']
+        record['search_window'] = payload['window']
+        crawl_id = payload['crawl_id']
+        if crawl_id not in self.result_sinks:
+            self.result_sinks[crawl_id] = BrokerSink(self.broker, RESULTS_QUEUE, dedup_prefix=f"{RESULTS_QUEUE}:{crawl_id}")
+        self.result_sinks[crawl_id].write(record)
+
+    def close(self):
+        self.selector_profile.close()
+        self.link_resolver.close()
+        if self.cache is not None:
+            self.cache.close()
+
+
+def run_worker(broker_url, exit_when_idle=False, use_cache=True):
+    """Entry point of one worker process: opens its own broker connection, caches and profile."""
+    broker = open_broker(broker_url)
+    worker = CrawlWorker(broker, use_cache=use_cache)
+    try:
+        stats = worker.run(exit_when_idle)
+        print(f"Worker {os.getpid()} idle: {stats['search']} search pages, {stats['article']} articles, {stats['failed']} failed tasks.")
+        logging.info(f"Worker {os.getpid()} finished: {stats}")
+    finally:
+        worker.close()
+        broker.close()
+
+def collect_results(broker, sink, poll_interval=None):
+    """
+    Moves records from the results queue into sink, acking each one after it is written.
+    Returns when the queue is empty, or keeps polling every poll_interval seconds if given.
+    """
+    collected = 0
+    while True:
+        task = broker.lease(RESULTS_QUEUE)
+        if task is None:
+            if poll_interval is None:
+                return collected
+            time.sleep(poll_interval)
+            continue
+        with metrics.timed('write'):
+            sink.write(task.payload)
+        broker.ack(task)
+        collected += 1
+
+def _read_keyword_sets(path):
+    """Reads one comma-separated keyword set per line, skipping blank lines and # comments."""
+    with open(path, encoding="utf-8") as keywords_file:
+        return [[keyword.strip() for keyword in line.split(',') if keyword.strip()]
+                for line in keywords_file if line.strip() and not line.lstrip().startswith('#')]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Distributed crawl: enqueue search tasks on a broker, consume them with worker processes on any number of machines, and collect the results.")
+    parser.add_argument('--broker', default=QUEUE_PATH, help="redis://host:port/db, or a SQLite queue file (default: %(default)s)")
+    parser.add_argument('--log-json', action='store_true', help=f"write {LOG_PATH} as JSON Lines events (run id, url, stage, duration)")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    enqueue_parser = subparsers.add_parser('enqueue', help="enqueue the first search page of every keyword set x locale x date window")
+    enqueue_parser.add_argument('--keywords-file', help="one comma-separated keyword set per line (default: FANOUT_KEYWORD_SETS)")
+    enqueue_parser.add_argument('--crawl-id', default=datetime.date.today().isoformat(), help="search pages and articles are deduplicated within a crawl (default: today)")
+    enqueue_parser.add_argument('--articles-per-job', type=int, default=ARTICLES_PER_JOB)
+    worker_parser = subparsers.add_parser('worker', help="process search and article tasks")
+    worker_parser.add_argument('--processes', type=int, default=WORKER_PROCESSES)
+    worker_parser.add_argument('--exit-when-idle', action='store_true', help="stop once the queues are empty instead of polling for more work")
+    worker_parser.add_argument('--no-cache', action='store_true', help="do not use the local HTTP response cache")
+    collect_parser = subparsers.add_parser('collect', help="write queued results to an output file")
+    collect_parser.add_argument('--output', default=DISTRIBUTED_OUTPUT_FILENAME, help="output file (.csv or .jsonl), appended to")
+    collect_parser.add_argument('--follow', action='store_true', help="keep collecting as results arrive")
+    collect_parser.add_argument('--bodies', nargs='?', const=BODY_STORE_PATH, default='', help=f"store article content in this deduplicated body store (default {BODY_STORE_PATH}) and write only its hash")
+    subparsers.add_parser('status', help="show task counts per queue and state")
+    args = parser.parse_args()
+    if args.log_json:
+        configure_logging(LOG_PATH, structured=True)
+
+    if args.command == 'enqueue':
+        keyword_sets = _read_keyword_sets(args.keywords_file) if args.keywords_file else FANOUT_KEYWORD_SETS
+        jobs = build_jobs(keyword_sets, FANOUT_LOCALES, FANOUT_DATE_WINDOWS, args.articles_per_job)
+        broker = open_broker(args.broker)
+        added = enqueue_jobs(broker, jobs, args.crawl_id)
+        broker.close()
+        print(f"Enqueued {added} of {len(jobs)} search jobs for crawl {args.crawl_id} ({len(jobs) - added} already enqueued).")
+    elif args.command == 'worker':
+        workers = [multiprocessing.Process(target=run_worker, args=(args.broker, args.exit_when_idle, not args.no_cache))
+                   for _ in range(args.processes)]
+        for worker_process in workers:
+            worker_process.start()
+        for worker_process in workers:
+            worker_process.join()
+    elif args.command == 'collect':
+        broker = open_broker(args.broker)
+        body_store = BodyStore(args.bodies) if args.bodies else None
+        with open_sink(args.output, append=True, fieldnames=FANOUT_FIELDNAMES) as output_sink:
+            try:
+                collected = collect_results(broker, BodyStoreSink(output_sink, body_store) if body_store is not None else output_sink,
+                                            WORKER_POLL_INTERVAL if args.follow else None)
+            except KeyboardInterrupt:
+                collected = output_sink.rows_written
+        broker.close()
+        if body_store is not None:
+            print(body_store.summary())
+            body_store.close()
+        print(f"Collected {collected} records into {args.output}")
+    else:
+        broker = open_broker(args.broker)
+        for queue, states in sorted(broker.counts().items()):
+            print(f"{queue:<10}" + "  ".join(f"{state}={count}" for state, count in sorted(states.items())))
+        broker.close()
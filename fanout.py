@@ -0,0 +1,159 @@
+import argparse
+import concurrent.futures
+import itertools
+import logging
+import threading
+
+import metrics
+from main3 import (iter_google_news, new_near_duplicate_indexes, DomainConcurrencyLimiter, KEYWORDS_LIST, AVAILABLE_COUNTRIES, AVAILABLE_LANGUAGES,
+                   MAX_FETCH_PER_DOMAIN, ARTICLE_CASCADES, SELECTOR_PROFILE_PATH, USE_SELECTOR_PROFILE, LINK_MEMO_PATH, USE_LINK_MEMO,
+                   EXTRACTION_PROCESSES, BODY_STORE_PATH, new_extraction_pool)
+from link_resolver import LinkResolver
+from selector_profile import SelectorProfile
+from rate_limiter import TokenBucket
+from sinks import OUTPUT_FIELDNAMES, open_sink
+from body_store import BodyStore, BodyStoreSink
+from log_setup import configure_logging, LOG_PATH
+from url_utils import normalize_url
+
+
+FANOUT_OUTPUT_FILENAME = "advanced_ip_news_data_fanout.csv"
+FANOUT_FIELDNAMES = OUTPUT_FIELDNAMES + ['search_language', 'search_country', 'search_window']
+FANOUT_KEYWORD_SETS = [KEYWORDS_LIST]
+FANOUT_LOCALES = [("en", "United States"), ("en", "United Kingdom"), ("en", "India"), ("en", "Australia"),
+                  ("de", "Germany"), ("fr", "France")]
+FANOUT_DATE_WINDOWS = [(None, None)]
+MAX_PARALLEL_JOBS = 4
+SEARCH_REQUESTS_PER_SECOND = 0.5
+ARTICLES_PER_JOB = 50
+
+
+def build_jobs(keyword_sets, locales, date_windows, num_articles_limit=ARTICLES_PER_JOB):
+    """Expands (keywords x locale x date window) into a list of job dicts."""
+    jobs = []
+    for keywords, (language, country), (start_date, end_date) in itertools.product(keyword_sets, locales, date_windows):
+        if language not in AVAILABLE_LANGUAGES:
+            raise ValueError(f"Unknown language: {language}")
+        country = AVAILABLE_COUNTRIES.get(country, country)
+        window = f"{start_date or ''}..{end_date or ''}" if start_date or end_date else ''
+        jobs.append({
+            'label': f"{len(jobs) + 1}:{language}-{country}" + (f" {window}" if window else ''),
+            'window': window,
+            'keywords': keywords,
+            'language': language,
+            'country': country,
+            'start_date': start_date,
+            'end_date': end_date,
+            'num_articles_limit': num_articles_limit,
+        })
+    return jobs
+
+
+class LinkClaims:
+    """Thread-safe set of normalized article links; the first job to claim a link fetches it."""
+
+    def __init__(self):
+        self._claimed = set()
+        self._lock = threading.Lock()
+        self.duplicates = 0
+
+    def claim(self, link):
+        key = normalize_url(link)
+        with self._lock:
+            if key in self._claimed:
+                self.duplicates += 1
+                return False
+            self._claimed.add(key)
+            return True
+
+
+def run_jobs(jobs, sink, max_parallel_jobs=MAX_PARALLEL_JOBS, search_rate=SEARCH_REQUESTS_PER_SECOND, **scraper_options):
+    """
+    Runs scraping jobs concurrently and writes every record into one sink.
+    All jobs share one search-page token bucket (the global rate budget), one per-domain
+    concurrency limiter, one pair of near-duplicate indexes, one selector profile, one link
+    resolver, one extraction process pool (when enabled), and one set of claimed links so that an
+    article several jobs find is fetched only once.
+    """
+    search_budget = TokenBucket(search_rate)
+    domain_limiter = DomainConcurrencyLimiter(scraper_options.pop('max_per_domain', MAX_FETCH_PER_DOMAIN))
+    claims = LinkClaims()
+    scraper_options.setdefault('near_duplicate_indexes', new_near_duplicate_indexes())
+    owned_profile = None
+    if scraper_options.get('selector_profile') is None and scraper_options.get('use_selector_profile', USE_SELECTOR_PROFILE):
+        owned_profile = scraper_options['selector_profile'] = SelectorProfile(ARTICLE_CASCADES, SELECTOR_PROFILE_PATH)
+    owned_resolver = None
+    if scraper_options.get('link_resolver') is None and scraper_options.get('use_link_memo', USE_LINK_MEMO):
+        owned_resolver = scraper_options['link_resolver'] = LinkResolver(LINK_MEMO_PATH)
+    owned_pool = None
+    if scraper_options.get('extraction_pool') is None and scraper_options.get('extraction_processes', EXTRACTION_PROCESSES) > 0:
+        owned_pool = scraper_options['extraction_pool'] = new_extraction_pool(scraper_options.get('extraction_processes', EXTRACTION_PROCESSES))
+    sink_lock = threading.Lock()
+    written = {}
+
+    def run_job(job):
+        label = job['label']
+        written[label] = 0
+        records = iter_google_news(
+            job['keywords'], job['num_articles_limit'], language=job['language'], country=job['country'],
+            start_date=job['start_date'], end_date=job['end_date'], search_rate_limiter=search_budget,
+            domain_limiter=domain_limiter, claim_link=claims.claim, **scraper_options)
+        for record in records:
+            record['search_language'] = job['language']
+            record['search_country'] = job['country']
+            record['search_window'] = job['window']
+            with sink_lock, metrics.timed('write'):
+                sink.write(record)
+            written[label] += 1
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max_parallel_jobs) as executor:
+        futures = {executor.submit(run_job, job): job['label'] for job in jobs}
+        for future in concurrent.futures.as_completed(futures):
+            label = futures[future]
+            try:
+                future.result()
+                print(f"Job {label} finished: {written.get(label, 0)} records.")
+                logging.info(f"Fan-out job {label} finished: {written.get(label, 0)} records.")
+            except Exception as e:
+                print(f"Job {label} failed: {e}")
+                logging.error(f"Fan-out job {label} failed: {e}", exc_info=True)
+    if owned_profile is not None:
+        owned_profile.close()
+    if owned_resolver is not None:
+        owned_resolver.close()
+    if owned_pool is not None:
+        owned_pool.shutdown()
+
+    print(f"Fan-out complete: {len(jobs)} jobs, {sum(written.values())} records, {claims.duplicates} cross-job duplicates skipped before fetching.")
+    logging.info(f"Fan-out complete: {len(jobs)} jobs, {sum(written.values())} records, {claims.duplicates} cross-job duplicates skipped.")
+    return written
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the Google News scraper over a matrix of keyword sets, locales and date windows.")
+    parser.add_argument('--output', default=FANOUT_OUTPUT_FILENAME, help="merged output file (.csv or .jsonl)")
+    parser.add_argument('--parallel-jobs', type=int, default=MAX_PARALLEL_JOBS, help="jobs run at the same time")
+    parser.add_argument('--search-rate', type=float, default=SEARCH_REQUESTS_PER_SECOND, help="search pages per second across all jobs")
+    parser.add_argument('--articles-per-job', type=int, default=ARTICLES_PER_JOB)
+    parser.add_argument('--processes', type=int, default=EXTRACTION_PROCESSES, help="worker processes for parsing and extraction, shared by all jobs")
+    parser.add_argument('--metrics', help="write run metrics here (.json for JSON, otherwise Prometheus text format)")
+    parser.add_argument('--bodies', nargs='?', const=BODY_STORE_PATH, default='', help=f"store article content in this deduplicated body store (default {BODY_STORE_PATH}) and write only its hash")
+    parser.add_argument('--log-json', action='store_true', help=f"write {LOG_PATH} as JSON Lines events (run id, url, stage, duration)")
+    args = parser.parse_args()
+    if args.log_json:
+        configure_logging(LOG_PATH, structured=True)
+
+    jobs = build_jobs(FANOUT_KEYWORD_SETS, FANOUT_LOCALES, FANOUT_DATE_WINDOWS, args.articles_per_job)
+    print(f"Starting fan-out over {len(jobs)} jobs...")
+    body_store = BodyStore(args.bodies) if args.bodies else None
+    with open_sink(args.output, fieldnames=FANOUT_FIELDNAMES) as output_sink:
+        run_jobs(jobs, BodyStoreSink(output_sink, body_store) if body_store is not None else output_sink,
+                 max_parallel_jobs=args.parallel_jobs, search_rate=args.search_rate, extraction_processes=args.processes)
+    if body_store is not None:
+        print(body_store.summary())
+        body_store.close()
+    print(f"Data saved to {args.output}")
+    print(metrics.summary_table())
+    if args.metrics:
+        metrics.export(args.metrics)
+        print(f"Metrics written to {args.metrics}")
@@ -0,0 +1,44 @@
+from bs4 import BeautifulSoup, FeatureNotFound
+import logging
+
+
+# html.parser until parser_benchmark.py shows lxml extracting the same fields from recorded pages;
+# set 'auto' (or 'lxml') to switch.
+PARSER_BACKEND = 'html.parser'
+PARSER_PREFERENCE = ['lxml', 'html.parser']
+FALLBACK_PARSER = 'html.parser'
+
+_resolved_backends = {}
+
+
+def available_backends(candidates=('lxml', 'html5lib', 'html.parser')):
+    """Returns the BeautifulSoup tree builders that are installed, in the given order."""
+    available = []
+    for name in candidates:
+        try:
+            BeautifulSoup('', name)
+        except FeatureNotFound:
+            continue
+        available.append(name)
+    return available
+
+def resolve_backend(name=None):
+    """
+    Maps a backend name to an installed tree builder.
+    'auto' picks the first installed entry of PARSER_PREFERENCE; an explicit backend that is not
+    installed falls back to the pure-Python html.parser with a warning.
+    """
+    name = name or PARSER_BACKEND
+    if name not in _resolved_backends:
+        candidates = PARSER_PREFERENCE if name == 'auto' else [name]
+        installed = available_backends(candidates)
+        if installed:
+            _resolved_backends[name] = installed[0]
+        else:
+            logging.warning(f"HTML parser backend '{name}' is not installed. Falling back to {FALLBACK_PARSER}.")
+            _resolved_backends[name] = FALLBACK_PARSER
+    return _resolved_backends[name]
+
+def make_soup(markup, backend=None):
+    """Parses markup with the configured backend."""
+    return BeautifulSoup(markup, resolve_backend(backend))
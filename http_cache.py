@@ -0,0 +1,148 @@
+import requests
+from requests.structures import CaseInsensitiveDict
+import json
+import logging
+import sqlite3
+import threading
+import time
+
+import metrics
+from url_utils import normalize_url
+
+
+CACHE_PATH = "http_cache.sqlite"
+CACHE_TTL_SECONDS = 6 * 60 * 60
+CACHE_MAX_BYTES = 500 * 1024 * 1024
+
+
+class ResponseCache:
+    """
+    Persistent HTTP response cache stored in SQLite and keyed by normalized URL.
+    Entries younger than ttl are served without touching the network; older entries are
+    revalidated with If-None-Match / If-Modified-Since. The least recently used entries are
+    evicted once the stored bodies exceed max_bytes.
+    A body read only up to the end of an element (see http_client.read_bounded) is stored with that
+    element in truncated_after, and only served to requests that stop after the same element.
+    """
+
+    def __init__(self, path=CACHE_PATH, ttl=CACHE_TTL_SECONDS, max_bytes=CACHE_MAX_BYTES):
+        self.path = path
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.stats = {'hits': 0, 'revalidated': 0, 'misses': 0, 'bytes_saved': 0}
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                url TEXT NOT NULL,
+                headers TEXT NOT NULL,
+                body BLOB NOT NULL,
+                etag TEXT,
+                last_modified TEXT,
+                size INTEGER NOT NULL,
+                stored_at REAL NOT NULL,
+                last_access REAL NOT NULL,
+                truncated_after TEXT
+            )
+        """)
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(responses)")}
+        if 'truncated_after' not in columns:
+            self._conn.execute("ALTER TABLE responses ADD COLUMN truncated_after TEXT")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS responses_last_access ON responses (last_access)")
+
+    def lookup(self, url):
+        """Returns the cached entry for url as a dict, or None."""
+        key = normalize_url(url)
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT url, headers, body, etag, last_modified, size, stored_at, truncated_after FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            self._conn.execute("UPDATE responses SET last_access = ? WHERE key = ?", (time.time(), key))
+        return {
+            'key': key, 'url': row[0], 'headers': json.loads(row[1]), 'body': row[2],
+            'etag': row[3], 'last_modified': row[4], 'size': row[5], 'stored_at': row[6], 'truncated_after': row[7],
+        }
+
+    def is_fresh(self, entry):
+        return time.time() - entry['stored_at'] < self.ttl
+
+    def conditional_headers(self, entry):
+        """Builds the revalidation headers for a stale entry."""
+        headers = {}
+        if entry['etag']:
+            headers['If-None-Match'] = entry['etag']
+        if entry['last_modified']:
+            headers['If-Modified-Since'] = entry['last_modified']
+        return headers
+
+    def store(self, url, response, truncated_after=None):
+        """Stores a successful response unless the server forbids it; truncated_after names the element its body stops after."""
+        if 'no-store' in response.headers.get('Cache-Control', '').lower():
+            return
+        body = response.content
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, url, headers, body, etag, last_modified, size, stored_at, last_access, truncated_after) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (normalize_url(url), url, json.dumps(dict(response.headers)), body, response.headers.get('ETag'),
+                 response.headers.get('Last-Modified'), len(body), now, now, truncated_after)
+            )
+            self._evict()
+
+    def refresh(self, entry, response):
+        """Marks a revalidated (304) entry as fresh again, picking up any new validators."""
+        with self._lock:
+            self._conn.execute(
+                "UPDATE responses SET stored_at = ?, etag = COALESCE(?, etag), last_modified = COALESCE(?, last_modified) WHERE key = ?",
+                (time.time(), response.headers.get('ETag'), response.headers.get('Last-Modified'), entry['key'])
+            )
+
+    def record(self, outcome, entry=None):
+        """Updates hit/revalidated/miss counters and the bytes a cached body saved."""
+        with self._lock:
+            self.stats[outcome] += 1
+            if entry is not None:
+                self.stats['bytes_saved'] += entry['size']
+        metrics.increment('cache_requests_total', outcome=outcome)
+        if entry is not None:
+            metrics.increment('cache_bytes_saved_total', entry['size'])
+
+    def _evict(self):
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        evicted = 0
+        for key, size in self._conn.execute("SELECT key, size FROM responses ORDER BY last_access").fetchall():
+            if total <= self.max_bytes:
+                break
+            self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+            total -= size
+            evicted += 1
+        logging.info(f"Response cache: evicted {evicted} least recently used entries.")
+
+    def build_response(self, entry):
+        """Rebuilds a requests.Response from a cache entry."""
+        response = requests.models.Response()
+        response.status_code = 200
+        response.reason = 'OK'
+        response.url = entry['url']
+        response.headers = CaseInsensitiveDict(entry['headers'])
+        response._content = entry['body']
+        response.from_cache = True
+        response.truncated = 'stop_after_element' if entry['truncated_after'] else None
+        return response
+
+    def summary(self):
+        stats = self.stats
+        return (f"Cache: {stats['hits'] + stats['revalidated']} hits ({stats['revalidated']} revalidated with 304), "
+                f"{stats['misses']} misses, {stats['bytes_saved']} bytes saved")
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
@@ -0,0 +1,289 @@
+import requests
+from requests.adapters import HTTPAdapter
+import email.utils
+import logging
+import random
+import re
+import threading
+import time
+
+import metrics
+from rate_limiter import AdaptiveRateLimiter
+
+
+POOL_CONNECTIONS = 20
+POOL_MAXSIZE = 10
+MAX_RETRIES = 4
+BACKOFF_BASE = 1.0
+BACKOFF_MAX = 30
+RETRY_AFTER_MAX = 300
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+RATE_LIMITING_ENABLED = True
+STREAM_CHUNK_SIZE = 64 * 1024
+
+_session = None
+_session_lock = threading.Lock()
+_rate_limiter = None
+_url_rewriter = None
+_response_hooks = []
+_cancel = threading.local()
+
+
+class ContentTypeRejected(requests.exceptions.RequestException):
+    """A bounded fetch got a successful response whose Content-Type is not one it accepts."""
+
+
+class FetchCancelled(requests.exceptions.RequestException):
+    """A fetch stopped waiting for a retry or a rate-limit slot because the cancel event of its thread was set."""
+
+
+def get_session():
+    """Returns the process-wide pooled session, creating it on first use."""
+    global _session
+    with _session_lock:
+        if _session is None:
+            session = requests.Session()
+
+            adapter = HTTPAdapter(pool_connections=POOL_CONNECTIONS, pool_maxsize=POOL_MAXSIZE, pool_block=True, max_retries=0)
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+            _session = session
+        return _session
+
+def set_cancel_event(event):
+    """
+    Makes retry backoff and rate-limit waits on the calling thread end with FetchCancelled as soon as
+    event (a threading.Event) is set, e.g. the stop event of the pipeline running the thread. None
+    restores plain sleeps.
+    """
+    _cancel.event = event
+
+def interruptible_sleep(seconds):
+    """Sleeps like time.sleep, but raises FetchCancelled once the calling thread's cancel event is set."""
+    event = getattr(_cancel, 'event', None)
+    if event is None:
+        time.sleep(seconds)
+    elif event.wait(seconds):
+        raise FetchCancelled("Fetch cancelled while waiting.")
+
+def get_rate_limiter():
+    """Returns the shared per-host AdaptiveRateLimiter, or None when rate limiting is disabled."""
+    global _rate_limiter
+    if not RATE_LIMITING_ENABLED:
+        return None
+    with _session_lock:
+        if _rate_limiter is None:
+            _rate_limiter = AdaptiveRateLimiter()
+        return _rate_limiter
+
+def set_url_rewriter(rewriter):
+    """
+    Routes every request through rewriter(url) -> url (e.g. to a local replay server); None restores
+    direct requests. Rate limiting and caching still key on the original URL.
+    """
+    global _url_rewriter
+    _url_rewriter = rewriter
+
+def add_response_hook(hook):
+    """Registers hook(url, response), called with every response received from the network."""
+    _response_hooks.append(hook)
+
+def remove_response_hook(hook):
+    if hook in _response_hooks:
+        _response_hooks.remove(hook)
+
+def backoff_delay(attempt):
+    """Exponential backoff with full jitter for the given (zero-based) retry attempt."""
+    return random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * (2 ** attempt)))
+
+def retry_after_seconds(response):
+    """Parses a Retry-After header (delta-seconds or HTTP date) into seconds, or None."""
+    value = response.headers.get('Retry-After')
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return min(float(value), RETRY_AFTER_MAX)
+    try:
+        retry_at = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return min(max(0.0, retry_at.timestamp() - time.time()), RETRY_AFTER_MAX)
+
+class _ElementEndScanner:
+    """
+    Finds where the first top-level <tag> element closes in a growing HTML buffer. Comments and the
+    raw text of <script> and <style> elements are skipped, so markup quoted inside them is not counted.
+    """
+
+    _RAW_TEXT_ENDS = {name: re.compile(rb'</' + name + rb'[\s>/]', re.IGNORECASE) for name in (b'script', b'style')}
+    _COMMENT_END = re.compile(rb'-->')
+
+    def __init__(self, tag):
+        self._pattern = re.compile(rb'(?P<comment><!--)|<(?P<raw>script|style)[\s>/]|<(?P<close>/?)' + re.escape(tag.encode('ascii')) + rb'[\s>/]',
+                                   re.IGNORECASE)
+        self._lookahead = max(len(tag), len('script')) + 3
+        self._position = 0
+        self._depth = 0
+        self._skip_until = None
+        self._closing_at = None
+
+    def feed(self, body):
+        """Returns the offset just past the closing tag once the element has closed, otherwise None."""
+        if self._closing_at is not None:
+            return self._end_of_closing_tag(body)
+        position = self._position
+        while True:
+            if self._skip_until is not None:
+                end = self._skip_until.search(body, position)
+                if end is None:
+                    break
+                position = end.end()
+                self._skip_until = None
+            match = self._pattern.search(body, position)
+            if match is None:
+                break
+            position = match.end()
+            if match.group('comment'):
+                self._skip_until = self._COMMENT_END
+            elif match.group('raw'):
+                self._skip_until = self._RAW_TEXT_ENDS[match.group('raw').lower()]
+            elif not match.group('close'):
+                self._depth += 1
+            elif self._depth:
+                self._depth -= 1
+                if not self._depth:
+                    self._closing_at = match.start()
+                    return self._end_of_closing_tag(body)
+        self._position = max(position, len(body) - self._lookahead)
+        return None
+
+    def _end_of_closing_tag(self, body):
+        # The closing tag's '>' may not have arrived yet.
+        closing = body.find(b'>', self._closing_at)
+        return closing + 1 if closing != -1 else None
+
+
+def read_bounded(response, max_bytes=None, content_types=None, stop_after_element=None):
+    """
+    Reads a streamed response body into response.content without ever holding more than max_bytes.
+    A successful response whose Content-Type is not in content_types is closed unread and raises
+    ContentTypeRejected. With stop_after_element (e.g. 'article'), reading stops as soon as the first
+    top-level element of that tag has closed. response.truncated is set to 'max_bytes' or
+    'stop_after_element' when the body was cut short, and None when it was read whole.
+    """
+    response.truncated = None
+    if content_types and response.ok:
+        content_type = response.headers.get('Content-Type', '').split(';')[0].strip().lower()
+        if content_type and content_type not in content_types:
+            response.close()
+            raise ContentTypeRejected(f"Unsupported Content-Type {content_type!r} for {response.url}", response=response)
+
+    scanner = _ElementEndScanner(stop_after_element) if stop_after_element else None
+    body = bytearray()
+    for chunk in response.iter_content(STREAM_CHUNK_SIZE):
+        body += chunk
+        end = scanner.feed(body) if scanner is not None else None
+        if end is not None and (max_bytes is None or end <= max_bytes):
+            del body[end:]
+            response.truncated = 'stop_after_element'
+            break
+        if max_bytes is not None and len(body) >= max_bytes:
+            del body[max_bytes:]
+            response.truncated = 'max_bytes'
+            break
+    response._content = bytes(body)
+    response._content_consumed = True
+    response.close()
+    if response.truncated:
+        metrics.increment('http_truncated_total', reason=response.truncated)
+    return response
+
+def fetch(url, headers=None, timeout=10, max_retries=MAX_RETRIES, cache=None,
+          max_bytes=None, content_types=None, stop_after_element=None, **kwargs):
+    """
+    GETs a URL through the shared session.
+    Connection errors, timeouts and 429/5xx responses are retried with exponential backoff,
+    honoring Retry-After when the server sends one. The last response is returned as-is,
+    so callers still decide what to do with non-2xx statuses via raise_for_status().
+    Every attempt first waits for the host's slot in the shared adaptive rate limiter and reports
+    its outcome back to it. Both waits end with FetchCancelled once the thread's cancel event (see
+    set_cancel_event) is set. When a ResponseCache is passed, fresh entries are served from it and stale ones are
+    revalidated with a conditional request.
+    With max_bytes, content_types or stop_after_element, the body is streamed through read_bounded
+    (see there) instead of being downloaded in full.
+    """
+    bounds = {'max_bytes': max_bytes, 'content_types': content_types, 'stop_after_element': stop_after_element}
+    if cache is not None:
+        return _fetch_cached(url, cache, headers, timeout, max_retries, **bounds, **kwargs)
+
+    bounded = any(value is not None for value in bounds.values())
+    if bounded:
+        kwargs['stream'] = True
+
+    session = get_session()
+    rate_limiter = get_rate_limiter()
+    request_url = _url_rewriter(url) if _url_rewriter is not None else url
+    for attempt in range(max_retries + 1):
+        if rate_limiter is not None:
+            rate_limiter.acquire(url, sleep=interruptible_sleep)
+        started = time.monotonic()
+        try:
+            response = session.get(request_url, headers=headers, timeout=timeout, **kwargs)
+        except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+            if rate_limiter is not None:
+                rate_limiter.record(url, error=True)
+            metrics.increment('http_errors_total', error=type(e).__name__)
+            if attempt >= max_retries:
+                raise
+            metrics.increment('http_retries_total', reason=type(e).__name__)
+            delay = backoff_delay(attempt)
+            logging.warning("Request to %s failed (%s). Retrying in %.1fs (attempt %d/%d).", url, e, delay, attempt + 1, max_retries,
+                            extra={'url': url, 'stage': 'http'})
+        else:
+            if rate_limiter is not None:
+                rate_limiter.record(url, status=response.status_code, latency=time.monotonic() - started)
+            metrics.increment('http_responses_total', status=response.status_code)
+            final = response.status_code not in RETRY_STATUS_CODES or attempt >= max_retries
+            if final and bounded:
+                read_bounded(response, **bounds)
+            for hook in _response_hooks:
+                hook(url, response)
+            if final:
+                return response
+            metrics.increment('http_retries_total', reason=response.status_code)
+            delay = retry_after_seconds(response)
+            if delay is None:
+                delay = backoff_delay(attempt)
+            response.close()
+            logging.warning("HTTP %d from %s. Retrying in %.1fs (attempt %d/%d).", response.status_code, url, delay, attempt + 1, max_retries,
+                            extra={'url': url, 'stage': 'http'})
+        interruptible_sleep(delay)
+
+def _fetch_cached(url, cache, headers, timeout, max_retries, **kwargs):
+    entry = cache.lookup(url)
+    stop_after_element = kwargs.get('stop_after_element')
+    if entry is not None and entry['truncated_after'] and entry['truncated_after'] != stop_after_element:
+        # A body cut short after one element cannot stand in for a request that needs more of the page.
+        entry = None
+    if entry is not None and cache.is_fresh(entry):
+        cache.record('hits', entry)
+        return cache.build_response(entry)
+
+    request_headers = dict(headers or {})
+    if entry is not None:
+        request_headers.update(cache.conditional_headers(entry))
+    response = fetch(url, headers=request_headers, timeout=timeout, max_retries=max_retries, **kwargs)
+
+    if entry is not None and response.status_code == 304:
+        cache.refresh(entry, response)
+        cache.record('revalidated', entry)
+        return cache.build_response(entry)
+
+    cache.record('misses')
+    truncated = getattr(response, 'truncated', None)
+    if response.status_code == 200 and not truncated:
+        cache.store(url, response)
+    elif response.status_code == 200 and truncated == 'stop_after_element':
+        cache.store(url, response, truncated_after=stop_after_element)
+    return response
@@ -0,0 +1,74 @@
+import logging
+import sqlite3
+import threading
+import time
+
+from url_utils import clean_link, is_plausible_canonical, normalize_url, GOOGLE_BASE_URL
+
+
+LINK_MEMO_PATH = "link_memo.sqlite"
+
+
+class LinkResolver:
+    """
+    Resolves search result links to stable article URLs.
+    Google redirect wrappers and tracking parameters are removed offline (url_utils.clean_link);
+    the rel=canonical URL learned from a fetched page is memoized persistently, so the next time the
+    same link shows up it resolves straight to the canonical URL without a request.
+    """
+
+    def __init__(self, path=LINK_MEMO_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS links (
+                key TEXT PRIMARY KEY,
+                url TEXT NOT NULL,
+                canonical TEXT NOT NULL,
+                resolved_at REAL NOT NULL
+            )
+        """)
+        self.stats = {'memo_hits': 0, 'canonicals_recorded': 0}
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM links").fetchone()[0]
+
+    def resolve(self, href, base=GOOGLE_BASE_URL):
+        """Returns the memoized canonical URL for href, or its offline-cleaned form."""
+        link = clean_link(href, base)
+        with self._lock:
+            row = self._conn.execute("SELECT canonical FROM links WHERE key = ?", (normalize_url(link),)).fetchone()
+            if row is None:
+                return link
+            self.stats['memo_hits'] += 1
+            return row[0]
+
+    def record(self, url, canonical):
+        """
+        Memoizes canonical (as found in the page's rel=canonical) for url. Returns the cleaned canonical
+        URL, or None when it is implausible and was ignored.
+        """
+        canonical = clean_link(canonical, url)
+        if not is_plausible_canonical(url, canonical):
+            logging.info("Ignoring implausible canonical URL %s for %s", canonical, url, extra={'url': url, 'stage': 'article'})
+            return None
+        if normalize_url(canonical) == normalize_url(url):
+            return canonical
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO links (key, url, canonical, resolved_at) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT(key) DO UPDATE SET canonical = excluded.canonical, resolved_at = excluded.resolved_at",
+                (normalize_url(url), url, canonical, time.time())
+            )
+            self.stats['canonicals_recorded'] += 1
+        return canonical
+
+    def summary(self):
+        return f"Link resolver: {self.stats['memo_hits']} links resolved from memo, {self.stats['canonicals_recorded']} canonical URLs recorded"
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
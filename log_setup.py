@@ -0,0 +1,123 @@
+import atexit
+import datetime
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import uuid
+
+
+LOG_PATH = "scraper.log"
+LOG_MAX_BYTES = 10 * 1024 * 1024
+LOG_BACKUP_COUNT = 5
+TEXT_LOG_FORMAT = '%(asctime)s - %(levelname)s - %(message)s'
+# Passes the logging setup on to child processes (extraction and distributed workers), which log to
+# the same file with the same run id but leave rotating it to the process that configured it.
+LOG_CONFIG_ENV = "SCRAPER_LOG_CONFIG"
+# Fields a log call can pass with extra={...}; they become keys of the JSON Lines event.
+EVENT_FIELDS = ('url', 'stage', 'duration')
+
+_listener = None
+_settings = None
+
+
+class JsonLinesFormatter(logging.Formatter):
+    """Formats each record as one JSON object: time (UTC), level, logger, run id, message and any EVENT_FIELDS."""
+
+    def __init__(self, run_id):
+        super().__init__()
+        self.run_id = run_id
+
+    def format(self, record):
+        event = {
+            'time': datetime.datetime.fromtimestamp(record.created, datetime.timezone.utc).isoformat(timespec='milliseconds').replace('+00:00', 'Z'),
+            'level': record.levelname,
+            'logger': record.name,
+            'run_id': self.run_id,
+            'pid': record.process,
+            'thread': record.threadName,
+            'message': record.getMessage(),
+        }
+        for field in EVENT_FIELDS:
+            value = getattr(record, field, None)
+            if value is not None:
+                event[field] = round(value, 4) if field == 'duration' else value
+        if record.exc_info:
+            event['exception'] = self.formatException(record.exc_info)
+        return json.dumps(event, ensure_ascii=False, default=str)
+
+
+class _DeferredQueueHandler(logging.handlers.QueueHandler):
+    """
+    Puts records on the queue as they are, so the %-formatting of the message, JSON encoding and file
+    writes all happen on the listener thread. Safe because listener and loggers share a process;
+    log calls must not pass arguments they mutate afterwards.
+    """
+
+    def prepare(self, record):
+        return record
+
+
+def _file_handler(path, structured, run_id, max_bytes, backup_count):
+    if max_bytes:
+        handler = logging.handlers.RotatingFileHandler(path, maxBytes=max_bytes, backupCount=backup_count, encoding="utf-8", delay=True)
+    else:
+        handler = logging.handlers.WatchedFileHandler(path, encoding="utf-8", delay=True)
+    handler.setFormatter(JsonLinesFormatter(run_id) if structured else logging.Formatter(TEXT_LOG_FORMAT))
+    return handler
+
+def configure_logging(path=LOG_PATH, structured=False, run_id=None, level=logging.INFO, max_bytes=LOG_MAX_BYTES, backup_count=LOG_BACKUP_COUNT):
+    """
+    Sends all logging through a queue to a background thread that writes path, so a log call on the
+    fetch/parse path only appends a record to an in-memory queue. With structured, each line is a
+    JSON event (see JsonLinesFormatter) instead of the text format. The file is rotated at max_bytes,
+    keeping backup_count old files. Replaces any earlier configuration; returns the run id.
+    In a child process of a configured one, the parent's file, format and run id win, and records
+    are written synchronously.
+    """
+    global _listener, _settings
+    stop_logging()
+    inherited = json.loads(os.environ.get(LOG_CONFIG_ENV, 'null'))
+    if inherited is not None and inherited['owner'] != os.getpid():
+        # No rotation here: a WatchedFileHandler reopens the file once the owner has rotated it.
+        path, structured, run_id, level, max_bytes = inherited['path'], inherited['structured'], inherited['run_id'], inherited['level'], 0
+    else:
+        run_id = run_id or (inherited or {}).get('run_id') or uuid.uuid4().hex[:12]
+        os.environ[LOG_CONFIG_ENV] = json.dumps({'owner': os.getpid(), 'path': os.path.abspath(path), 'structured': structured, 'run_id': run_id, 'level': level})
+    root = logging.getLogger()
+    for handler in root.handlers[:]:
+        root.removeHandler(handler)
+        handler.close()
+    root.setLevel(level)
+    file_handler = _file_handler(path, structured, run_id, max_bytes, backup_count)
+    if max_bytes:
+        records = queue.SimpleQueue()
+        root.addHandler(_DeferredQueueHandler(records))
+        _listener = logging.handlers.QueueListener(records, file_handler)
+        _listener.start()
+    else:
+        # multiprocessing ends child processes with os._exit, which would drop records still queued, so they write directly.
+        root.addHandler(file_handler)
+    _settings = (path, structured, run_id, level, max_bytes, backup_count)
+    return run_id
+
+def stop_logging():
+    """Writes out every queued record and stops the background thread."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+        _listener = None
+
+def _restart_after_fork():
+    # A forked child inherits the queue handler but not the listener thread, so it gets its own.
+    global _listener
+    if _settings is not None:
+        _listener = None
+        configure_logging(*_settings)
+
+
+atexit.register(stop_logging)
+os.register_at_fork(after_in_child=_restart_after_fork)
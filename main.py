@@ -1,5 +1,6 @@
 import requests
 from bs4 import BeautifulSoup
+import http_client
 import csv
 import json 
 
@@ -23,7 +24,7 @@ def get_ip_news_data(keywords, num_results_per_page=20):
     }
 
     try:
-        response = requests.get(search_url, headers=headers)
+        response = http_client.fetch(search_url, headers=headers)
         response.raise_for_status()  
         soup = BeautifulSoup(response.content, "html.parser")
 
@@ -1,6 +1,8 @@
 import requests
-from bs4 import BeautifulSoup
-import csv
+import http_client
+from html_parsers import make_soup
+from sinks import open_sink
+from log_setup import configure_logging, LOG_PATH
 import json
 import logging
 import time
@@ -8,12 +10,15 @@ import random
 import re
 
 
-logging.basicConfig(filename='scraper.log', level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+configure_logging(LOG_PATH)
 
 
 KEYWORDS_LIST = ["intellectual property", "patent lawyer", "ip enforcement", "inventor", "patent holder"]
 NUM_ARTICLES_TO_SCRAPE = 25  
 OUTPUT_CSV_FILENAME = "advanced_ip_news_data.csv"
+OUTPUT_FIELDNAMES = ['search_title', 'search_snippet', 'search_date', 'search_source', 'search_link',
+                     'article_title', 'article_author', 'article_publish_date', 'article_content',
+                     'article_image_urls', 'article_categories', 'article_keywords']
 USER_AGENT_LIST = [ 
     'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
     'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/14.0 Safari/1460.1.57',
@@ -77,34 +82,44 @@ def get_random_user_agent():
 def get_random_delay():
     return random.uniform(REQUEST_DELAY_MIN, REQUEST_DELAY_MAX)
 
-def extract_article_content(article_url):
-    """Attempts to extract full article content from a given URL."""
+def fetch_article(article_url):
+    """Downloads an article once and extracts content and metadata from a single parse tree."""
+    article = {'content': None, 'metadata': {}, 'bytes_downloaded': 0, 'parse_time': 0.0}
     try:
         headers = {'User-Agent': get_random_user_agent()}
-        response = requests.get(article_url, headers=headers, timeout=15) 
+        response = http_client.fetch(article_url, headers=headers, timeout=15)
         response.raise_for_status()
-        article_soup = BeautifulSoup(response.content, 'html.parser')
-
-        for selector in ARTICLE_CONTENT_SELECTORS:
-            content_container = article_soup.select_one(selector)
-            if content_container:
-                
-                paragraphs = content_container.find_all('p') 
-                if not paragraphs: 
-                    article_text = content_container.text.strip()
-                else:
-                    article_text = "\n\n".join([p.text.strip() for p in paragraphs]) 
-                return article_text.strip() 
-
-        logging.warning(f"Article content selectors failed for URL: {article_url}")
-        return "Article content extraction failed. Selectors may need adjustment." 
+        article['bytes_downloaded'] = len(response.content)
+
+        parse_started = time.perf_counter()
+        article_soup = make_soup(response.content)
+        article['content'] = extract_article_content(article_soup, article_url)
+        article['metadata'] = extract_metadata(article_soup)
+        article['parse_time'] = time.perf_counter() - parse_started
 
     except requests.exceptions.RequestException as e:
-        logging.error(f"Error fetching article content from {article_url}: {e}")
-        return f"Error fetching article content: {e}"
+        logging.error("Error fetching article content from %s: %s", article_url, e, extra={'url': article_url, 'stage': 'fetch'})
+        article['content'] = f"Error fetching article content: {e}"
     except Exception as e:
-        logging.error(f"Error processing article content from {article_url}: {e}")
-        return f"Error processing article content: {e}"
+        logging.error("Error processing article content from %s: %s", article_url, e, extra={'url': article_url, 'stage': 'extract'})
+        article['content'] = f"Error processing article content: {e}"
+    return article
+
+def extract_article_content(article_soup, article_url):
+    """Attempts to extract full article content from an already parsed article page."""
+    for selector in ARTICLE_CONTENT_SELECTORS:
+        content_container = article_soup.select_one(selector)
+        if content_container:
+            
+            paragraphs = content_container.find_all('p') 
+            if not paragraphs: 
+                article_text = content_container.text.strip()
+            else:
+                article_text = "\n\n".join([p.text.strip() for p in paragraphs]) 
+            return article_text.strip() 
+
+    logging.warning("Article content selectors failed for URL: %s", article_url, extra={'url': article_url, 'stage': 'extract'})
+    return "Article content extraction failed. Selectors may need adjustment." 
 
 def extract_metadata(article_soup):
     """Extracts author, publish date, images, etc. from article soup."""
@@ -139,16 +154,24 @@ def extract_metadata(article_soup):
     return metadata
 
 
-def google_news_scraper(keywords, num_articles_limit=None):
+def _log_fetch_summary(article_count, bytes_downloaded, parse_time_total):
+    """Reports total article traffic and parse time for a run."""
+    summary = f"Fetched {article_count} articles: {bytes_downloaded} bytes downloaded, {parse_time_total:.2f}s parsing"
+    print(summary)
+    logging.info(summary)
+
+def iter_google_news(keywords, num_articles_limit=None):
     """
     Scrapes Google News results, extracts full content and metadata.
     Implements robust selectors, error handling, and logging.
+    Yields each record as soon as its article has been processed.
     """
-    results = []
     articles_scraped_count = 0
+    bytes_downloaded = 0
+    parse_time_total = 0.0
     search_query = " OR ".join([f'"{keyword}"' for keyword in keywords]) + " news"
     print(f"Search Query: {search_query}")
-    logging.info(f"Starting scraper for keywords: {keywords}. Target articles: {num_articles_limit if num_articles_limit else 'Unlimited'}")
+    logging.info("Starting scraper for keywords: %s. Target articles: %s", keywords, num_articles_limit or 'Unlimited')
 
     page = 0
     while True: 
@@ -158,16 +181,16 @@ def google_news_scraper(keywords, num_articles_limit=None):
 
         try:
             print(f"Fetching search page {page+1}...")
-            response = requests.get(search_url, headers=headers, timeout=10) 
+            response = http_client.fetch(search_url, headers=headers, timeout=10) 
             response.raise_for_status()
-            soup = BeautifulSoup(response.content, 'html.parser')
+            soup = make_soup(response.content)
 
             
             news_items = soup.select(GOOGLE_NEWS_ITEM_SELECTOR)
             if not news_items:
                 news_items = soup.select(GOOGLE_NEWS_ITEM_SELECTOR_FALLBACK)
                 if not news_items:
-                    logging.warning(f"No news items found on page {page+1} using primary or fallback selectors. Google Search structure might have changed significantly.")
+                    logging.warning("No news items found on page %d using primary or fallback selectors. Google Search structure might have changed significantly.", page + 1, extra={'stage': 'search'})
                     print(f"Warning: No news items found on page {page+1}. Search structure might have changed.")
                     break 
 
@@ -175,8 +198,9 @@ def google_news_scraper(keywords, num_articles_limit=None):
             for item in news_items:
                 if num_articles_limit and articles_scraped_count >= num_articles_limit:
                     print(f"Reached article limit of {num_articles_limit}. Stopping scraping.")
-                    logging.info(f"Scraping stopped: Reached article limit of {num_articles_limit}.")
-                    return results 
+                    logging.info("Scraping stopped: Reached article limit of %d.", num_articles_limit)
+                    _log_fetch_summary(articles_scraped_count, bytes_downloaded, parse_time_total)
+                    return
 
                 try: 
                     link_element = item.find('a')
@@ -214,13 +238,16 @@ def google_news_scraper(keywords, num_articles_limit=None):
 
 
                     print(f"Scraping article: {title_text[:50]}...") 
-                    logging.info(f"Extracting data for article: {title_text}")
+                    logging.info("Extracting data for article: %s", title_text, extra={'url': link, 'stage': 'search'})
 
-                    article_content = extract_article_content(link) 
-                    article_soup_for_metadata = BeautifulSoup(requests.get(link, headers={'User-Agent': get_random_user_agent()}, timeout=10).content, 'html.parser') 
-                    metadata = extract_metadata(article_soup_for_metadata) 
+                    article = fetch_article(link)
+                    article_content = article['content']
+                    metadata = article['metadata']
+                    bytes_downloaded += article['bytes_downloaded']
+                    parse_time_total += article['parse_time']
+                    logging.info("Article fetched: %d bytes downloaded, parsed in %.3fs (%s)", article['bytes_downloaded'], article['parse_time'], link, extra={'url': link, 'stage': 'article'})
 
-                    results.append({
+                    yield {
                         'search_title': title_text, 
                         'search_snippet': snippet_text,
                         'search_date': date_text,
@@ -233,11 +260,11 @@ def google_news_scraper(keywords, num_articles_limit=None):
                         'article_image_urls': metadata.get('image_urls', []),
                         'article_categories': metadata.get('categories', []), 
                         'article_keywords': metadata.get('keywords', [])     
-                    })
+                    }
                     articles_scraped_count += 1
 
                 except Exception as e: 
-                    logging.error(f"Error processing news item: {e}", exc_info=True) 
+                    logging.error("Error processing news item: %s", e, exc_info=True, extra={'stage': 'search'}) 
                     print(f"Warning: Error processing a news item. Skipping. Error: {e}")
                     continue 
 
@@ -250,36 +277,33 @@ def google_news_scraper(keywords, num_articles_limit=None):
             time.sleep(get_random_delay()) 
 
         except requests.exceptions.RequestException as e: 
-            logging.error(f"Error fetching search page {page+1}: {e}")
+            logging.error("Error fetching search page %d: %s", page + 1, e, extra={'stage': 'search'})
             print(f"Error fetching search page {page+1}: {e}")
             break 
         except Exception as e: 
-            logging.error(f"Unexpected error processing search page {page+1}: {e}", exc_info=True)
+            logging.error("Unexpected error processing search page %d: %s", page + 1, e, exc_info=True, extra={'stage': 'search'})
             print(f"Unexpected error processing search page {page+1}: {e}")
             break
 
     print("Scraping complete.")
     logging.info("Scraping completed.")
-    return results
+    _log_fetch_summary(articles_scraped_count, bytes_downloaded, parse_time_total)
+
+def google_news_scraper(keywords, num_articles_limit=None):
+    """Runs iter_google_news to completion and returns all records as a list."""
+    return list(iter_google_news(keywords, num_articles_limit))
 
 
 if __name__ == "__main__":
     print("Starting Advanced Google News Scraper...")
-    news_data = google_news_scraper(KEYWORDS_LIST, NUM_ARTICLES_TO_SCRAPE)
-
-    if news_data:
-        csv_filename = OUTPUT_CSV_FILENAME
-        fieldnames = ['search_title', 'search_snippet', 'search_date', 'search_source', 'search_link',
-                      'article_title', 'article_author', 'article_publish_date', 'article_content',
-                      'article_image_urls', 'article_categories', 'article_keywords']
 
-        with open(csv_filename, "w", newline="", encoding="utf-8") as csv_file:
-            writer = csv.DictWriter(csv_file, fieldnames=fieldnames)
-            writer.writeheader()
-            writer.writerows(news_data)
-        print(f"Data saved to {csv_filename}")
-        logging.info(f"Data saved to {csv_filename}")
+    with open_sink(OUTPUT_CSV_FILENAME, fieldnames=OUTPUT_FIELDNAMES) as sink:
+        for record in iter_google_news(KEYWORDS_LIST, NUM_ARTICLES_TO_SCRAPE):
+            sink.write(record)
 
+    if sink.rows_written:
+        print(f"Data saved to {OUTPUT_CSV_FILENAME}")
+        logging.info("Data saved to %s", OUTPUT_CSV_FILENAME)
     else:
         print("No news articles found or an error occurred during scraping.")
-        logging.warning("No news articles found or errors during scraping.")
\ No newline at end of file
+        logging.warning("No news articles found or errors during scraping.")
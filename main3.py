@@ -1,6 +1,21 @@
 import requests
-from bs4 import BeautifulSoup
-import csv
+import http_client
+import metrics
+from html_parsers import make_soup
+from selector_engine import compile_cascades
+from http_cache import ResponseCache
+from seen_index import SeenIndex, content_hash
+from selector_profile import SelectorProfile
+from link_resolver import LinkResolver
+from url_utils import clean_link
+from date_utils import parse_date, normalize_date, date_window, outside_window, utc_now
+from sinks import open_sink
+from search_index import SearchIndex
+from body_store import BodyStore, BodyStoreSink
+from checkpoint import Checkpoint
+from near_duplicates import NearDuplicateIndex
+from pipeline import Pipeline, Stage
+from log_setup import configure_logging, LOG_PATH
 import json
 import logging
 import time
@@ -8,9 +23,13 @@ import random
 import re
 import datetime
 import warnings  
-
-
-logging.basicConfig(filename='scraper.log', level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+import os
+import argparse
+import threading
+import concurrent.futures
+import multiprocessing
+import tempfile
+from urllib.parse import urlparse
 
 
 KEYWORDS_LIST = ["intellectual property", "patent lawyer", "ip enforcement", "inventor", "patent holder"]
@@ -26,6 +45,35 @@ USER_AGENT_LIST = [
 ]
 REQUEST_DELAY_MIN = 1 
 REQUEST_DELAY_MAX = 3 
+MAX_FETCH_WORKERS = 8 
+MAX_FETCH_PER_DOMAIN = 2 
+DOMAIN_SLOT_POLL_INTERVAL = 0.1 
+EXTRACT_WORKERS = 2 
+STAGE_QUEUE_SIZE = 32 
+USE_RESPONSE_CACHE = True 
+RESPONSE_CACHE_PATH = "http_cache.sqlite" 
+RESPONSE_CACHE_TTL = 6 * 60 * 60 
+RESPONSE_CACHE_MAX_BYTES = 500 * 1024 * 1024 
+INCREMENTAL_MODE = False 
+SEEN_INDEX_PATH = "seen_articles.sqlite" 
+CHECKPOINT_PATH = "scraper_checkpoint.jsonl" 
+NEAR_DUPLICATE_MODE = 'snippet' 
+NEAR_DUPLICATE_THRESHOLD = 0.8 
+NEAR_DUPLICATE_CONTENT_CHARS = 5000 
+METRICS_EXPORT_PATH = "scraper_metrics.prom" 
+USE_SELECTOR_PROFILE = True 
+SELECTOR_PROFILE_PATH = "selector_profile.sqlite" 
+MAX_ARTICLE_BYTES = 2 * 1024 * 1024 
+ARTICLE_CONTENT_TYPES = ('text/html', 'application/xhtml+xml') 
+EARLY_STOP_AT_ARTICLE_END = False 
+HEAD_META_SELECTOR_PREFIXES = ('meta[name=', 'meta[property=') 
+USE_LINK_MEMO = True 
+LINK_MEMO_PATH = "link_memo.sqlite" 
+EXTRACTION_PROCESSES = 0 
+EXTRACTION_SPOOL_DIR = "/dev/shm" if os.path.isdir("/dev/shm") else None 
+SEARCH_INDEX_PATH = "news_index.sqlite" 
+BODY_STORE_PATH = "article_bodies" 
+STRUCTURED_LOGGING = False 
 AVAILABLE_LANGUAGES = {"ar": "ar", "zh": "zh-CN", "en": "en-US", "fr": "fr-FR", "de": "de-DE", "el": "el-GR",
                        "he": "he-IL", "hi": "hi-IN", "id": "id-ID", "it": "it-IT", "ja": "ja-JP", "ko": "ko-KR",
                        "ms": "ms-MY", "nl": "nl-NL", "no": "no-NO", "pt": "pt-PT", "ro": "ro-RO", "ru": "ru-RU",
@@ -45,6 +93,8 @@ AVAILABLE_COUNTRIES = {"Argentina": "AR", "Australia": "AU", "Austria": "AT", "B
 DEFAULT_COUNTRY = "US"
 DEFAULT_LANGUAGE = "en"
 
+configure_logging(LOG_PATH, structured=STRUCTURED_LOGGING)
+
 
 
 GOOGLE_NEWS_ITEM_SELECTOR = "div.SoaBEf" 
@@ -89,7 +139,26 @@ ARTICLE_PUBLISH_DATE_SELECTORS = [
     'div.datePublished',
     'span.date'
 ]
-ARTICLE_IMAGE_SELECTOR = 'img[src]' 
+
+
+def _element_date_text(element):
+    return element.get('content') or element.get_text(strip=True)
+
+def _has_href(element):
+    return bool(element.get('href'))
+
+ARTICLE_CASCADES = compile_cascades({
+    'content': ARTICLE_CONTENT_SELECTORS,
+    'author': ARTICLE_AUTHOR_SELECTORS,
+    'publish_date': (ARTICLE_PUBLISH_DATE_SELECTORS, _element_date_text),
+    'canonical': (['link[rel="canonical"]'], _has_href),
+})
+SEARCH_ITEM_CASCADES = compile_cascades({
+    'title': [GOOGLE_TITLE_SELECTOR, GOOGLE_TITLE_SELECTOR_FALLBACK],
+    'snippet': [GOOGLE_SNIPPET_SELECTOR, GOOGLE_SNIPPET_SELECTOR_FALLBACK],
+    'date': [GOOGLE_DATE_SELECTOR, GOOGLE_DATE_SELECTOR_FALLBACK],
+    'source': [GOOGLE_SOURCE_SELECTOR, GOOGLE_SOURCE_SELECTOR_FALLBACK],
+})
 
 
 def get_random_user_agent():
@@ -98,67 +167,237 @@ def get_random_user_agent():
 def get_random_delay():
     return random.uniform(REQUEST_DELAY_MIN, REQUEST_DELAY_MAX)
 
-def extract_article_content(article_url):
-    """Attempts to extract full article content from a given URL."""
+class DomainConcurrencyLimiter:
+    """Caps how many requests may be in flight to any single publisher domain at once."""
+
+    def __init__(self, max_per_domain):
+        self.max_per_domain = max_per_domain
+        self._semaphores = {}
+        self._lock = threading.Lock()
+
+    def _semaphore_for(self, url):
+        domain = urlparse(url).netloc.lower()
+        with self._lock:
+            if domain not in self._semaphores:
+                self._semaphores[domain] = threading.BoundedSemaphore(self.max_per_domain)
+            return self._semaphores[domain]
+
+    def run(self, url, func, *args):
+        """
+        Runs func(*args) once a slot for the domain of url is free. Raises http_client.FetchCancelled
+        if the thread's cancel event is set while waiting.
+        """
+        semaphore = self._semaphore_for(url)
+        while not semaphore.acquire(timeout=DOMAIN_SLOT_POLL_INTERVAL):
+            http_client.interruptible_sleep(0)
+        try:
+            return func(*args)
+        finally:
+            semaphore.release()
+
+def fetch_article(article_url, cache=None, selector_profile=None, extraction_pool=None):
+    """
+    Downloads an article once and extracts content and metadata from a single parse tree.
+    With a SelectorProfile, the selectors that worked for this publisher before are tried first.
+    With an extraction_pool (a ProcessPoolExecutor), parsing and extraction run in a worker process
+    while the calling thread only waits.
+    """
+    with metrics.timed('article'):
+        return _fetch_article(article_url, cache, selector_profile, extraction_pool)
+
+def _fetch_article(article_url, cache, selector_profile, extraction_pool):
+    article, response, order = _download_article(article_url, cache, selector_profile)
+    if response is not None:
+        _extract_downloaded(article, response, article_url, order, selector_profile, extraction_pool)
+    return article
+
+def _download_article(article_url, cache, selector_profile):
+    """
+    The fetch half of fetch_article: downloads the page within the size cap. Returns (article,
+    response, selector order); response is None when the download failed and article holds the error.
+    """
+    article = {'content': None, 'metadata': {}, 'bytes_downloaded': 0, 'parse_time': 0.0, 'ok': False}
+    order = None
     try:
         headers = {'User-Agent': get_random_user_agent()}
-        response = requests.get(article_url, headers=headers, timeout=15) 
-        response.raise_for_status()
-        article_soup = BeautifulSoup(response.content, 'html.parser')
-
-        for selector in ARTICLE_CONTENT_SELECTORS:
-            content_container = article_soup.select_one(selector)
-            if content_container:
-                
-                paragraphs = content_container.find_all('p') 
-                if not paragraphs: 
-                    article_text = content_container.text.strip()
-                else:
-                    article_text = "\n\n".join([p.text.strip() for p in paragraphs]) 
-                return article_text.strip() 
-
-        logging.warning(f"Article content selectors failed for URL: {article_url}")
-        return "Article content extraction failed. Selectors may need adjustment." 
-
+        host = urlparse(article_url).hostname
+        order = selector_profile.order_for(host) if selector_profile is not None else None
+        stop_after_element = 'article' if EARLY_STOP_AT_ARTICLE_END and _article_ends_page(order) else None
+        with metrics.timed('fetch'):
+            response = http_client.fetch(article_url, headers=headers, timeout=15, cache=cache, max_bytes=MAX_ARTICLE_BYTES,
+                                         content_types=ARTICLE_CONTENT_TYPES, stop_after_element=stop_after_element)
+            response.raise_for_status()
+            if not getattr(response, 'from_cache', False):
+                article['bytes_downloaded'] = len(response.content)
+                metrics.increment('bytes_downloaded_total', article['bytes_downloaded'], page='article')
+        if getattr(response, 'truncated', None) == 'max_bytes':
+            logging.warning("Article page larger than %d bytes, parsing only the first %d: %s", MAX_ARTICLE_BYTES, MAX_ARTICLE_BYTES, article_url,
+                            extra={'url': article_url, 'stage': 'fetch'})
+        return article, response, order
+
+    except http_client.FetchCancelled as e:
+        logging.info("Gave up fetching %s: the run is stopping.", article_url, extra={'url': article_url, 'stage': 'fetch'})
+        article['content'] = f"Error fetching article content: {e}"
+    except http_client.ContentTypeRejected as e:
+        logging.info("Skipping non-HTML article %s: %s", article_url, e, extra={'url': article_url, 'stage': 'fetch'})
+        article['content'] = f"Skipped non-HTML content: {e}"
+        metrics.increment('articles_total', outcome='skipped_content_type')
     except requests.exceptions.RequestException as e:
-        logging.error(f"Error fetching article content from {article_url}: {e}")
-        return f"Error fetching article content: {e}"
+        logging.error("Error fetching article content from %s: %s", article_url, e, extra={'url': article_url, 'stage': 'fetch'})
+        article['content'] = f"Error fetching article content: {e}"
+        metrics.increment('articles_total', outcome='fetch_error')
     except Exception as e:
-        logging.error(f"Error processing article content from {article_url}: {e}")
-        return f"Error processing article content: {e}"
+        logging.error("Error processing article content from %s: %s", article_url, e, extra={'url': article_url, 'stage': 'fetch'})
+        article['content'] = f"Error processing article content: {e}"
+        metrics.increment('articles_total', outcome='processing_error')
+    return article, None, order
 
-def extract_metadata(article_soup):
-    """Extracts author, publish date, images, etc. from article soup."""
-    metadata = {
-        'author': 'Unknown',
-        'publish_date': 'Unknown',
-        'image_urls': [],
-        'categories': [], 
-        'keywords': []   
+def _extract_downloaded(article, response, article_url, order, selector_profile, extraction_pool):
+    """The extract half of fetch_article: parses a downloaded page into article's content and metadata."""
+    try:
+        parse_started = time.perf_counter()
+        with metrics.timed('parse'):
+            if extraction_pool is not None:
+                extracted = _extract_in_pool(extraction_pool, response.content, article_url, order)
+                metrics.STAGES.add('extract_worker', *extracted.pop('worker_time'))
+            else:
+                extracted = extract_article(response.content, article_url, order)
+        _count_selector_hits('article', extracted['selector_positions'])
+        if selector_profile is not None:
+            selector_profile.record(urlparse(article_url).hostname, extracted['selector_positions'])
+        article['content_found'] = extracted['content_found']
+        article['content'] = extracted['content']
+        article['metadata'] = extracted['metadata']
+        if extracted['canonical_url']:
+            article['canonical_url'] = extracted['canonical_url']
+        article['parse_time'] = time.perf_counter() - parse_started
+        article['ok'] = True
+        metrics.increment('articles_total', outcome='ok')
+    except Exception as e:
+        logging.error("Error processing article content from %s: %s", article_url, e, extra={'url': article_url, 'stage': 'extract'})
+        article['content'] = f"Error processing article content: {e}"
+        metrics.increment('articles_total', outcome='processing_error')
+    return article
+
+def _article_ends_page(order):
+    """
+    True when the learned selector order says this publisher's content comes from the first
+    <article> and its author and publish date from <head> meta tags (name= or property=; itemprop
+    microdata may sit anywhere in the body), so the download can stop after the first article.
+    Only images up to that point are then listed, which is why EARLY_STOP_AT_ARTICLE_END is off by default.
+    """
+    if not order or order.get('content', [None])[0] != ARTICLE_CONTENT_SELECTORS.index('article'):
+        return False
+    for field, selectors in (('author', ARTICLE_AUTHOR_SELECTORS), ('publish_date', ARTICLE_PUBLISH_DATE_SELECTORS)):
+        preferred = order.get(field)
+        if not preferred or not selectors[preferred[0]].startswith(HEAD_META_SELECTOR_PREFIXES):
+            return False
+    return True
+
+def extract_article(markup, article_url, order=None):
+    """
+    Parses a raw article page and extracts content, metadata and the rel=canonical URL from one parse
+    tree. Returns a plain, picklable dict (so it can be built in a worker process) that also holds
+    the winning selector position of each field.
+    """
+    with metrics.timed('parse_html'):
+        article_soup = make_soup(markup)
+    with metrics.timed('select'):
+        matches = ARTICLE_CASCADES.resolve(article_soup, order)
+    canonical_element = matches['canonical'][1]
+    return {
+        'content': extract_article_content(article_soup, article_url, matches),
+        'metadata': extract_metadata(article_soup, matches),
+        'content_found': matches['content'][1] is not None,
+        'canonical_url': canonical_element['href'] if canonical_element is not None else None,
+        'selector_positions': {field: position for field, (position, _) in matches.items()},
     }
 
-    
-    for selector in ARTICLE_AUTHOR_SELECTORS:
-        author_element = article_soup.select_one(selector)
+def _extract_article_file(path, article_url, order):
+    """
+    Worker-process entry point: extracts an article from the spool file the parent wrote and reports
+    the wall-clock and CPU time it spent, since the worker's own metrics never reach the parent.
+    """
+    wall_started = time.perf_counter()
+    cpu_started = time.process_time()
+    with open(path, 'rb') as page_file:
+        extracted = extract_article(page_file.read(), article_url, order)
+    extracted['worker_time'] = (time.perf_counter() - wall_started, time.process_time() - cpu_started)
+    return extracted
+
+def _extract_in_pool(extraction_pool, markup, article_url, order):
+    """Hands raw HTML to a worker process through a spool file (in shared memory where available)."""
+    spool_file = tempfile.NamedTemporaryFile(prefix='article-', suffix='.html', dir=EXTRACTION_SPOOL_DIR, delete=False)
+    try:
+        with spool_file:
+            spool_file.write(markup)
+        return extraction_pool.submit(_extract_article_file, spool_file.name, article_url, order).result()
+    finally:
+        os.remove(spool_file.name)
+
+def new_extraction_pool(processes=EXTRACTION_PROCESSES):
+    """
+    Creates the process pool used for parsing and extraction. Workers are started with forkserver
+    (or spawn) rather than fork, since the scraper forks from a process that already runs threads.
+    """
+    start_method = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+    return concurrent.futures.ProcessPoolExecutor(max_workers=processes, mp_context=multiprocessing.get_context(start_method))
+
+def _count_selector_hits(page_type, positions):
+    """Counts which selector position (or a miss) decided each field of a resolved cascade."""
+    for field, position in positions.items():
+        metrics.increment('selector_hits_total', page=page_type, field=field, position='miss' if position is None else position)
+
+def extract_article_content(article_soup, article_url, matches=None):
+    """Attempts to extract full article content from an already parsed article page."""
+    with metrics.timed('extract_content'):
+        if matches is None:
+            matches = ARTICLE_CASCADES.resolve(article_soup)
+        content_container = matches['content'][1]
+        if content_container:
+        
+            paragraphs = content_container.find_all('p') 
+            if not paragraphs: 
+                article_text = content_container.text.strip()
+            else:
+                article_text = "\n\n".join([p.text.strip() for p in paragraphs]) 
+            return article_text.strip() 
+
+        logging.warning("Article content selectors failed for URL: %s", article_url, extra={'url': article_url, 'stage': 'extract'})
+        return "Article content extraction failed. Selectors may need adjustment." 
+
+def extract_metadata(article_soup, matches=None):
+    """Extracts author, publish date, images, etc. from article soup."""
+    with metrics.timed('extract_metadata'):
+        if matches is None:
+            matches = ARTICLE_CASCADES.resolve(article_soup)
+        metadata = {
+            'author': 'Unknown',
+            'publish_date': 'Unknown',
+            'image_urls': [],
+            'categories': [], 
+            'keywords': []   
+        }
+
+        author_element = matches['author'][1]
         if author_element:
             metadata['author'] = author_element.get_text(strip=True) or metadata['author'] 
-            break 
 
-    
-    for selector in ARTICLE_PUBLISH_DATE_SELECTORS:
-        date_element = article_soup.select_one(selector)
+        date_element = matches['publish_date'][1]
         if date_element:
-            date_text = date_element.get('content') or date_element.get_text(strip=True) 
-            if date_text:
-                metadata['publish_date'] = date_text
-                break
+            metadata['publish_date'] = _element_date_text(date_element)
+
+        image_elements = article_soup.find_all('img', src=True)
+        metadata['image_urls'] = [img['src'] for img in image_elements if img.get('src')] 
 
-    
-    image_elements = article_soup.select(ARTICLE_IMAGE_SELECTOR)
-    metadata['image_urls'] = [img['src'] for img in image_elements if img.get('src')] 
+        return metadata
 
-    return metadata
 
+def _log_fetch_summary(article_count, bytes_downloaded, parse_time_total):
+    """Reports total article traffic and parse time for a run."""
+    summary = f"Fetched {article_count} articles: {bytes_downloaded} bytes downloaded, {parse_time_total:.2f}s parsing"
+    print(summary)
+    logging.info(summary)
 
 def _construct_ceid(language, country, period=None, start_date=None, end_date=None):
     """Constructs the ceid parameter for Google News URL, handling date/period."""
@@ -185,164 +424,482 @@ def _format_date_param(date):
         return date
     return "" 
 
-def google_news_scraper(keywords, num_articles_limit=None, language=DEFAULT_LANGUAGE, country=DEFAULT_COUNTRY, period=None, start_date=None, end_date=None):
+def build_search_query(keywords):
+    """Joins keywords into the quoted OR query sent to Google News search."""
+    return " OR ".join([f'"{keyword}"' for keyword in keywords]) + " news"
+
+def fetch_search_page(search_query, ceid_param, start):
+    """
+    Fetches the search results page at offset start and returns its result item elements, using the
+    fallback item selector when the primary one finds nothing (an empty list if neither matches).
+    """
+    page = start // 10 + 1
+    search_url = f"https://www.google.com/search?q={search_query}&tbm=nws&start={start}{ceid_param}" 
+    headers = {'User-Agent': get_random_user_agent()}
+    fetch_started = time.perf_counter()
+    with metrics.timed('search_fetch'):
+        response = http_client.fetch(search_url, headers=headers, timeout=10) 
+        response.raise_for_status()
+    metrics.increment('bytes_downloaded_total', len(response.content), page='search')
+    metrics.increment('search_pages_total')
+    fetch_time = time.perf_counter() - fetch_started
+    logging.info("Search page %d: HTTP %d, %d bytes in %.2fs", page, response.status_code, len(response.content), fetch_time,
+                 extra={'url': search_url, 'stage': 'search', 'duration': fetch_time})
+    with metrics.timed('search_parse'):
+        soup = make_soup(response.content)
+    return soup.select(GOOGLE_NEWS_ITEM_SELECTOR) or soup.select(GOOGLE_NEWS_ITEM_SELECTOR_FALLBACK)
+
+def _parse_search_item(item, fetched_at=None):
+    """
+    Extracts link, title, snippet, date and source from a single search result item.
+    The relative date ("3 hours ago") is also stored as a UTC timestamp counted back from fetched_at.
+    """
+    link_element = item.find('a')
+    if not link_element or not link_element.get('href'): 
+        logging.warning("News item missing link. Skipping.")
+        return None
+
+    link = clean_link(link_element['href'])
+
+    matches = SEARCH_ITEM_CASCADES.resolve(item)
+    _count_selector_hits('search_item', {field: position for field, (position, _) in matches.items()})
+    title_element = matches['title'][1]
+    title_text = title_element.get_text(strip=True) if title_element else "Title Not Found"
+    snippet_element = matches['snippet'][1]
+    snippet_text = snippet_element.get_text(strip=True) if snippet_element else "Snippet Not Found"
+    date_element = matches['date'][1]
+    date_text = date_element.get_text(strip=True) if date_element else "Date Not Found"
+    source_element = matches['source'][1]
+    source_text = source_element.get_text(strip=True) if source_element else "Source Not Found"
+
+    return {
+        'search_title': title_text, 
+        'search_snippet': snippet_text,
+        'search_date': date_text,
+        'search_date_utc': normalize_date(date_text, fetched_at) if date_element else '',
+        'search_source': source_text,
+        'search_link': link,
+    }
+
+def _build_result(search_item, article):
+    """Combines search result fields with the fetched article into one output record."""
+    metadata = article['metadata']
+    result = dict(search_item)
+    result.update({
+        'article_title': metadata.get('article_title', 'Title from Search'), 
+        'article_author': metadata.get('author', 'Unknown'),
+        'article_publish_date': metadata.get('publish_date', 'Unknown'),
+        'article_publish_date_utc': normalize_date(metadata.get('publish_date'), relative=False),
+        'article_content': article['content'],
+        'article_image_urls': metadata.get('image_urls', []),
+        'article_categories': metadata.get('categories', []), 
+        'article_keywords': metadata.get('keywords', []),
+        'duplicate_of': article.get('duplicate_of', '')
+    })
+    return result
+
+def _open_seen_index():
+    """Opens the seen-article index, seeding it from the existing output CSV on first use."""
+    seen_index = SeenIndex(SEEN_INDEX_PATH)
+    if not len(seen_index) and os.path.exists(OUTPUT_CSV_FILENAME):
+        body_store = BodyStore(BODY_STORE_PATH) if os.path.isdir(BODY_STORE_PATH) else None
+        try:
+            seen_index.seed_from_csv(OUTPUT_CSV_FILENAME, body_store=body_store)
+        finally:
+            if body_store is not None:
+                body_store.close()
+    return seen_index
+
+def new_near_duplicate_indexes(threshold=NEAR_DUPLICATE_THRESHOLD):
+    """Creates the pre-fetch (title + snippet) and post-fetch (article content) near-duplicate indexes."""
+    return {'snippet': NearDuplicateIndex(threshold), 'content': NearDuplicateIndex(threshold)}
+
+def _duplicate_article(canonical_link):
+    """A placeholder article for a search result collapsed into canonical_link without fetching it."""
+    return {'content': '', 'metadata': {}, 'bytes_downloaded': 0, 'parse_time': 0.0, 'ok': False, 'duplicate_of': canonical_link}
+
+def _finish_job(job, run_stats, seen_index, checkpoint, near_duplicate_indexes, link_resolver=None):
+    """
+    Sink stage of one article: yields its record, then marks it seen/completed. Runs in search order.
+    Canonical URLs found in fetched pages are memoized and marked as seen/completed alongside the search link.
+    """
+    search_item = job['search_item']
+    if job.get('error') is not None:
+        logging.error("Error fetching article %s: %s", search_item['search_link'], job['error'], extra={'url': search_item['search_link'], 'stage': 'fetch'})
+        if checkpoint is not None:
+            checkpoint.mark_completed(search_item['search_link'], submitted=job.get('submitted', False))
+        return
+    article = job['article']
+
+    if 'duplicate_of' not in article:
+        run_stats['articles'] += 1
+        run_stats['bytes_downloaded'] += article['bytes_downloaded']
+        run_stats['parse_time'] += article['parse_time']
+        logging.info("Article fetched: %d bytes downloaded, parsed in %.3fs (%s)", article['bytes_downloaded'], article['parse_time'], search_item['search_link'],
+                     extra={'url': search_item['search_link'], 'stage': 'article', 'duration': job.get('elapsed')})
+        if near_duplicate_indexes is not None and article.get('content_found'):
+            canonical_link = near_duplicate_indexes['content'].check_and_add(search_item['search_link'], article['content'][:NEAR_DUPLICATE_CONTENT_CHARS])
+            if canonical_link:
+                logging.info("Article content is a near-duplicate of %s: %s", canonical_link, search_item['search_link'], extra={'url': search_item['search_link'], 'stage': 'article'})
+                article['duplicate_of'] = canonical_link
+                article['content'] = ''
+                run_stats['duplicates_after_fetch'] += 1
+        if seen_index is not None and article.get('content_found') and 'duplicate_of' not in article:
+            earlier_link = seen_index.url_with_content(content_hash(article['content']), exclude_url=search_item['search_link'])
+            if earlier_link:
+                logging.info("Article content was already scraped from %s: %s", earlier_link, search_item['search_link'], extra={'url': search_item['search_link'], 'stage': 'article'})
+                article['duplicate_of'] = earlier_link
+                article['content'] = ''
+                run_stats['seen_content'] += 1
+    yield _build_result(search_item, article)
+
+    links = [search_item['search_link']]
+    if link_resolver is not None and article.get('canonical_url'):
+        canonical_url = link_resolver.record(search_item['search_link'], article['canonical_url'])
+        if canonical_url and canonical_url != search_item['search_link']:
+            links.append(canonical_url)
+    for link in links:
+        if seen_index is not None and article['ok']:
+            seen_index.add(link, article['content'])
+        if checkpoint is not None:
+            checkpoint.mark_completed(link, submitted=job.get('submitted', False) and link == search_item['search_link'])
+
+def _open_checkpoint(checkpoint_path, search_query, ceid_param, resume):
+    """Loads a matching checkpoint when resuming, otherwise starts a new one."""
+    if resume:
+        checkpoint = Checkpoint.load(checkpoint_path)
+        if checkpoint is not None and checkpoint.matches(search_query, ceid_param):
+            print(f"Resuming from search offset {checkpoint.start} with {checkpoint.submitted_count} articles already completed.")
+            logging.info("Resuming from checkpoint %s: start=%d, completed=%d, links=%d", checkpoint_path, checkpoint.start, checkpoint.submitted_count, len(checkpoint.completed_urls))
+            checkpoint.reopen()
+            return checkpoint
+        print("No matching checkpoint found. Starting a new run.")
+        logging.warning("No checkpoint matching this query in %s. Starting a new run.", checkpoint_path)
+    checkpoint = Checkpoint(checkpoint_path, search_query, ceid_param)
+    checkpoint.begin()
+    return checkpoint
+
+def iter_google_news(keywords, num_articles_limit=None, language=DEFAULT_LANGUAGE, country=DEFAULT_COUNTRY, period=None, start_date=None, end_date=None,
+                     max_workers=MAX_FETCH_WORKERS, max_per_domain=MAX_FETCH_PER_DOMAIN, use_cache=USE_RESPONSE_CACHE,
+                     incremental=INCREMENTAL_MODE, checkpoint_path=None, resume=False,
+                     search_rate_limiter=None, domain_limiter=None, claim_link=None,
+                     near_duplicates=NEAR_DUPLICATE_MODE, near_duplicate_indexes=None,
+                     use_selector_profile=USE_SELECTOR_PROFILE, selector_profile=None,
+                     use_link_memo=USE_LINK_MEMO, link_resolver=None,
+                     extraction_processes=EXTRACTION_PROCESSES, extraction_pool=None,
+                     extract_workers=None, queue_size=STAGE_QUEUE_SIZE):
     """
     Scrapes Google News results, extracts full content and metadata.
     Implements robust selectors, error handling, logging, and language/country/date filtering.
+    The scrape runs as a pipeline of stages connected by bounded queues of queue_size (see pipeline.py):
+    search (pages and parses results one page at a time, paced by the shared per-host rate limiter)
+    -> fetch (max_workers threads, with at most max_per_domain requests in flight per publisher domain)
+    -> extract (extract_workers threads, EXTRACT_WORKERS or one per extraction process by default)
+    -> the caller. A full queue blocks the stage feeding it, so searching never runs far ahead of
+    fetching; per-stage queue depths are printed at the end to show which stage held the run back.
+    Records are yielded as soon as they are ready, in the order the articles appeared in the
+    search results, so callers can write them out without holding the whole run in memory.
+    With use_cache, article pages go through the on-disk response cache at RESPONSE_CACHE_PATH.
+    With incremental, links already recorded in the seen index at SEEN_INDEX_PATH are skipped before
+    any fetch, and pagination stops at the first page that holds nothing new.
+    With checkpoint_path, progress (search offset and completed article URLs) is recorded as the run
+    goes; with resume, a matching checkpoint from an interrupted run is picked up where it stopped.
+    Callers running several searches at once can share a search_rate_limiter (anything with a
+    TokenBucket-style acquire(sleep=...) method, taken before each search page), a DomainConcurrencyLimiter, and a claim_link
+    callable that returns False for links another search has already taken.
+    near_duplicates controls syndicated-copy collapsing: 'snippet' checks title + snippet before
+    fetching and article content after, 'content' only checks content, 'off' disables it.
+    Collapsed records keep their search fields, carry the canonical link in duplicate_of, and have
+    no article content. near_duplicate_indexes (see new_near_duplicate_indexes) may be shared.
+    With use_selector_profile, article selectors are reordered per publisher from the learned profile
+    at SELECTOR_PROFILE_PATH, which is updated as the run goes; a selector_profile may also be shared.
+    Result links are always unwrapped from Google redirects and stripped of tracking parameters; with
+    use_link_memo, links whose rel=canonical URL was seen before resolve to it through the memo at
+    LINK_MEMO_PATH (or a shared link_resolver).
+    With extraction_processes > 0, article parsing and extraction run in a pool of that many worker
+    processes (or a shared extraction_pool from new_extraction_pool), fed by the extract stage's threads.
+    Records carry search_date_utc and article_publish_date_utc, the dates normalized to UTC. When the
+    search is limited by period or start_date / end_date, results certainly dated outside those dates
+    are skipped without fetching, and pagination stops at the first page that has no result inside them.
     """
-    results = []
-    articles_scraped_count = 0
-    search_query = " OR ".join([f'"{keyword}"' for keyword in keywords]) + " news"
+    run_stats = {'articles': 0, 'bytes_downloaded': 0, 'parse_time': 0.0, 'duplicates_before_fetch': 0, 'duplicates_after_fetch': 0, 'outside_window': 0, 'skipped_seen': 0, 'seen_content': 0}
+    search_query = build_search_query(keywords)
     ceid_param = _construct_ceid(language, country, period, start_date, end_date) 
+    window = date_window(period, start_date, end_date)
+    date_bounded = window != (None, None)
     print(f"Search Query: {search_query}")
-    logging.info(f"Starting scraper for keywords: {keywords}, language: {language}, country: {country}, period: {period}, start_date: {start_date}, end_date: {end_date}. Target articles: {num_articles_limit if num_articles_limit else 'Unlimited'}")
-
-    page = 0
-    while True: 
-        start = page * 10
-        search_url = f"https://www.google.com/search?q={search_query}&tbm=nws&start={start}{ceid_param}" 
-        headers = {'User-Agent': get_random_user_agent()}
-
-        try:
-            print(f"Fetching search page {page+1}...")
-            logging.info(f"Fetching search page {page+1}...") 
-            response = requests.get(search_url, headers=headers, timeout=10) 
-            response.raise_for_status()
-            soup = BeautifulSoup(response.content, 'html.parser')
-
-            
-            news_items = soup.select(GOOGLE_NEWS_ITEM_SELECTOR)
-            if not news_items:
-                news_items = soup.select(GOOGLE_NEWS_ITEM_SELECTOR_FALLBACK)
+    logging.info("Starting scraper for keywords: %s, language: %s, country: %s, period: %s, start_date: %s, end_date: %s. Target articles: %s",
+                 keywords, language, country, period, start_date, end_date, num_articles_limit or 'Unlimited')
+
+    domain_limiter = domain_limiter or DomainConcurrencyLimiter(max_per_domain)
+    cache = ResponseCache(RESPONSE_CACHE_PATH, RESPONSE_CACHE_TTL, RESPONSE_CACHE_MAX_BYTES) if use_cache else None
+    owns_selector_profile = selector_profile is None and use_selector_profile
+    if owns_selector_profile:
+        selector_profile = SelectorProfile(ARTICLE_CASCADES, SELECTOR_PROFILE_PATH)
+    owns_link_resolver = link_resolver is None and use_link_memo
+    if owns_link_resolver:
+        link_resolver = LinkResolver(LINK_MEMO_PATH)
+    owns_extraction_pool = extraction_pool is None and extraction_processes > 0
+    if owns_extraction_pool:
+        extraction_pool = new_extraction_pool(extraction_processes)
+    seen_index = _open_seen_index() if incremental else None
+    if near_duplicates == 'off':
+        near_duplicate_indexes = None
+    elif near_duplicate_indexes is None:
+        near_duplicate_indexes = new_near_duplicate_indexes()
+    checkpoint = _open_checkpoint(checkpoint_path, search_query, ceid_param, resume) if checkpoint_path else None
+    completed_urls = checkpoint.completed_urls if checkpoint is not None else set()
+    finished = False
+    # Set when a search page still fails after retries, so the checkpoint is kept for --resume.
+    search_failed = False
+
+    def search_stage():
+        """Source stage: pages through the results and yields a job per article to fetch, plus a marker after each page."""
+        nonlocal search_failed
+        http_client.set_cancel_event(scraper_pipeline.stop_event)
+        submitted_count = checkpoint.submitted_count if checkpoint is not None else 0
+        page = checkpoint.start // 10 if checkpoint is not None else 0
+        while True: 
+            start = page * 10
+
+            try:
+                if search_rate_limiter is not None:
+                    search_rate_limiter.acquire(sleep=http_client.interruptible_sleep)
+                logging.info("Fetching search page %d...", page + 1, extra={'stage': 'search'})
+                news_items = fetch_search_page(search_query, ceid_param, start)
+                fetched_at = utc_now()
                 if not news_items:
-                    logging.warning(f"No news items found on page {page+1} using primary or fallback selectors. Google Search structure might have changed significantly.")
+                    logging.warning("No news items found on page %d using primary or fallback selectors. Google Search structure might have changed significantly.", page + 1, extra={'stage': 'search'})
                     print(f"Warning: No news items found on page {page+1}. Search structure might have changed.")
                     break 
 
-            logging.info(f"Page {page+1}: Found {len(news_items)} news items.") 
-
-            if not news_items: 
-                print("Reached end of Google News results (no items on page).")
-                logging.info("Reached end of Google News results (no items on page).")
-                break 
-
-            for item in news_items:
-                if num_articles_limit and articles_scraped_count >= num_articles_limit:
+                logging.info("Page %d: Found %d news items.", page + 1, len(news_items), extra={'stage': 'search'})
+
+                seen_on_page = 0
+                new_on_page = 0
+                inside_window_on_page = 0
+                outside_window_on_page = 0
+                for item in news_items:
+                    if num_articles_limit and submitted_count >= num_articles_limit:
+                        break
+
+                    try: 
+                        with metrics.timed('search_item'):
+                            search_item = _parse_search_item(item, fetched_at)
+                        if not search_item:
+                            continue
+                        if date_bounded:
+                            if outside_window(parse_date(search_item['search_date'], fetched_at), window):
+                                outside_window_on_page += 1
+                                logging.info("Skipping result dated %s, outside the requested dates: %s", search_item['search_date'], search_item['search_link'],
+                                             extra={'url': search_item['search_link'], 'stage': 'search'})
+                                continue
+                            inside_window_on_page += 1
+                        if link_resolver is not None:
+                            search_item['search_link'] = link_resolver.resolve(search_item['search_link'])
+                        if search_item['search_link'] in completed_urls:
+                            continue
+
+                        if seen_index is not None and seen_index.contains(search_item['search_link']):
+                            seen_on_page += 1
+                            logging.info("Skipping already scraped article: %s", search_item['search_link'], extra={'url': search_item['search_link'], 'stage': 'search'})
+                            continue
+                        new_on_page += 1
+                        if claim_link is not None and not claim_link(search_item['search_link']):
+                            logging.info("Skipping article already claimed by another search: %s", search_item['search_link'], extra={'url': search_item['search_link'], 'stage': 'search'})
+                            continue
+                        if near_duplicates == 'snippet':
+                            canonical_link = near_duplicate_indexes['snippet'].check_and_add(
+                                search_item['search_link'], f"{search_item['search_title']} {search_item['search_snippet']}")
+                            if canonical_link:
+                                logging.info("Search result is a near-duplicate of %s, not fetching: %s", canonical_link, search_item['search_link'], extra={'url': search_item['search_link'], 'stage': 'search'})
+                                run_stats['duplicates_before_fetch'] += 1
+                                yield {'search_item': search_item, 'article': _duplicate_article(canonical_link)}
+                                continue
+
+                        logging.info("Extracting data for article: %s", search_item['search_title'], extra={'url': search_item['search_link'], 'stage': 'search'})
+                        submitted_count += 1
+                        yield {'search_item': search_item, 'article': None, 'submitted': True}
+
+                    except Exception as e: 
+                        logging.error("Error processing news item: %s", e, exc_info=True, extra={'stage': 'search'})
+                        continue 
+
+                if num_articles_limit and submitted_count >= num_articles_limit:
                     print(f"Reached article limit of {num_articles_limit}. Stopping scraping.")
-                    logging.info(f"Scraping stopped: Reached article limit of {num_articles_limit}.")
-                    return results 
-
-                try: 
-                    link_element = item.find('a')
-                    if not link_element or not link_element.get('href'): 
-                        logging.warning("News item missing link. Skipping.")
-                        continue
-
-                    link = link_element['href']
-                    if not link.startswith("http"): 
-                        link = "https://www.google.com" + link 
-
-                    
-                    title_element = item.select_one(GOOGLE_TITLE_SELECTOR)
-                    if not title_element:
-                        title_element = item.select_one(GOOGLE_TITLE_SELECTOR_FALLBACK)
-                    title_text = title_element.get_text(strip=True) if title_element else "Title Not Found"
-
-                    
-                    snippet_element = item.select_one(GOOGLE_SNIPPET_SELECTOR)
-                    if not snippet_element:
-                        snippet_element = item.select_one(GOOGLE_SNIPPET_SELECTOR_FALLBACK)
-                    snippet_text = snippet_element.get_text(strip=True) if snippet_element else "Snippet Not Found"
-
-                    
-                    date_element = item.select_one(GOOGLE_DATE_SELECTOR)
-                    if not date_element:
-                        date_element = item.select_one(GOOGLE_DATE_SELECTOR_FALLBACK)
-                    date_text = date_element.get_text(strip=True) if date_element else "Date Not Found"
-
-                    
-                    source_element = item.select_one(GOOGLE_SOURCE_SELECTOR)
-                    if not source_element:
-                        source_element = item.select_one(GOOGLE_SOURCE_SELECTOR_FALLBACK)
-                    source_text = source_element.get_text(strip=True) if source_element else "Source Not Found"
-
-
-                    print(f"Scraping article: {title_text[:50]}...") 
-                    logging.info(f"Extracting data for article: {title_text}")
-
-                    article_content = extract_article_content(link) 
-                    article_soup_for_metadata = BeautifulSoup(requests.get(link, headers={'User-Agent': get_random_user_agent()}, timeout=10).content, 'html.parser') 
-                    metadata = extract_metadata(article_soup_for_metadata) 
-
-                    results.append({
-                        'search_title': title_text, 
-                        'search_snippet': snippet_text,
-                        'search_date': date_text,
-                        'search_source': source_text,
-                        'search_link': link,
-                        'article_title': metadata.get('article_title', 'Title from Search'), 
-                        'article_author': metadata.get('author', 'Unknown'),
-                        'article_publish_date': metadata.get('publish_date', 'Unknown'),
-                        'article_content': article_content,
-                        'article_image_urls': metadata.get('image_urls', []),
-                        'article_categories': metadata.get('categories', []), 
-                        'article_keywords': metadata.get('keywords', [])     
-                    })
-                    articles_scraped_count += 1
-
-                except Exception as e: 
-                    logging.error(f"Error processing news item: {e}", exc_info=True) 
-                    print(f"Warning: Error processing a news item. Skipping. Error: {e}")
-                    continue 
-
-            page += 1
-            if not news_items: 
-                print("Reached end of Google News results (no items on page).")
-                logging.info("Reached end of Google News results (no items on page).")
+                    logging.info("Scraping stopped: Reached article limit of %d.", num_articles_limit)
+                    break
+
+                run_stats['outside_window'] += outside_window_on_page
+                if outside_window_on_page and not inside_window_on_page:
+                    print(f"Page {page+1} only has results outside the requested dates. Stopping.")
+                    logging.info("Date window: page %d only has results outside the requested dates. Stopping pagination.", page + 1)
+                    break
+
+                run_stats['skipped_seen'] += seen_on_page
+                if seen_on_page and not new_on_page:
+                    print(f"Page {page+1} contains only already scraped articles. Stopping.")
+                    logging.info("Incremental mode: page %d contains only already scraped articles. Stopping pagination.", page + 1)
+                    break
+
+                page += 1
+                # Reaches the sink once every article before it is done, so the checkpoint can move past this page.
+                yield {'search_item': None, 'next_start': page * 10}
+                if http_client.get_rate_limiter() is None and scraper_pipeline.sleep(get_random_delay()):
+                    break
+
+            except requests.exceptions.RequestException as e: 
+                logging.error("Error fetching search page %d: %s", page + 1, e, extra={'stage': 'search'})
+                print(f"Error fetching search page {page+1}: {e}")
+                search_failed = True
                 break 
+            except Exception as e: 
+                logging.error("Unexpected error processing search page %d: %s", page + 1, e, exc_info=True, extra={'stage': 'search'})
+                print(f"Unexpected error processing search page {page+1}: {e}")
+                search_failed = True
+                break
 
-            time.sleep(get_random_delay()) 
-
-        except requests.exceptions.RequestException as e: 
-            logging.error(f"Error fetching search page {page+1}: {e}")
-            print(f"Error fetching search page {page+1}: {e}")
-            break 
-        except Exception as e: 
-            logging.error(f"Unexpected error processing search page {page+1}: {e}", exc_info=True)
-            print(f"Unexpected error processing search page {page+1}: {e}")
-            break
-
-    print("Scraping complete.")
-    logging.info("Scraping completed.")
-    return results
+    def fetch_stage(job):
+        """Downloads the article of a job, holding a slot of its publisher's domain while doing so."""
+        if job['search_item'] is not None and job['article'] is None:
+            http_client.set_cancel_event(scraper_pipeline.stop_event)
+            link = job['search_item']['search_link']
+            job['started'] = time.perf_counter()
+            cpu_started = time.thread_time()
+            try:
+                job['article'], job['response'], job['order'] = domain_limiter.run(link, _download_article, link, cache, selector_profile)
+            except Exception as e:
+                job['error'] = e
+            job['cpu'] = time.thread_time() - cpu_started
+        return job
+
+    def extract_stage(job):
+        """Parses and extracts a downloaded article (in the extraction pool, when there is one)."""
+        response = job.pop('response', None)
+        if response is not None:
+            cpu_started = time.thread_time()
+            try:
+                _extract_downloaded(job['article'], response, job['search_item']['search_link'], job['order'], selector_profile, extraction_pool)
+            except Exception as e:
+                job['error'] = e
+            job['cpu'] += time.thread_time() - cpu_started
+        if 'started' in job:
+            job['elapsed'] = time.perf_counter() - job['started']
+            metrics.STAGES.add('article', job['elapsed'], job['cpu'])
+        return job
+
+    scraper_pipeline = Pipeline(search_stage, [
+        Stage('fetch', fetch_stage, workers=max_workers, queue_size=queue_size),
+        Stage('extract', extract_stage, workers=extract_workers or max(EXTRACT_WORKERS, extraction_processes), queue_size=queue_size),
+    ], queue_size=queue_size, name='scraper')
+    try:
+        for job in scraper_pipeline.results():
+            if job['search_item'] is None:
+                if checkpoint is not None:
+                    checkpoint.advance(job['next_start'])
+                continue
+            yield from _finish_job(job, run_stats, seen_index, checkpoint, near_duplicate_indexes, link_resolver)
+
+        if search_failed:
+            print("Scraping stopped early because a search page could not be fetched.")
+            logging.warning("Scraping stopped early: a search page could not be fetched.")
+        else:
+            print("Scraping complete.")
+            logging.info("Scraping completed.")
+            finished = True
+    finally:
+        scraper_pipeline.stop()
+        print(scraper_pipeline.summary_table())
+        logging.info("Pipeline stages:\n%s", scraper_pipeline.summary_table())
+        scraper_pipeline.export_metrics()
+        _log_fetch_summary(run_stats['articles'], run_stats['bytes_downloaded'], run_stats['parse_time'])
+        if near_duplicate_indexes is not None:
+            print(f"Near-duplicates collapsed: {run_stats['duplicates_before_fetch']} before fetching, {run_stats['duplicates_after_fetch']} after.")
+            logging.info("Near-duplicates collapsed: %d before fetching, %d after.", run_stats['duplicates_before_fetch'], run_stats['duplicates_after_fetch'])
+        if date_bounded:
+            print(f"Date window: skipped {run_stats['outside_window']} results dated outside the requested dates without fetching them.")
+            logging.info("Date window: skipped %d results dated outside the requested dates.", run_stats['outside_window'])
+        if seen_index is not None:
+            print(f"Incremental mode: skipped {run_stats['skipped_seen']} already scraped articles, {run_stats['seen_content']} republished under a new link.")
+            logging.info("Incremental mode: skipped %d already scraped articles, %d republished under a new link.", run_stats['skipped_seen'], run_stats['seen_content'])
+            seen_index.close()
+        if cache is not None:
+            print(cache.summary())
+            logging.info(cache.summary())
+            cache.close()
+        if owns_selector_profile:
+            selector_profile.close()
+        if owns_extraction_pool:
+            extraction_pool.shutdown(cancel_futures=True)
+        if link_resolver is not None:
+            print(link_resolver.summary())
+            logging.info(link_resolver.summary())
+            if owns_link_resolver:
+                link_resolver.close()
+        if http_client.get_rate_limiter() is not None:
+            print(http_client.get_rate_limiter().summary())
+            logging.info(http_client.get_rate_limiter().summary())
+        if checkpoint is not None:
+            if finished:
+                checkpoint.clear()
+            else:
+                checkpoint.close()
+                print(f"Run interrupted. Progress saved to {checkpoint.path}; rerun with --resume to continue.")
+                logging.warning("Run interrupted. Progress saved to %s.", checkpoint.path)
+
+def google_news_scraper(keywords, num_articles_limit=None, **kwargs):
+    """Runs iter_google_news to completion and returns all records as a list."""
+    return list(iter_google_news(keywords, num_articles_limit, **kwargs))
 
 
 if __name__ == "__main__":
-    print("Starting Advanced Google News Scraper (v2 - Language/Country/Date Filtering)...")
-    
-    news_data = google_news_scraper(
-        KEYWORDS_LIST,
-        num_articles_limit=50, 
-        language="en", 
-        country="India",   
-        period=None,    
-        
-        
-    )
+    parser = argparse.ArgumentParser(description="Advanced Google News Scraper")
+    parser.add_argument('--resume', action='store_true', help=f"continue an interrupted run from {CHECKPOINT_PATH}")
+    parser.add_argument('--processes', type=int, default=EXTRACTION_PROCESSES, help="worker processes for parsing and extraction (0 = parse on the extract threads)")
+    parser.add_argument('--metrics', default=METRICS_EXPORT_PATH, help="write run metrics here (.json for JSON, otherwise Prometheus text format)")
+    parser.add_argument('--index', default=SEARCH_INDEX_PATH, help="also add every record to this full-text search index (empty to skip)")
+    parser.add_argument('--bodies', nargs='?', const=BODY_STORE_PATH, default='', help=f"store article content in this deduplicated body store (default {BODY_STORE_PATH}) and write only its hash")
+    parser.add_argument('--log-json', action='store_true', help=f"write {LOG_PATH} as JSON Lines events (run id, url, stage, duration)")
+    args = parser.parse_args()
+    if args.log_json:
+        configure_logging(LOG_PATH, structured=True)
 
-    if news_data:
-        csv_filename = OUTPUT_CSV_FILENAME
-        fieldnames = ['search_title', 'search_snippet', 'search_date', 'search_source', 'search_link',
-                      'article_title', 'article_author', 'article_publish_date', 'article_content',
-                      'article_image_urls', 'article_categories', 'article_keywords']
-
-        with open(csv_filename, "w", newline="", encoding="utf-8") as csv_file:
-            writer = csv.DictWriter(csv_file, fieldnames=fieldnames)
-            writer.writeheader()
-            writer.writerows(news_data)
-        print(f"Data saved to {csv_filename}")
-        logging.info(f"Data saved to {csv_filename}")
+    print("Starting Advanced Google News Scraper (v2 - Language/Country/Date Filtering)...")
 
+    search_index = SearchIndex(args.index) if args.index else None
+    body_store = BodyStore(args.bodies) if args.bodies else None
+    with open_sink(OUTPUT_CSV_FILENAME, append=INCREMENTAL_MODE or args.resume) as output_sink:
+        sink = BodyStoreSink(output_sink, body_store) if body_store is not None else output_sink
+        for record in iter_google_news(
+            KEYWORDS_LIST,
+            num_articles_limit=50, 
+            language="en", 
+            country="India",   
+            period=None,    
+            checkpoint_path=CHECKPOINT_PATH,
+            resume=args.resume,
+            extraction_processes=args.processes,
+        ):
+            with metrics.timed('write'):
+                sink.write(record)
+                if search_index is not None:
+                    search_index.write(record)
+    if search_index is not None:
+        search_index.close()
+    if body_store is not None:
+        print(body_store.summary())
+        logging.info(body_store.summary())
+        body_store.close()
+
+    print(metrics.summary_table())
+    logging.info("Run metrics:\n%s", metrics.summary_table())
+    if args.metrics:
+        metrics.export(args.metrics)
+        print(f"Metrics written to {args.metrics}")
+
+    if sink.rows_written:
+        print(f"Data saved to {OUTPUT_CSV_FILENAME}")
+        logging.info("Data saved to %s", OUTPUT_CSV_FILENAME)
     else:
         print("No news articles found or an error occurred during scraping.")
-        logging.warning("No news articles found or errors during scraping.")
\ No newline at end of file
+        logging.warning("No news articles found or errors during scraping.")
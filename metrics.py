@@ -0,0 +1,164 @@
+import collections
+import contextlib
+import datetime
+import json
+import threading
+import time
+
+
+MAX_SAMPLES_PER_STAGE = 100000
+METRIC_PREFIX = "scraper_"
+SUMMARY_QUANTILES = (0.5, 0.95)
+
+
+class StageTimer:
+    """Accumulates call counts, wall-clock time, thread CPU time and latency samples per named stage."""
+
+    def __init__(self, max_samples=MAX_SAMPLES_PER_STAGE):
+        self.max_samples = max_samples
+        self._stages = {}
+        self._lock = threading.Lock()
+
+    @contextlib.contextmanager
+    def time(self, stage):
+        wall_started = time.perf_counter()
+        cpu_started = time.thread_time()
+        try:
+            yield
+        finally:
+            self.add(stage, time.perf_counter() - wall_started, time.thread_time() - cpu_started)
+
+    def add(self, stage, wall, cpu=0.0):
+        with self._lock:
+            entry = self._stages.get(stage)
+            if entry is None:
+                entry = {'count': 0, 'wall': 0.0, 'cpu': 0.0, 'samples': collections.deque(maxlen=self.max_samples)}
+                self._stages[stage] = entry
+            entry['count'] += 1
+            entry['wall'] += wall
+            entry['cpu'] += cpu
+            entry['samples'].append(wall)
+
+    def stats(self):
+        """Returns a copy of {stage: {'count', 'wall', 'cpu', 'samples'}}."""
+        with self._lock:
+            return {stage: dict(entry, samples=list(entry['samples'])) for stage, entry in self._stages.items()}
+
+    def percentile(self, stage, fraction):
+        """Nearest-rank percentile (fraction in 0..1) of a stage's wall-clock samples, or None."""
+        with self._lock:
+            entry = self._stages.get(stage)
+            samples = list(entry['samples']) if entry else []
+        return _quantile(samples, fraction)
+
+    def reset(self):
+        with self._lock:
+            self._stages.clear()
+
+
+class CounterSet:
+    """Thread-safe monotonic counters keyed by name and a set of string labels."""
+
+    def __init__(self):
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def increment(self, name, value=1, **labels):
+        key = (name, tuple(sorted((label, str(label_value)) for label, label_value in labels.items())))
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + value
+
+    def items(self):
+        """Returns [(name, labels dict, value)] sorted by name and labels."""
+        with self._lock:
+            return [(name, dict(labels), value) for (name, labels), value in sorted(self._values.items())]
+
+    def reset(self):
+        with self._lock:
+            self._values.clear()
+
+
+STAGES = StageTimer()
+COUNTERS = CounterSet()
+
+
+def timed(stage):
+    """Times a block under the given stage name in the process-wide StageTimer."""
+    return STAGES.time(stage)
+
+def increment(name, value=1, **labels):
+    """Adds value to a process-wide counter, e.g. increment('http_responses_total', status=200)."""
+    COUNTERS.increment(name, value, **labels)
+
+def reset():
+    STAGES.reset()
+    COUNTERS.reset()
+
+def _escape_label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def _format_labels(labels):
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape_label(value)}"' for name, value in labels.items()) + '}'
+
+def _quantile(samples, fraction):
+    if not samples:
+        return None
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, max(0, int(round(fraction * len(samples) + 0.5)) - 1))]
+
+def to_prometheus():
+    """Renders all stage timings and counters in the Prometheus text exposition format."""
+    lines = []
+    stats = STAGES.stats()
+    if stats:
+        lines.append(f"# TYPE {METRIC_PREFIX}stage_seconds summary")
+        for stage, entry in sorted(stats.items()):
+            for fraction in SUMMARY_QUANTILES:
+                lines.append(f"{METRIC_PREFIX}stage_seconds{_format_labels({'stage': stage, 'quantile': fraction})} {_quantile(entry['samples'], fraction)}")
+            lines.append(f"{METRIC_PREFIX}stage_seconds_sum{_format_labels({'stage': stage})} {entry['wall']}")
+            lines.append(f"{METRIC_PREFIX}stage_seconds_count{_format_labels({'stage': stage})} {entry['count']}")
+        lines.append(f"# TYPE {METRIC_PREFIX}stage_cpu_seconds_total counter")
+        for stage, entry in sorted(stats.items()):
+            lines.append(f"{METRIC_PREFIX}stage_cpu_seconds_total{_format_labels({'stage': stage})} {entry['cpu']}")
+    declared = set()
+    for name, labels, value in COUNTERS.items():
+        if name not in declared:
+            lines.append(f"# TYPE {METRIC_PREFIX}{name} counter")
+            declared.add(name)
+        lines.append(f"{METRIC_PREFIX}{name}{_format_labels(labels)} {value}")
+    return '\n'.join(lines) + '\n'
+
+def to_dict():
+    stages = {}
+    for stage, entry in STAGES.stats().items():
+        stages[stage] = {'count': entry['count'], 'wall_seconds': entry['wall'], 'cpu_seconds': entry['cpu']}
+        for fraction in SUMMARY_QUANTILES:
+            stages[stage][f"p{int(fraction * 100)}_seconds"] = _quantile(entry['samples'], fraction)
+    counters = {}
+    for name, labels, value in COUNTERS.items():
+        counters.setdefault(name, []).append({'labels': labels, 'value': value})
+    return {'generated_at': datetime.datetime.now(datetime.timezone.utc).isoformat(), 'stages': stages, 'counters': counters}
+
+def export(path):
+    """Writes the current metrics to path: JSON for a .json file, Prometheus text format otherwise."""
+    with open(path, 'w', encoding='utf-8') as metrics_file:
+        if path.endswith('.json'):
+            json.dump(to_dict(), metrics_file, indent=2)
+        else:
+            metrics_file.write(to_prometheus())
+
+def summary_table():
+    """Returns a plain-text table of stage timings followed by all counters."""
+    lines = [f"{'stage':<16}{'calls':>8}{'wall s':>10}{'cpu s':>10}{'p50 ms':>10}{'p95 ms':>10}"]
+    for stage, entry in sorted(STAGES.stats().items()):
+        p50, p95 = (_quantile(entry['samples'], fraction) for fraction in (0.5, 0.95))
+        lines.append(f"{stage:<16}{entry['count']:>8}{entry['wall']:>10.2f}{entry['cpu']:>10.3f}{p50 * 1000:>10.1f}{p95 * 1000:>10.1f}")
+    counters = COUNTERS.items()
+    if counters:
+        lines.append("")
+        width = max(len(name + _format_labels(labels)) for name, labels, _ in counters) + 2
+        for name, labels, value in counters:
+            lines.append(f"{(name + _format_labels(labels)):<{width}}{value:>10}")
+    return '\n'.join(lines)
@@ -0,0 +1,91 @@
+import hashlib
+import random
+import re
+import threading
+
+
+SHINGLE_SIZE = 3
+NUM_PERMUTATIONS = 64
+LSH_BANDS = 16
+SIMILARITY_THRESHOLD = 0.8
+
+_MERSENNE_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+_TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def shingles(text, size=SHINGLE_SIZE):
+    """Returns the set of lowercase word n-grams of text (the whole text if it is shorter than n words)."""
+    tokens = _TOKEN_RE.findall((text or '').lower())
+    if len(tokens) <= size:
+        return {' '.join(tokens)} if tokens else set()
+    return {' '.join(tokens[i:i + size]) for i in range(len(tokens) - size + 1)}
+
+
+class MinHasher:
+    """Computes MinHash signatures using NUM_PERMUTATIONS universal hash functions."""
+
+    def __init__(self, num_permutations=NUM_PERMUTATIONS, seed=1):
+        rng = random.Random(seed)
+        self.num_permutations = num_permutations
+        self._params = [(rng.randrange(1, _MERSENNE_PRIME), rng.randrange(0, _MERSENNE_PRIME)) for _ in range(num_permutations)]
+
+    def signature(self, shingle_set):
+        hashes = [int.from_bytes(hashlib.blake2b(shingle.encode('utf-8'), digest_size=4).digest(), 'little') for shingle in shingle_set]
+        if not hashes:
+            return None
+        return tuple(min(((a * h + b) % _MERSENNE_PRIME) & _MAX_HASH for h in hashes) for a, b in self._params)
+
+    @staticmethod
+    def similarity(signature_a, signature_b):
+        """Estimated Jaccard similarity of the two shingle sets."""
+        return sum(1 for a, b in zip(signature_a, signature_b) if a == b) / len(signature_a)
+
+
+class NearDuplicateIndex:
+    """
+    MinHash/LSH index mapping texts to the first (canonical) key that was added with similar text.
+    Signatures are split into LSH_BANDS bands; texts sharing any band become candidates and are
+    confirmed against the estimated Jaccard similarity threshold. Safe to share between threads.
+    """
+
+    def __init__(self, threshold=SIMILARITY_THRESHOLD, num_permutations=NUM_PERMUTATIONS, bands=LSH_BANDS):
+        if num_permutations % bands:
+            raise ValueError("num_permutations must be divisible by bands")
+        self.threshold = threshold
+        self.bands = bands
+        self.rows = num_permutations // bands
+        self.hasher = MinHasher(num_permutations)
+        self._buckets = [{} for _ in range(bands)]
+        self._signatures = {}
+        self._lock = threading.Lock()
+
+    def _band_keys(self, signature):
+        return [signature[band * self.rows:(band + 1) * self.rows] for band in range(self.bands)]
+
+    def check_and_add(self, key, text):
+        """
+        Returns the canonical key of an earlier near-duplicate of text, or None after recording
+        text under key as a new canonical entry.
+        """
+        signature = self.hasher.signature(shingles(text))
+        if signature is None:
+            return None
+        band_keys = self._band_keys(signature)
+        with self._lock:
+            candidates = []
+            for band, band_key in enumerate(band_keys):
+                for candidate in self._buckets[band].get(band_key, ()):
+                    if candidate not in candidates:
+                        candidates.append(candidate)
+            for candidate in candidates:
+                if MinHasher.similarity(signature, self._signatures[candidate]) >= self.threshold:
+                    return candidate
+            self._signatures[key] = signature
+            for band, band_key in enumerate(band_keys):
+                self._buckets[band].setdefault(band_key, []).append(key)
+        return None
+
+    def __len__(self):
+        with self._lock:
+            return len(self._signatures)
@@ -0,0 +1,75 @@
+import argparse
+import glob
+import os
+import statistics
+import time
+
+from html_parsers import available_backends, make_soup
+from main3 import extract_article_content, extract_metadata
+
+
+def _extract_fields(soup, path):
+    fields = extract_metadata(soup)
+    fields['content'] = extract_article_content(soup, path)
+    return fields
+
+def benchmark_page(path, backends, repeat):
+    """Times parsing and extraction of one saved page with each backend."""
+    with open(path, 'rb') as page_file:
+        markup = page_file.read()
+
+    timings = {}
+    fields = {}
+    for backend in backends:
+        parse_times = []
+        extract_times = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            soup = make_soup(markup, backend)
+            parsed = time.perf_counter()
+            fields[backend] = _extract_fields(soup, path)
+            extract_times.append(time.perf_counter() - parsed)
+            parse_times.append(parsed - started)
+        timings[backend] = (statistics.median(parse_times), statistics.median(extract_times))
+    return len(markup), timings, fields
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare HTML parser backends on saved article pages.")
+    parser.add_argument('fixtures', nargs='?', default='fixtures', help="directory of saved .html pages (searched recursively)")
+    parser.add_argument('--backends', nargs='+', default=available_backends(), help="tree builders to compare")
+    parser.add_argument('--repeat', type=int, default=5, help="runs per page; the median is reported")
+    args = parser.parse_args()
+
+    paths = sorted(glob.glob(os.path.join(args.fixtures, '**', '*.htm*'), recursive=True))
+    if not paths:
+        print(f"No .html fixtures found under {args.fixtures}")
+        return
+
+    reference = 'html.parser' if 'html.parser' in args.backends else args.backends[0]
+    totals = {backend: [0.0, 0.0] for backend in args.backends}
+    mismatches = {backend: 0 for backend in args.backends}
+
+    print(f"{'page':40} {'bytes':>9}  " + "  ".join(f"{backend + ' parse/extract (ms)':>32}" for backend in args.backends))
+    for path in paths:
+        size, timings, fields = benchmark_page(path, args.backends, args.repeat)
+        columns = []
+        for backend in args.backends:
+            parse_time, extract_time = timings[backend]
+            totals[backend][0] += parse_time
+            totals[backend][1] += extract_time
+            same = fields[backend] == fields[reference]
+            if not same:
+                mismatches[backend] += 1
+            columns.append(f"{parse_time * 1000:14.2f} / {extract_time * 1000:10.2f}{'' if same else ' *'}")
+        print(f"{os.path.basename(path)[:40]:40} {size:9d}  " + "  ".join(f"{column:>32}" for column in columns))
+
+    print()
+    for backend in args.backends:
+        parse_total, extract_total = totals[backend]
+        print(f"{backend:12} parse {parse_total * 1000:10.1f} ms  extract {extract_total * 1000:10.1f} ms  "
+              f"total {(parse_total + extract_total) * 1000:10.1f} ms  pages differing from {reference}: {mismatches[backend]}")
+    print("\n* extracted fields differ from the reference backend")
+
+
+if __name__ == "__main__":
+    main()
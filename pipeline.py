@@ -0,0 +1,250 @@
+import heapq
+import logging
+import queue
+import threading
+import time
+
+import metrics
+
+
+PIPELINE_QUEUE_SIZE = 32
+# How often threads blocked on a queue wake up to check whether the pipeline is stopping.
+POLL_INTERVAL = 0.1
+# How long stop() waits for each thread; stage functions should make their waits end on stop_event.
+STOP_TIMEOUT = 30
+
+_DONE = object()
+
+
+class _Stopped(Exception):
+    """Raised inside pipeline threads once the pipeline is stopping."""
+
+
+class Stage:
+    """
+    One step of a Pipeline: workers threads that take items from a bounded input queue, apply func,
+    and pass the result on. Keeps the numbers that show whether the stage is a bottleneck: how full
+    its input queue runs, how long producers were blocked on it (backpressure), and how long its own
+    workers sat idle waiting for input.
+    """
+
+    def __init__(self, name, func, workers=1, queue_size=PIPELINE_QUEUE_SIZE):
+        self.name = name
+        self.func = func
+        self.workers = workers
+        self.input = queue.Queue(queue_size)
+        self.queue_size = queue_size
+        self.stats = {'items': 0, 'busy': 0.0, 'blocked': 0.0, 'idle': 0.0, 'max_depth': 0, 'depth_total': 0, 'depth_samples': 0}
+        self._finished_workers = 0
+        self._lock = threading.Lock()
+
+    def _record(self, **amounts):
+        with self._lock:
+            for name, amount in amounts.items():
+                self.stats[name] += amount
+
+    def mean_depth(self):
+        return self.stats['depth_total'] / self.stats['depth_samples'] if self.stats['depth_samples'] else 0.0
+
+
+class Pipeline:
+    """
+    Runs a source generator and a chain of stages on threads, connected by bounded queues.
+
+    The source runs on its own thread and feeds the first stage; each stage's workers feed the next
+    stage, and the last one feeds results(), which the caller iterates (the sink stage). A full
+    queue blocks whoever feeds it, so a slow stage holds back everything upstream instead of letting
+    work pile up. With ordered=True, results() yields items in the order the source produced them,
+    and the source waits while window items are between it and results(), so one stalled item
+    holds at most window others in memory (by default, as many as the queues and workers hold).
+    Stage functions that wait (backoff, rate limits) should wake up on stop_event.
+    Stage functions should handle per-item errors themselves; an exception escaping one stops the
+    pipeline and is re-raised from results(). Leaving results() early (or calling stop()) stops every
+    thread at its next queue operation and closes the source generator.
+    """
+
+    def __init__(self, source, stages, ordered=True, queue_size=PIPELINE_QUEUE_SIZE, name='pipeline', window=None):
+        self.source = source
+        self.stages = stages
+        self.ordered = ordered
+        self.name = name
+        self.sink = Stage('sink', None, workers=1, queue_size=queue_size)
+        self.window = window or sum(stage.queue_size + stage.workers for stage in stages) + queue_size
+        self.error = None
+        self._stopping = threading.Event()
+        self._window = threading.Semaphore(self.window) if ordered else None
+        self._threads = []
+
+    @property
+    def stop_event(self):
+        """Set once the pipeline is stopping (see http_client.set_cancel_event)."""
+        return self._stopping
+
+    def stopping(self):
+        return self._stopping.is_set()
+
+    def sleep(self, seconds):
+        """Sleeps for seconds, or less if the pipeline is stopping. Returns True if it is stopping."""
+        return self._stopping.wait(seconds)
+
+    def _put(self, stage, item):
+        # Depth as the item finds it: a full queue here means the producer is about to block.
+        depth = stage.input.qsize()
+        started = time.perf_counter()
+        while True:
+            try:
+                stage.input.put(item, timeout=POLL_INTERVAL)
+                break
+            except queue.Full:
+                if self._stopping.is_set():
+                    raise _Stopped()
+        if item is _DONE:
+            return
+        with stage._lock:
+            stage.stats['blocked'] += time.perf_counter() - started
+            stage.stats['depth_total'] += depth
+            stage.stats['depth_samples'] += 1
+            stage.stats['max_depth'] = max(stage.stats['max_depth'], depth)
+
+    def _get(self, stage):
+        started = time.perf_counter()
+        while True:
+            try:
+                item = stage.input.get(timeout=POLL_INTERVAL)
+                break
+            except queue.Empty:
+                if self._stopping.is_set():
+                    raise _Stopped()
+        stage._record(idle=time.perf_counter() - started)
+        return item
+
+    def _enter_window(self, stage):
+        # Waiting for the slowest in-flight item counts as backpressure on the first stage.
+        started = time.perf_counter()
+        while not self._window.acquire(timeout=POLL_INTERVAL):
+            if self._stopping.is_set():
+                raise _Stopped()
+        stage._record(blocked=time.perf_counter() - started)
+
+    def _fail(self, error):
+        if self.error is None:
+            self.error = error
+        self._stopping.set()
+
+    def _finish(self, downstream):
+        for _ in range(downstream.workers):
+            self._put(downstream, _DONE)
+
+    def _run_source(self, first):
+        generator = self.source()
+        try:
+            for seq, item in enumerate(generator):
+                if self._window is not None:
+                    self._enter_window(first)
+                self._put(first, (seq, item))
+            self._finish(first)
+        except _Stopped:
+            pass
+        except BaseException as e:
+            logging.error(f"{self.name}: source failed: {e}", exc_info=True)
+            self._fail(e)
+        finally:
+            generator.close()
+
+    def _run_worker(self, stage, downstream):
+        try:
+            while True:
+                entry = self._get(stage)
+                if entry is _DONE:
+                    with stage._lock:
+                        stage._finished_workers += 1
+                        last = stage._finished_workers == stage.workers
+                    if last:
+                        self._finish(downstream)
+                    return
+                seq, item = entry
+                started = time.perf_counter()
+                result = stage.func(item)
+                stage._record(items=1, busy=time.perf_counter() - started)
+                self._put(downstream, (seq, result))
+        except _Stopped:
+            pass
+        except BaseException as e:
+            if self._stopping.is_set() and self.error is None:
+                # A wait cut short by stop_event, not a failure.
+                logging.debug(f"{self.name}: stage {stage.name} interrupted while stopping: {e}")
+                return
+            logging.error(f"{self.name}: stage {stage.name} failed: {e}", exc_info=True)
+            self._fail(e)
+
+    def start(self):
+        chain = self.stages + [self.sink]
+        self._threads.append(threading.Thread(target=self._run_source, args=(chain[0],), name=f"{self.name}-source", daemon=True))
+        for stage, downstream in zip(self.stages, chain[1:]):
+            for worker in range(stage.workers):
+                self._threads.append(threading.Thread(target=self._run_worker, args=(stage, downstream), name=f"{self.name}-{stage.name}-{worker}", daemon=True))
+        for thread in self._threads:
+            thread.start()
+
+    def results(self):
+        """Starts the pipeline if needed and yields what the last stage produces."""
+        if not self._threads:
+            self.start()
+        pending = []
+        next_seq = 0
+        try:
+            while True:
+                try:
+                    entry = self._get(self.sink)
+                except _Stopped:
+                    break
+                if entry is _DONE:
+                    break
+                heapq.heappush(pending, entry)
+                while pending and (not self.ordered or pending[0][0] == next_seq):
+                    item = heapq.heappop(pending)[1]
+                    next_seq += 1
+                    if self._window is not None:
+                        self._window.release()
+                    # Time the caller spends between items is the sink stage's work.
+                    handed_over = time.perf_counter()
+                    yield item
+                    self.sink._record(items=1, busy=time.perf_counter() - handed_over)
+        finally:
+            self.stop()
+        if self.error is not None:
+            raise self.error
+
+    def stop(self):
+        """Stops all threads and waits up to STOP_TIMEOUT for each; safe to call more than once."""
+        self._stopping.set()
+        for thread in self._threads:
+            thread.join(STOP_TIMEOUT)
+            if thread.is_alive():
+                logging.warning(f"{self.name}: thread {thread.name} did not stop within {STOP_TIMEOUT}s; leaving it behind.")
+
+    def stage_stats(self):
+        """Returns [(stage, stats dict)] in pipeline order, sink last."""
+        return [(stage, dict(stage.stats, mean_depth=stage.mean_depth())) for stage in self.stages + [self.sink]]
+
+    def bottleneck(self):
+        """The stage whose input queue ran fullest on average, or None if no queue ever filled up."""
+        fullest = max(self.stages + [self.sink], key=lambda stage: stage.mean_depth() / stage.queue_size)
+        return fullest if fullest.stats['max_depth'] >= fullest.queue_size else None
+
+    def summary_table(self):
+        lines = [f"{'stage':<10}{'workers':>8}{'items':>8}{'busy s':>9}{'idle s':>9}{'queue max':>11}{'mean':>7}{'blocked s':>11}"]
+        for stage, stats in self.stage_stats():
+            lines.append(f"{stage.name:<10}{stage.workers:>8}{stats['items']:>8}{stats['busy']:>9.2f}{stats['idle']:>9.2f}"
+                         f"{stats['max_depth']:>6}/{stage.queue_size:<4}{stats['mean_depth']:>7.1f}{stats['blocked']:>11.2f}")
+        bottleneck = self.bottleneck()
+        if bottleneck is not None:
+            lines.append(f"Bottleneck: {bottleneck.name} (input queue {100 * bottleneck.mean_depth() / bottleneck.queue_size:.0f}% full on average)")
+        return "\n".join(lines)
+
+    def export_metrics(self):
+        """Adds the per-stage totals to the run metrics (see metrics.py)."""
+        for stage, stats in self.stage_stats():
+            metrics.increment('pipeline_items_total', stats['items'], stage=stage.name)
+            metrics.increment('pipeline_blocked_seconds_total', stats['blocked'], stage=stage.name)
+            metrics.increment('pipeline_idle_seconds_total', stats['idle'], stage=stage.name)
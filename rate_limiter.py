@@ -0,0 +1,118 @@
+import threading
+import time
+from urllib.parse import urlparse
+
+
+class TokenBucket:
+    """Thread-safe token bucket. acquire() blocks until a token is available."""
+
+    def __init__(self, rate, capacity=1):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self, tokens=1, sleep=time.sleep):
+        """Takes tokens from the bucket, sleeping (with sleep) until enough have accumulated. Returns the time waited."""
+        waited = 0.0
+        while True:
+            with self._lock:
+                self._refill(time.monotonic())
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return waited
+                wait = (tokens - self._tokens) / self.rate
+            sleep(wait)
+            waited += wait
+
+
+INITIAL_HOST_RATE = 2.0
+MIN_HOST_RATE = 0.1
+MAX_HOST_RATE = 10.0
+# (initial, max) requests/second for hosts that must not be paced like publishers. Google search stays
+# at the pace of the old 1-3 s random delay however cleanly it answers.
+HOST_RATE_OVERRIDES = {'www.google.com': (0.5, 0.5)}
+ADDITIVE_INCREASE = 0.05
+MULTIPLICATIVE_DECREASE = 0.5
+SLOW_RESPONSE_DECREASE = 0.9
+SLOW_RESPONSE_RATIO = 2.0
+LATENCY_SMOOTHING = 0.2
+THROTTLE_STATUS_CODES = {429, 503}
+
+
+class AdaptiveRateLimiter:
+    """
+    Token buckets keyed by host whose refill rates adapt to how each host responds (AIMD).
+    Every healthy response adds ADDITIVE_INCREASE requests/second to the host's rate; a 429/503 or a
+    connection failure multiplies it by MULTIPLICATIVE_DECREASE, and a response much slower than the
+    host's smoothed latency trims it slightly. One instance is meant to be shared by all workers.
+    overrides maps a host to its own (initial rate, max rate), replacing initial_rate and max_rate.
+    """
+
+    def __init__(self, initial_rate=INITIAL_HOST_RATE, min_rate=MIN_HOST_RATE, max_rate=MAX_HOST_RATE, overrides=None):
+        self.initial_rate = initial_rate
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.overrides = dict(HOST_RATE_OVERRIDES if overrides is None else overrides)
+        self._hosts = {}
+        self._lock = threading.Lock()
+
+    def _state(self, host):
+        state = self._hosts.get(host)
+        if state is None:
+            initial_rate, max_rate = self.overrides.get(host, (self.initial_rate, self.max_rate))
+            state = {'rate': initial_rate, 'max_rate': max_rate, 'tokens': 1.0, 'updated': time.monotonic(),
+                     'latency': None, 'requests': 0, 'throttled': 0}
+            self._hosts[host] = state
+        return state
+
+    def acquire(self, url, sleep=time.sleep):
+        """Waits (with sleep) for the host's next request slot. Returns the time waited."""
+        host = urlparse(url).netloc.lower()
+        waited = 0.0
+        while True:
+            with self._lock:
+                state = self._state(host)
+                now = time.monotonic()
+                state['tokens'] = min(1.0, state['tokens'] + (now - state['updated']) * state['rate'])
+                state['updated'] = now
+                if state['tokens'] >= 1.0:
+                    state['tokens'] -= 1.0
+                    state['requests'] += 1
+                    return waited
+                wait = (1.0 - state['tokens']) / state['rate']
+            sleep(wait)
+            waited += wait
+
+    def record(self, url, status=None, latency=None, error=False):
+        """Feeds a request outcome back into the host's rate."""
+        host = urlparse(url).netloc.lower()
+        with self._lock:
+            state = self._state(host)
+            if error or status in THROTTLE_STATUS_CODES:
+                state['rate'] = max(self.min_rate, state['rate'] * MULTIPLICATIVE_DECREASE)
+                state['throttled'] += 1
+                return
+            if latency is not None:
+                average = state['latency']
+                state['latency'] = latency if average is None else average + LATENCY_SMOOTHING * (latency - average)
+                if average is not None and latency > SLOW_RESPONSE_RATIO * average:
+                    state['rate'] = max(self.min_rate, state['rate'] * SLOW_RESPONSE_DECREASE)
+                    return
+            state['rate'] = min(state['max_rate'], state['rate'] + ADDITIVE_INCREASE)
+
+    def rates(self):
+        """Returns {host: current requests/second}."""
+        with self._lock:
+            return {host: state['rate'] for host, state in self._hosts.items()}
+
+    def summary(self, limit=10):
+        with self._lock:
+            busiest = sorted(self._hosts.items(), key=lambda item: item[1]['requests'], reverse=True)[:limit]
+            return "Host rates: " + ", ".join(
+                f"{host} {state['rate']:.2f}/s ({state['requests']} requests, {state['throttled']} throttled)" for host, state in busiest)
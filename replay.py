@@ -0,0 +1,206 @@
+import argparse
+import hashlib
+import http.server
+import json
+import logging
+import os
+import random
+import threading
+import time
+from urllib.parse import parse_qs, quote, urlparse
+
+import http_client
+from url_utils import normalize_url
+
+
+FIXTURES_DIR = "fixtures"
+MANIFEST_FILENAME = "manifest.json"
+REPLAY_HOST = "127.0.0.1"
+REPLAY_PORT = 8765
+REPLAY_LATENCY = (0.05, 0.25)
+REPLAY_ERROR_RATE = 0.0
+REPLAY_ERROR_STATUS = 503
+REPLAYED_HEADERS = ('Content-Type', 'ETag', 'Last-Modified', 'Cache-Control', 'Retry-After')
+
+
+def fixture_key(url):
+    return hashlib.sha1(normalize_url(url).encode('utf-8')).hexdigest()[:20]
+
+
+class FixtureStore:
+    """
+    A directory of recorded responses. Each URL is stored as <key>.html (the decoded body, so the
+    directory can be fed straight to parser_benchmark.py) and <key>.json (URL, status and headers).
+    manifest.json records the scraper parameters of the recording run so it can be replayed exactly.
+    """
+
+    def __init__(self, directory=FIXTURES_DIR):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, url, extension):
+        return os.path.join(self.directory, fixture_key(url) + extension)
+
+    def save(self, url, response):
+        meta = {
+            'url': url,
+            'status': response.status_code,
+            'headers': {name: response.headers[name] for name in REPLAYED_HEADERS if name in response.headers},
+        }
+        with open(self._path(url, '.html'), 'wb') as body_file:
+            body_file.write(response.content)
+        with open(self._path(url, '.json'), 'w', encoding='utf-8') as meta_file:
+            json.dump(meta, meta_file)
+
+    def load(self, url):
+        """Returns (meta, body) for a recorded URL, or None."""
+        try:
+            with open(self._path(url, '.json'), encoding='utf-8') as meta_file:
+                meta = json.load(meta_file)
+            with open(self._path(url, '.html'), 'rb') as body_file:
+                return meta, body_file.read()
+        except FileNotFoundError:
+            return None
+
+    def __len__(self):
+        return sum(1 for name in os.listdir(self.directory) if name.endswith('.json') and name != MANIFEST_FILENAME)
+
+    def write_manifest(self, params):
+        with open(os.path.join(self.directory, MANIFEST_FILENAME), 'w', encoding='utf-8') as manifest_file:
+            json.dump(params, manifest_file, indent=2)
+
+    def read_manifest(self):
+        with open(os.path.join(self.directory, MANIFEST_FILENAME), encoding='utf-8') as manifest_file:
+            return json.load(manifest_file)
+
+
+class _ReplayHandler(http.server.BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        replay = self.server.replay
+        url = parse_qs(urlparse(self.path).query).get('url', [''])[0]
+        time.sleep(replay.latency())
+
+        if replay.inject_error():
+            self._respond(replay.error_status, {'Content-Type': 'text/plain'}, b'injected error')
+            return
+        recorded = replay.store.load(url) if url else None
+        if recorded is None:
+            logging.warning(f"Replay server has no fixture for {url}")
+            self._respond(404, {'Content-Type': 'text/plain'}, b'not recorded')
+            return
+        meta, body = recorded
+        self._respond(meta['status'], meta['headers'], body)
+
+    def _respond(self, status, headers, body):
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        logging.debug("Replay server: " + format % args)
+
+
+class ReplayServer:
+    """
+    A local stand-in for Google and the publishers that serves a FixtureStore over HTTP.
+    Each response is delayed by a uniform random latency and, with probability error_rate,
+    replaced by an error_status response. Use url_for with http_client.set_url_rewriter.
+    """
+
+    def __init__(self, store, host=REPLAY_HOST, port=REPLAY_PORT, latency=REPLAY_LATENCY,
+                 error_rate=REPLAY_ERROR_RATE, error_status=REPLAY_ERROR_STATUS, seed=None):
+        self.store = store
+        self.latency_range = latency
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self._random = random.Random(seed)
+        self._server = http.server.ThreadingHTTPServer((host, port), _ReplayHandler)
+        self._server.daemon_threads = True
+        self._server.replay = self
+        self._thread = None
+
+    @property
+    def address(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def latency(self):
+        return self._random.uniform(*self.latency_range)
+
+    def inject_error(self):
+        return self.error_rate > 0 and self._random.random() < self.error_rate
+
+    def url_for(self, url):
+        return f"{self.address}/replay?url={quote(url, safe='')}"
+
+    def serve_forever(self):
+        self._server.serve_forever()
+
+    def start(self):
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+
+
+def record(store, keywords, num_articles_limit, language, country):
+    """Runs a live scrape with every network response saved into the fixture store."""
+    from main3 import google_news_scraper
+
+    hook = store.save
+    http_client.add_response_hook(hook)
+    try:
+        records = google_news_scraper(keywords, num_articles_limit, language=language, country=country,
+                                      use_cache=False, incremental=False)
+    finally:
+        http_client.remove_response_hook(hook)
+    store.write_manifest({'keywords': keywords, 'num_articles_limit': num_articles_limit,
+                          'language': language, 'country': country})
+    return records
+
+
+if __name__ == "__main__":
+    from main3 import KEYWORDS_LIST, NUM_ARTICLES_TO_SCRAPE, DEFAULT_LANGUAGE, DEFAULT_COUNTRY
+
+    parser = argparse.ArgumentParser(description="Record live scraper traffic into fixtures, or serve recorded fixtures locally.")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    record_parser = subparsers.add_parser('record', help="scrape live and save every response")
+    record_parser.add_argument('--dir', default=FIXTURES_DIR)
+    record_parser.add_argument('--limit', type=int, default=NUM_ARTICLES_TO_SCRAPE, help="articles to scrape")
+    record_parser.add_argument('--language', default=DEFAULT_LANGUAGE)
+    record_parser.add_argument('--country', default=DEFAULT_COUNTRY)
+    serve_parser = subparsers.add_parser('serve', help="serve recorded fixtures until interrupted")
+    serve_parser.add_argument('--dir', default=FIXTURES_DIR)
+    serve_parser.add_argument('--port', type=int, default=REPLAY_PORT)
+    serve_parser.add_argument('--latency', type=float, nargs=2, default=REPLAY_LATENCY, metavar=('MIN', 'MAX'), help="seconds")
+    serve_parser.add_argument('--error-rate', type=float, default=REPLAY_ERROR_RATE)
+    serve_parser.add_argument('--error-status', type=int, default=REPLAY_ERROR_STATUS)
+    args = parser.parse_args()
+
+    fixture_store = FixtureStore(args.dir)
+    if args.command == 'record':
+        scraped = record(fixture_store, KEYWORDS_LIST, args.limit, args.language, args.country)
+        print(f"Recorded {len(fixture_store)} responses for {len(scraped)} articles into {args.dir}")
+    else:
+        server = ReplayServer(fixture_store, port=args.port, latency=tuple(args.latency),
+                              error_rate=args.error_rate, error_status=args.error_status)
+        print(f"Serving {len(fixture_store)} recorded responses at {server.address}/replay?url=<url> (Ctrl+C to stop)")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            print("Stopped.")
@@ -0,0 +1,221 @@
+import argparse
+import csv
+import json
+import logging
+import os
+import re
+import sqlite3
+import sys
+import time
+
+from body_store import BodyStore, BODY_STORE_PATH
+from date_utils import parse_absolute_date, to_utc_iso
+
+
+SEARCH_INDEX_PATH = "news_index.sqlite"
+# bm25 weights of the indexed columns: title, snippet, content.
+BM25_WEIGHTS = (10.0, 4.0, 1.0)
+SNIPPET_TOKENS = 16
+
+
+def _publish_day(record):
+    """
+    Returns the UTC day (YYYY-MM-DD) an article was published: from its normalized publish date,
+    else its raw publish date if that is absolute, else the normalized search result date.
+    """
+    published_at = record.get('article_publish_date_utc')
+    if not published_at:
+        estimate = parse_absolute_date(record.get('article_publish_date') or '')
+        published_at = to_utc_iso(estimate.when) if estimate else record.get('search_date_utc')
+    return published_at[:10] if published_at else None
+
+def build_match_query(text, phrase=False):
+    """
+    Turns free text into an FTS5 MATCH expression: every word must occur (in any order), or with
+    phrase=True the words must occur together in this order. Quoting each term keeps punctuation
+    and FTS5 operators in user input from being parsed as query syntax.
+    """
+    terms = re.findall(r"\w+", text)
+    if not terms:
+        return None
+    if phrase:
+        return '"' + ' '.join(terms) + '"'
+    return ' '.join(f'"{term}"' for term in terms)
+
+
+class SearchIndex:
+    """
+    A full-text index of scraped records in SQLite (FTS5, porter stemming), one row per search link.
+    It has the same write/close interface as the sinks in sinks.py, so records can be indexed as
+    they are scraped; a record for a link that is already indexed replaces it. Every write is
+    committed straight away, so the index can be queried while a scrape is still running.
+    """
+
+    def __init__(self, path=SEARCH_INDEX_PATH):
+        self.path = path
+        self.rows_written = 0
+        self._conn = sqlite3.connect(path, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS articles (
+                id INTEGER PRIMARY KEY,
+                link TEXT NOT NULL UNIQUE,
+                title TEXT NOT NULL,
+                snippet TEXT NOT NULL,
+                content TEXT NOT NULL,
+                source TEXT,
+                author TEXT,
+                search_date TEXT,
+                publish_date TEXT,
+                publish_day TEXT,
+                duplicate_of TEXT,
+                indexed_at REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS articles_source ON articles (source COLLATE NOCASE);
+            CREATE INDEX IF NOT EXISTS articles_publish_day ON articles (publish_day);
+            CREATE VIRTUAL TABLE IF NOT EXISTS articles_fts USING fts5(
+                title, snippet, content, content='articles', content_rowid='id', tokenize='porter unicode61 remove_diacritics 2'
+            );
+            CREATE TRIGGER IF NOT EXISTS articles_fts_insert AFTER INSERT ON articles BEGIN
+                INSERT INTO articles_fts (rowid, title, snippet, content) VALUES (new.id, new.title, new.snippet, new.content);
+            END;
+            CREATE TRIGGER IF NOT EXISTS articles_fts_delete AFTER DELETE ON articles BEGIN
+                INSERT INTO articles_fts (articles_fts, rowid, title, snippet, content) VALUES ('delete', old.id, old.title, old.snippet, old.content);
+            END;
+            CREATE TRIGGER IF NOT EXISTS articles_fts_update AFTER UPDATE ON articles BEGIN
+                INSERT INTO articles_fts (articles_fts, rowid, title, snippet, content) VALUES ('delete', old.id, old.title, old.snippet, old.content);
+                INSERT INTO articles_fts (rowid, title, snippet, content) VALUES (new.id, new.title, new.snippet, new.content);
+            END;
+        """)
+
+    def __len__(self):
+        return self._conn.execute("SELECT COUNT(*) FROM articles").fetchone()[0]
+
+    def write(self, record):
+        title = record.get('article_title') or ''
+        if not title or title == 'Title from Search':
+            title = record.get('search_title') or ''
+        publish_date = record.get('article_publish_date') or ''
+        self._conn.execute(
+            "INSERT INTO articles (link, title, snippet, content, source, author, search_date, publish_date, publish_day, duplicate_of, indexed_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?) ON CONFLICT(link) DO UPDATE SET "
+            "title = excluded.title, snippet = excluded.snippet, content = excluded.content, source = excluded.source, "
+            "author = excluded.author, search_date = excluded.search_date, publish_date = excluded.publish_date, "
+            "publish_day = excluded.publish_day, duplicate_of = excluded.duplicate_of, indexed_at = excluded.indexed_at",
+            (record['search_link'], title, record.get('search_snippet') or '', record.get('article_content') or '',
+             record.get('search_source'), record.get('article_author'), record.get('search_date'), publish_date,
+             _publish_day(record), record.get('duplicate_of') or None, time.time())
+        )
+        self.rows_written += 1
+
+    def search(self, query=None, source=None, since=None, until=None, limit=10, phrase=False, raw=False):
+        """
+        Returns up to limit matching articles as dicts, best match first. query is free text (see
+        build_match_query), or FTS5 query syntax with raw=True; without a query the newest articles
+        matching the filters come first. source matches search_source case-insensitively, and
+        since / until (YYYY-MM-DD, inclusive) filter on the publish day, leaving out articles whose
+        publish date is unknown.
+        """
+        match = (query if raw else build_match_query(query, phrase)) if query else None
+        conditions, params = [], []
+        if source:
+            conditions.append("a.source = ? COLLATE NOCASE")
+            params.append(source)
+        if since:
+            conditions.append("a.publish_day >= ?")
+            params.append(since)
+        if until:
+            conditions.append("a.publish_day <= ?")
+            params.append(until)
+        columns = "a.link, a.title, a.source, a.author, a.publish_day, a.duplicate_of"
+        if match:
+            weights = ', '.join(str(weight) for weight in BM25_WEIGHTS)
+            sql = (f"SELECT {columns}, bm25(articles_fts, {weights}) AS score, "
+                   f"snippet(articles_fts, 2, '[', ']', '...', {SNIPPET_TOKENS}) "
+                   "FROM articles_fts JOIN articles a ON a.id = articles_fts.rowid WHERE articles_fts MATCH ?")
+            params.insert(0, match)
+            order = "score"
+        else:
+            sql = f"SELECT {columns}, NULL, substr(a.content, 1, 200) FROM articles a WHERE 1"
+            order = "a.publish_day IS NULL, a.publish_day DESC, a.id DESC"
+        sql += ''.join(f" AND {condition}" for condition in conditions) + f" ORDER BY {order} LIMIT ?"
+        params.append(limit)
+        names = ('link', 'title', 'source', 'author', 'publish_day', 'duplicate_of', 'score', 'excerpt')
+        return [dict(zip(names, row)) for row in self._conn.execute(sql, params)]
+
+    def import_file(self, path, body_store=None):
+        """
+        Indexes every record of an existing CSV or JSON Lines output file in one transaction and returns
+        the number indexed. Content moved into a body_store (see body_store.py) is read back from it.
+        """
+        before = self.rows_written
+        with open(path, newline="", encoding="utf-8") as records_file:
+            if path.endswith(('.jsonl', '.ndjson')):
+                records = (json.loads(line) for line in records_file if line.strip())
+            else:
+                csv.field_size_limit(sys.maxsize)
+                records = csv.DictReader(records_file)
+            self._conn.execute("BEGIN")
+            try:
+                for record in records:
+                    if record.get('search_link'):
+                        self.write(body_store.hydrate(record) if body_store is not None else record)
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                self.rows_written = before
+                raise
+        self.optimize()
+        return self.rows_written - before
+
+    def optimize(self):
+        """Merges the FTS5 index segments; worth running after a large import."""
+        self._conn.execute("INSERT INTO articles_fts (articles_fts) VALUES ('optimize')")
+
+    def close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+            logging.info(f"Search index closed: {self.rows_written} records indexed into {self.path}")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Query the full-text index of scraped articles.")
+    parser.add_argument('query', nargs='?', help="words that must all occur (stemmed, any order)")
+    parser.add_argument('--index', default=SEARCH_INDEX_PATH)
+    parser.add_argument('--phrase', action='store_true', help="match the query words as an exact phrase")
+    parser.add_argument('--raw', action='store_true', help="pass the query to FTS5 as is (OR, NOT, NEAR(), prefix*)")
+    parser.add_argument('--source', help="only articles from this search_source")
+    parser.add_argument('--since', help="only articles published on or after this day (YYYY-MM-DD)")
+    parser.add_argument('--until', help="only articles published on or before this day (YYYY-MM-DD)")
+    parser.add_argument('--limit', type=int, default=10)
+    parser.add_argument('--json', action='store_true', help="print results as JSON Lines")
+    parser.add_argument('--import', dest='import_paths', nargs='+', metavar='FILE', help="index existing CSV / JSON Lines output files first")
+    parser.add_argument('--bodies', default=BODY_STORE_PATH, help="body store to read imported article content from when rows only hold its hash")
+    args = parser.parse_args()
+
+    with SearchIndex(args.index) as index:
+        body_store = BodyStore(args.bodies) if args.import_paths and os.path.isdir(args.bodies) else None
+        for import_path in args.import_paths or []:
+            print(f"Indexed {index.import_file(import_path, body_store)} records from {import_path}")
+        if body_store is not None:
+            body_store.close()
+        if args.query or args.source or args.since or args.until or not args.import_paths:
+            started = time.perf_counter()
+            results = index.search(args.query, args.source, args.since, args.until, args.limit, args.phrase, args.raw)
+            elapsed = time.perf_counter() - started
+            for result in results:
+                if args.json:
+                    print(json.dumps(result, ensure_ascii=False))
+                else:
+                    print(f"{result['publish_day'] or 'unknown':<11}{result['source'] or '':<24.24}{result['title']}")
+                    print(f"{'':<11}{result['link']}")
+                    print(f"{'':<11}{' '.join((result['excerpt'] or '').split())}\n")
+            print(f"{len(results)} results in {elapsed * 1000:.1f} ms ({len(index)} articles indexed)", file=sys.stderr)
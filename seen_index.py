@@ -0,0 +1,90 @@
+import csv
+import hashlib
+import logging
+import sqlite3
+import threading
+import time
+
+from url_utils import normalize_url
+
+
+SEEN_INDEX_PATH = "seen_articles.sqlite"
+
+
+def content_hash(text):
+    """Returns a stable hash of article text, ignoring surrounding whitespace."""
+    return hashlib.sha256((text or '').strip().encode('utf-8')).hexdigest()
+
+
+class SeenIndex:
+    """Persistent index of article links (canonicalized) and content hashes from earlier runs."""
+
+    def __init__(self, path=SEEN_INDEX_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS seen (
+                key TEXT PRIMARY KEY,
+                url TEXT NOT NULL,
+                content_hash TEXT,
+                first_seen REAL NOT NULL,
+                last_seen REAL NOT NULL
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS seen_content_hash ON seen (content_hash)")
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM seen").fetchone()[0]
+
+    def contains(self, url):
+        with self._lock:
+            return self._conn.execute("SELECT 1 FROM seen WHERE key = ?", (normalize_url(url),)).fetchone() is not None
+
+    def url_with_content(self, digest, exclude_url=None):
+        """Returns the earliest seen link (other than exclude_url) whose content hashed to digest, or None."""
+        exclude_key = normalize_url(exclude_url) if exclude_url else None
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT url FROM seen WHERE content_hash = ? AND key IS NOT ? ORDER BY first_seen LIMIT 1", (digest, exclude_key)
+            ).fetchone()
+        return row[0] if row else None
+
+    def add(self, url, content=None):
+        """Records url (and the hash of its content) as scraped."""
+        digest = content_hash(content) if content is not None else None
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO seen (key, url, content_hash, first_seen, last_seen) VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT(key) DO UPDATE SET content_hash = COALESCE(excluded.content_hash, content_hash), last_seen = excluded.last_seen",
+                (normalize_url(url), url, digest, now, now)
+            )
+        return digest
+
+    def seed_from_csv(self, csv_path, link_field='search_link', content_field='article_content', body_store=None,
+                      hash_field='article_content_hash'):
+        """
+        Imports the links of an existing output CSV so they are skipped on the next run. Rows whose
+        content was moved to a body store are read back from body_store; rows without content get no hash.
+        """
+        now = time.time()
+        rows = []
+        csv.field_size_limit(2**31 - 1)
+        with open(csv_path, newline='', encoding='utf-8') as csv_file:
+            for row in csv.DictReader(csv_file):
+                if row.get(link_field):
+                    content = row.get(content_field)
+                    if not content and body_store is not None and row.get(hash_field):
+                        content = body_store.get(row[hash_field])
+                    rows.append((normalize_url(row[link_field]), row[link_field], content_hash(content) if content else None, now, now))
+        with self._lock:
+            self._conn.executemany("INSERT OR IGNORE INTO seen (key, url, content_hash, first_seen, last_seen) VALUES (?, ?, ?, ?, ?)", rows)
+        logging.info(f"Seen index: imported {len(rows)} links from {csv_path}.")
+        return len(rows)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
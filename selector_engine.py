@@ -0,0 +1,201 @@
+from bs4 import BeautifulSoup, Tag
+import re
+
+
+_COMPOUND_RE = re.compile(r'''
+    (?P<tag>[a-zA-Z][\w-]*|\*)?
+    (?P<rest>(?:\#[\w-]+|\.[\w-]+|\[\s*[\w:-]+\s*(?:=\s*(?:"[^"]*"|'[^']*'|[\w:-]+)\s*)?\])*)
+''', re.VERBOSE)
+_SIMPLE_RE = re.compile(r'''\#(?P<id>[\w-]+)|\.(?P<cls>[\w-]+)|\[\s*(?P<attr>[\w:-]+)\s*(?:=\s*(?:"(?P<dq>[^"]*)"|'(?P<sq>[^']*)'|(?P<bare>[\w:-]+))\s*)?\]''')
+
+
+class _Compound:
+    """One compound selector such as div.article-body or meta[name="author"]."""
+
+    __slots__ = ('tag', 'id', 'classes', 'attrs')
+
+    def __init__(self, tag, id_, classes, attrs):
+        self.tag = tag
+        self.id = id_
+        self.classes = classes
+        self.attrs = attrs
+
+    def matches(self, element):
+        if self.tag is not None and element.name != self.tag:
+            return False
+        if self.id is not None and element.get('id') != self.id:
+            return False
+        if self.classes:
+            element_classes = element.get('class') or ()
+            if isinstance(element_classes, str):
+                element_classes = element_classes.split()
+            if not self.classes.issubset(element_classes):
+                return False
+        for name, value in self.attrs:
+            actual = element.get(name)
+            if actual is None:
+                return False
+            if value is not None:
+                if isinstance(actual, list):
+                    actual = ' '.join(actual)
+                if actual != value:
+                    return False
+        return True
+
+
+def _parse_compound(text, selector):
+    match = _COMPOUND_RE.fullmatch(text)
+    if not match or not text:
+        raise ValueError(f"Unsupported selector: {selector!r}")
+    tag = match.group('tag')
+    id_ = None
+    classes = set()
+    attrs = []
+    for simple in _SIMPLE_RE.finditer(match.group('rest')):
+        if simple.group('id'):
+            id_ = simple.group('id')
+        elif simple.group('cls'):
+            classes.add(simple.group('cls'))
+        else:
+            value = next((v for v in (simple.group('dq'), simple.group('sq'), simple.group('bare')) if v is not None), None)
+            attrs.append((simple.group('attr').lower(), value))
+    return _Compound(None if tag in (None, '*') else tag.lower(), id_, frozenset(classes), tuple(attrs))
+
+def parse_selector(selector):
+    """
+    Parses a CSS selector into (compound, combinator) steps, rightmost last.
+    Supports type, #id, .class, [attr] and [attr=value] simple selectors joined by descendant
+    (space) or child (>) combinators - the subset used by the scraper's selector lists.
+    """
+    tokens = re.split(r'\s*(>)\s*|\s+', selector.strip())
+    steps = []
+    combinator = None
+    for token in tokens:
+        if token is None or token == '':
+            continue
+        if token == '>':
+            if not steps or combinator == '>':
+                raise ValueError(f"Unsupported selector: {selector!r}")
+            combinator = '>'
+            continue
+        steps.append((_parse_compound(token, selector), combinator if steps else None))
+        combinator = ' '
+    if not steps or combinator == '>':
+        raise ValueError(f"Unsupported selector: {selector!r}")
+    return steps
+
+
+def _parent(element):
+    parent = element.parent
+    if parent is None or isinstance(parent, BeautifulSoup):
+        return None
+    return parent
+
+def _matches_steps(element, steps, index):
+    compound, combinator = steps[index]
+    if not compound.matches(element):
+        return False
+    if index == 0:
+        return True
+    if combinator == '>':
+        parent = _parent(element)
+        return parent is not None and _matches_steps(parent, steps, index - 1)
+    ancestor = _parent(element)
+    while ancestor is not None:
+        if _matches_steps(ancestor, steps, index - 1):
+            return True
+        ancestor = _parent(ancestor)
+    return False
+
+
+class CompiledCascades:
+    """
+    A set of prioritized selector cascades (one per field) resolved in a single document walk.
+
+    For every field the result is the first selector, in priority order, whose first match in
+    document order is accepted - exactly what a loop of select_one() calls would return, but the
+    tree is traversed once for all fields and the walk stops as soon as every field is decided.
+    """
+
+    def __init__(self, cascades):
+        self.fields = {}
+        self._by_tag = {}
+        self._any_tag = []
+        self._candidates_by_tag = {}
+        for field, spec in cascades.items():
+            selectors, accept = spec if isinstance(spec, tuple) else (spec, None)
+            self.fields[field] = (list(selectors), accept)
+            for position, selector in enumerate(selectors):
+                steps = parse_selector(selector)
+                entry = (field, position, steps)
+                tag = steps[-1][0].tag
+                if tag is None:
+                    self._any_tag.append(entry)
+                else:
+                    self._by_tag.setdefault(tag, []).append(entry)
+
+    def resolve(self, root, order=None):
+        """
+        Returns {field: (selector_position, element)}, with (None, None) for fields with no match.
+        order optionally maps fields to a list of selector positions to try first (e.g. learned per
+        site); the remaining selectors follow in their usual priority. Positions in the result always
+        refer to the original selector lists.
+        """
+        priorities = {field: self._priority(field, (order or {}).get(field)) for field in self.fields}
+        first_matches = {field: [None] * len(selectors) for field, (selectors, _) in self.fields.items()}
+        results = {field: (None, None) for field in self.fields}
+        undecided = set(self.fields)
+
+        for element in root.descendants:
+            if not isinstance(element, Tag):
+                continue
+            for field, position, steps in self._candidates(element.name):
+                if field not in undecided or first_matches[field][position] is not None:
+                    continue
+                if _matches_steps(element, steps, len(steps) - 1):
+                    first_matches[field][position] = element
+                    if self._decide(field, first_matches[field], priorities[field], results):
+                        undecided.discard(field)
+            if not undecided:
+                break
+
+        for field in undecided:
+            self._decide(field, first_matches[field], priorities[field], results, final=True)
+        return results
+
+    def _priority(self, field, preferred):
+        count = len(self.fields[field][0])
+        if not preferred:
+            return range(count)
+        preferred = [position for position in dict.fromkeys(preferred) if 0 <= position < count]
+        return preferred + [position for position in range(count) if position not in preferred]
+
+    def _candidates(self, tag):
+        candidates = self._candidates_by_tag.get(tag)
+        if candidates is None:
+            candidates = self._by_tag.get(tag, []) + self._any_tag
+            self._candidates_by_tag[tag] = candidates
+        return candidates
+
+    def _decide(self, field, matches, priority, results, final=False):
+        """
+        Picks the winning selector for a field. Returns True once the choice is settled, i.e. a
+        selector's first match was accepted and every higher-priority selector has already
+        matched (and been rejected). With final, selectors that never matched are skipped.
+        """
+        accept = self.fields[field][1]
+        for position in priority:
+            element = matches[position]
+            if element is None:
+                if final:
+                    continue
+                return False
+            if accept is None or accept(element):
+                results[field] = (position, element)
+                return True
+        return True
+
+
+def compile_cascades(cascades):
+    """Compiles {field: selectors} or {field: (selectors, accept)} into a CompiledCascades."""
+    return CompiledCascades(cascades)
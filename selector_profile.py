@@ -0,0 +1,97 @@
+import logging
+import sqlite3
+import threading
+import time
+
+
+SELECTOR_PROFILE_PATH = "selector_profile.sqlite"
+PROFILE_DECAY = 0.8
+MIN_CONFIDENCE = 0.5
+
+
+class SelectorProfile:
+    """
+    Persistent per-host record of which selector decided each field of a CompiledCascades.
+
+    Every time a page from a host is resolved, that host's scores for each field are multiplied by
+    decay and the winning selector gains 1. Selectors scoring at least min_confidence are tried
+    first on the host's next page, best first. Because old evidence keeps decaying, a selector that
+    stops matching after a site redesign is overtaken by its replacement within a few articles.
+    Scores are kept in memory and written back on save() / close(). Safe to share between threads.
+    """
+
+    def __init__(self, cascades, path=SELECTOR_PROFILE_PATH, decay=PROFILE_DECAY, min_confidence=MIN_CONFIDENCE):
+        self.path = path
+        self.decay = decay
+        self.min_confidence = min_confidence
+        self._selectors = {field: selectors for field, (selectors, _) in cascades.fields.items()}
+        self._positions = {field: {selector: position for position, selector in enumerate(selectors)}
+                           for field, selectors in self._selectors.items()}
+        self._scores = {}
+        self._dirty = set()
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS selector_scores (
+                host TEXT NOT NULL,
+                field TEXT NOT NULL,
+                selector TEXT NOT NULL,
+                score REAL NOT NULL,
+                updated_at REAL NOT NULL,
+                PRIMARY KEY (host, field, selector)
+            )
+        """)
+        for host, field, selector, score in self._conn.execute("SELECT host, field, selector, score FROM selector_scores"):
+            self._scores.setdefault((host, field), {})[selector] = score
+        logging.info(f"Selector profile: loaded {len(self)} hosts from {path}.")
+
+    def __len__(self):
+        with self._lock:
+            return len({host for host, _ in self._scores})
+
+    def order_for(self, host):
+        """Returns {field: [selector positions to try first]} for host, suitable for CompiledCascades.resolve."""
+        order = {}
+        with self._lock:
+            for field, positions in self._positions.items():
+                scores = self._scores.get((host, field))
+                if not scores:
+                    continue
+                confident = [selector for selector, score in scores.items() if score >= self.min_confidence and selector in positions]
+                if confident:
+                    order[field] = [positions[selector] for selector in sorted(confident, key=lambda selector: -scores[selector])]
+        return order
+
+    def record(self, host, positions):
+        """Updates host's scores from {field: winning selector position, or None for a miss}."""
+        with self._lock:
+            for field, position in positions.items():
+                if field not in self._selectors:
+                    continue
+                scores = self._scores.setdefault((host, field), {})
+                for selector in scores:
+                    scores[selector] *= self.decay
+                if position is not None:
+                    winner = self._selectors[field][position]
+                    scores[winner] = scores.get(winner, 0.0) + 1.0
+                self._dirty.add((host, field))
+
+    def save(self):
+        with self._lock:
+            now = time.time()
+            rows = [(host, field, selector, score, now)
+                    for host, field in self._dirty for selector, score in self._scores[(host, field)].items()]
+            self._conn.execute("BEGIN")
+            self._conn.executemany(
+                "INSERT INTO selector_scores (host, field, selector, score, updated_at) VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT(host, field, selector) DO UPDATE SET score = excluded.score, updated_at = excluded.updated_at",
+                rows
+            )
+            self._conn.execute("COMMIT")
+            self._dirty.clear()
+
+    def close(self):
+        self.save()
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,178 @@
+import csv
+import json
+import logging
+import os
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+    pq = None
+
+
+OUTPUT_FIELDNAMES = ['search_title', 'search_snippet', 'search_date', 'search_date_utc', 'search_source', 'search_link',
+                     'article_title', 'article_author', 'article_publish_date', 'article_publish_date_utc', 'article_content', 'article_content_hash',
+                     'article_image_urls', 'article_categories', 'article_keywords', 'duplicate_of']
+LIST_FIELDS = {'article_image_urls', 'article_categories', 'article_keywords'}
+DICTIONARY_FIELDS = {'search_source', 'search_language', 'search_country', 'search_window'}
+PARQUET_ROW_GROUP_SIZE = 500
+PARQUET_COMPRESSION = 'zstd'
+
+
+class CsvSink:
+    """
+    Writes records to a CSV file one row at a time, flushing after every row. The file is opened on
+    the first write, so a run that produces no records leaves an existing file untouched.
+    When appending to an existing file, its header is kept so older files stay consistent; columns
+    the old header lacks are not written (a warning names them), and fieldnames holds the columns
+    actually written.
+    """
+
+    def __init__(self, path, fieldnames=OUTPUT_FIELDNAMES, append=False):
+        self.path = path
+        self.rows_written = 0
+        self.append = append
+        self._file = None
+        self._write_header = not (append and os.path.exists(path) and os.path.getsize(path) > 0)
+        if not self._write_header:
+            with open(path, newline="", encoding="utf-8") as existing_file:
+                existing_fieldnames = next(csv.reader(existing_file), None) or fieldnames
+            missing = [name for name in fieldnames if name not in existing_fieldnames]
+            if missing:
+                logging.warning(f"{path} was written with an older header; appended rows will not have these columns: {', '.join(missing)}")
+                print(f"Warning: {path} has an older header; appended rows will not have these columns: {', '.join(missing)}")
+            fieldnames = existing_fieldnames
+        self.fieldnames = list(fieldnames)
+
+    def _open(self):
+        self._file = open(self.path, "a" if self.append else "w", newline="", encoding="utf-8")
+        self._writer = csv.DictWriter(self._file, fieldnames=self.fieldnames, extrasaction='ignore')
+        if self._write_header:
+            self._writer.writeheader()
+
+    def write(self, record):
+        if self._file is None:
+            self._open()
+        self._writer.writerow(record)
+        self._file.flush()
+        self.rows_written += 1
+
+    def close(self):
+        if self._file is not None and not self._file.closed:
+            self._file.close()
+            logging.info(f"CSV sink closed: {self.rows_written} rows written to {self.path}")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class JsonLinesSink:
+    """
+    Writes records as JSON Lines, one object per line, flushing after every record. The file is
+    opened on the first write, so a run that produces no records leaves an existing file untouched.
+    """
+
+    def __init__(self, path, append=False):
+        self.path = path
+        self.rows_written = 0
+        self.append = append
+        self._file = None
+
+    def write(self, record):
+        if self._file is None:
+            self._file = open(self.path, "a" if self.append else "w", encoding="utf-8")
+        self._file.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self._file.flush()
+        self.rows_written += 1
+
+    def close(self):
+        if self._file is not None and not self._file.closed:
+            self._file.close()
+            logging.info(f"JSON Lines sink closed: {self.rows_written} records written to {self.path}")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class ParquetSink:
+    """
+    Writes records to a Parquet file with list-typed image/category/keyword columns and
+    dictionary-encoded source columns. Records are buffered and written out as a compressed
+    row group every row_group_size records; the file footer is written on close(). The file is
+    created with the first row group, so a run that produces no records leaves an existing file untouched.
+    Requires pyarrow.
+    """
+
+    def __init__(self, path, fieldnames=OUTPUT_FIELDNAMES, row_group_size=PARQUET_ROW_GROUP_SIZE, compression=PARQUET_COMPRESSION):
+        if pa is None:
+            raise ImportError("Parquet output requires pyarrow (pip install pyarrow).")
+        self.path = path
+        self.rows_written = 0
+        self.row_group_size = row_group_size
+        self.fieldnames = list(fieldnames)
+        self.schema = pa.schema([(name, self._field_type(name)) for name in fieldnames])
+        self.compression = compression
+        self._buffer = []
+        self._writer = None
+
+    @staticmethod
+    def _field_type(name):
+        if name in LIST_FIELDS:
+            return pa.list_(pa.string())
+        if name in DICTIONARY_FIELDS:
+            return pa.dictionary(pa.int32(), pa.string())
+        return pa.string()
+
+    def write(self, record):
+        row = {}
+        for name in self.schema.names:
+            value = record.get(name)
+            if name in LIST_FIELDS:
+                row[name] = [str(item) for item in value] if value is not None else []
+            else:
+                row[name] = None if value is None else str(value)
+        self._buffer.append(row)
+        self.rows_written += 1
+        if len(self._buffer) >= self.row_group_size:
+            self._flush()
+
+    def _flush(self):
+        if self._buffer:
+            if self._writer is None:
+                self._writer = pq.ParquetWriter(self.path, self.schema, compression=self.compression)
+            self._writer.write_table(pa.Table.from_pylist(self._buffer, schema=self.schema))
+            self._buffer = []
+
+    def close(self):
+        self._flush()
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+            logging.info(f"Parquet sink closed: {self.rows_written} rows written to {self.path}")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def open_sink(path, append=False, fieldnames=OUTPUT_FIELDNAMES):
+    """
+    Picks a sink from the output file extension: .jsonl / .ndjson for JSON Lines, .parquet for
+    Parquet, CSV otherwise. Parquet files cannot be appended to.
+    """
+    if path.endswith(('.jsonl', '.ndjson')):
+        return JsonLinesSink(path, append=append)
+    if path.endswith('.parquet'):
+        if append:
+            raise ValueError("Parquet output cannot be appended to; choose a new file for incremental or resumed runs.")
+        return ParquetSink(path, fieldnames=fieldnames)
+    return CsvSink(path, fieldnames=fieldnames, append=append)
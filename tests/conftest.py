@@ -0,0 +1,17 @@
+import json
+import logging
+import os
+import sys
+import tempfile
+
+# The scraper modules live at the repository root rather than in a package.
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from log_setup import LOG_CONFIG_ENV  # noqa: E402
+
+# main3 configures logging when it is imported. Hand it a configuration the way a parent process
+# would, so tests log to a temporary file instead of the repository's scraper.log.
+os.environ[LOG_CONFIG_ENV] = json.dumps({
+    'owner': -1, 'path': os.path.join(tempfile.mkdtemp(prefix='scraper-tests-'), 'scraper.log'),
+    'structured': False, 'run_id': 'tests', 'level': logging.INFO,
+})
@@ -0,0 +1,130 @@
+import io
+import os
+import re
+
+import pytest
+import requests
+
+import http_client
+import main3
+from checkpoint import Checkpoint
+from link_resolver import LinkResolver
+
+
+def test_load_replays_offset_and_completed_links(tmp_path):
+    path = str(tmp_path / "checkpoint.jsonl")
+    checkpoint = Checkpoint(path, '"x" news', '&hl=en')
+    checkpoint.begin()
+    checkpoint.advance(10)
+    checkpoint.mark_completed('https://a.example/1', submitted=True)
+    checkpoint.mark_completed('https://a.example/1-canonical')
+    checkpoint.mark_completed('https://a.example/1', submitted=True)
+    checkpoint.close()
+    with open(path, 'a', encoding='utf-8') as checkpoint_file:
+        checkpoint_file.write('{"completed": "https://a.exa')
+
+    loaded = Checkpoint.load(path)
+    assert loaded.matches('"x" news', '&hl=en')
+    assert not loaded.matches('"y" news', '&hl=en')
+    assert loaded.start == 10
+    assert loaded.completed_urls == {'https://a.example/1', 'https://a.example/1-canonical'}
+    assert loaded.submitted_count == 1
+
+
+def test_load_without_a_file_is_none(tmp_path):
+    assert Checkpoint.load(str(tmp_path / "missing.jsonl")) is None
+
+
+def test_clear_removes_the_file(tmp_path):
+    path = str(tmp_path / "checkpoint.jsonl")
+    checkpoint = Checkpoint(path, 'q', 'c')
+    checkpoint.begin()
+    checkpoint.clear()
+    assert not os.path.exists(path)
+
+
+SEARCH_PAGE = '<html><body>%s</body></html>'
+SEARCH_ITEM = ('<div class="SoaBEf"><a href="https://pub%d.example.com/a/%d">x</a><div class="MBeuO">Title %d</div>'
+               '<div class="GI74Re">Snippet %d</div><div class="NUnG9d"><span>Source</span></div><span class="LfVVr">%d hours ago</span></div>')
+ARTICLE_PAGE = ('<html><head><meta name="author" content="A"><link rel="canonical" href="https://pub%d.example.com/canonical/%d"></head>'
+                '<body><article><p>Body of article %d.</p></article></body></html>')
+
+
+def _response(url, text, status=200):
+    response = requests.models.Response()
+    response.status_code = status
+    response.url = url
+    response.headers['Content-Type'] = 'text/html'
+    response._content = text.encode()
+    response.raw = io.BytesIO(response._content)
+    return response
+
+
+class FakeGoogle:
+    """Serves pages_available result pages of 10 items, then an empty page; start offsets in failing answer 404."""
+
+    def __init__(self, pages_available=3, failing=()):
+        self.pages_available = pages_available
+        self.failing = set(failing)
+
+    def get(self, url, *args, **kwargs):
+        if 'google.com/search' in url:
+            start = int(re.search(r'start=(\d+)', url).group(1))
+            if start in self.failing:
+                return _response(url, 'blocked', status=404)
+            if start >= self.pages_available * 10:
+                return _response(url, SEARCH_PAGE % '')
+            return _response(url, SEARCH_PAGE % ''.join(SEARCH_ITEM % (n % 3, n, n, n, n % 3) for n in range(start, start + 10)))
+        n = int(url.rsplit('/', 1)[1])
+        return _response(url, ARTICLE_PAGE % (n % 3, n, n))
+
+
+@pytest.fixture
+def fake_google(monkeypatch):
+    google = FakeGoogle()
+    monkeypatch.setattr(http_client, 'RATE_LIMITING_ENABLED', False)
+    monkeypatch.setattr(http_client.get_session(), 'get', google.get)
+    monkeypatch.setattr(main3, 'get_random_delay', lambda: 0)
+    return google
+
+
+def _scrape(checkpoint_path, limit=None, resume=False, **kwargs):
+    return main3.google_news_scraper(['x'], limit, checkpoint_path=checkpoint_path, resume=resume, use_cache=False,
+                                     use_selector_profile=False, use_link_memo=False, near_duplicates='off', **kwargs)
+
+
+def test_finished_run_clears_the_checkpoint(tmp_path, fake_google):
+    path = str(tmp_path / "checkpoint.jsonl")
+    assert len(_scrape(path)) == 30
+    assert not os.path.exists(path)
+
+
+def test_failed_search_page_keeps_the_checkpoint_for_resume(tmp_path, fake_google):
+    path = str(tmp_path / "checkpoint.jsonl")
+    fake_google.failing = {20}
+    first = _scrape(path)
+    assert len(first) == 20
+    assert os.path.exists(path)
+    assert Checkpoint.load(path).start == 20
+
+    fake_google.failing = set()
+    rest = _scrape(path, resume=True)
+    assert len(rest) == 10
+    assert not {record['search_link'] for record in first} & {record['search_link'] for record in rest}
+    assert not os.path.exists(path)
+
+
+def test_resumed_run_counts_only_submitted_links_towards_the_limit(tmp_path, fake_google):
+    path = str(tmp_path / "checkpoint.jsonl")
+    link_resolver = LinkResolver(str(tmp_path / "link_memo.sqlite"))
+    fake_google.failing = {10}
+    assert len(_scrape(path, limit=15, link_resolver=link_resolver)) == 10
+    loaded = Checkpoint.load(path)
+    # Every article also recorded its rel=canonical alias.
+    assert len(loaded.completed_urls) == 20
+    assert loaded.submitted_count == 10
+
+    fake_google.failing = set()
+    assert len(_scrape(path, limit=15, resume=True, link_resolver=link_resolver)) == 5
+    assert not os.path.exists(path)
+    link_resolver.close()
@@ -0,0 +1,63 @@
+import datetime
+
+import pytest
+
+from date_utils import parse_date, normalize_date, date_window, outside_window, UNIT_LENGTHS
+
+
+NOW = datetime.datetime(2025, 1, 22, 12, 0, tzinfo=datetime.timezone.utc)
+
+
+@pytest.mark.parametrize("text, expected, unit", [
+    ("3 hours ago", NOW - datetime.timedelta(hours=3), 'hour'),
+    ("5 mins ago", NOW - datetime.timedelta(minutes=5), 'minute'),
+    ("1 day ago.", NOW - datetime.timedelta(days=1), 'day'),
+    ("vor 2 Tagen", NOW - datetime.timedelta(days=2), 'day'),
+    ("il y a 3 heures", NOW - datetime.timedelta(hours=3), 'hour'),
+    ("hace 4 semanas", NOW - datetime.timedelta(weeks=4), 'week'),
+    ("2 meses atrás", NOW - datetime.timedelta(days=60), 'month'),
+    ("Yesterday", NOW - datetime.timedelta(days=1), 'day'),
+    ("just now", NOW, 'minute'),
+])
+def test_relative_dates_count_back_from_now(text, expected, unit):
+    estimate = parse_date(text, NOW)
+    assert estimate.when == expected
+    assert estimate.precision == UNIT_LENGTHS[unit]
+
+
+@pytest.mark.parametrize("text", ["5 min read", "Updated 3 hours ago by staff", "Now playing", "nowhere", "", None])
+def test_text_that_only_contains_a_relative_date_is_not_a_date(text):
+    assert parse_date(text, NOW) is None
+
+
+def test_article_dates_are_never_relative():
+    assert parse_date("3 hours ago", NOW, relative=False) is None
+    assert normalize_date("Yesterday", NOW, relative=False) == ''
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("2025-01-22T10:00:00Z", "2025-01-22T10:00:00Z"),
+    ("2025-01-22T10:00:00+02:00", "2025-01-22T08:00:00Z"),
+    ("Wed, 22 Jan 2025 10:00:00 GMT", "2025-01-22T10:00:00Z"),
+    ("Jan 5, 2025", "2025-01-05T00:00:00Z"),
+    ("5 January 2025", "2025-01-05T00:00:00Z"),
+    ("2025-01-05", "2025-01-05T00:00:00Z"),
+])
+def test_absolute_dates_normalize_to_utc(text, expected):
+    assert normalize_date(text, NOW) == expected
+    assert normalize_date(text, NOW, relative=False) == expected
+
+
+def test_day_precision_dates_are_only_outside_a_window_when_certain():
+    window = date_window(start_date="2025-01-05", end_date="2025-01-10")
+    assert not outside_window(parse_date("Jan 4, 2025"), window)
+    assert outside_window(parse_date("Jan 2, 2025"), window)
+    assert outside_window(parse_date("2025-01-11T00:00:00Z"), window)
+    assert not outside_window(None, window)
+
+
+def test_period_window_starts_that_long_before_now():
+    assert date_window(period='7d', now=NOW) == (NOW - datetime.timedelta(days=7), None)
+    assert date_window() == (None, None)
+    assert outside_window(parse_date("2 months ago", NOW), date_window(period='7d', now=NOW))
+    assert not outside_window(parse_date("6 days ago", NOW), date_window(period='7d', now=NOW))
@@ -0,0 +1,69 @@
+import io
+
+import pytest
+import requests
+
+from http_client import _ElementEndScanner, read_bounded
+
+
+def _scan(html, chunk_size=None):
+    """Feeds html to a scanner in chunks, as read_bounded does; returns the prefix it stops after, or None."""
+    scanner = _ElementEndScanner('article')
+    body = bytearray()
+    chunk_size = chunk_size or len(html)
+    for offset in range(0, len(html), chunk_size):
+        body += html[offset:offset + chunk_size]
+        end = scanner.feed(body)
+        if end is not None:
+            return bytes(body[:end])
+    return None
+
+
+@pytest.mark.parametrize("chunk_size", [None, 1, 7])
+@pytest.mark.parametrize("html, expected_end", [
+    (b'<html><article><p>x</p></article><footer>related</footer>', b'</article>'),
+    (b'<ARTICLE class="a"><article>inner</article> outer</Article ><footer>', b'</Article >'),
+    (b'<article><script>document.write("</article>");</script><p>body</p></article><footer>', b'<p>body</p></article>'),
+    (b'<article><!-- </article> --><p>body</p></article><footer>', b'<p>body</p></article>'),
+    (b'<article><style>/* </article> */</style><p>body</p></article><footer>', b'<p>body</p></article>'),
+    (b'<!-- <article> --><article><p>body</p></article><footer>', b'<p>body</p></article>'),
+    (b'<header><articles></articles></header><article>x</article>', b'<article>x</article>'),
+])
+def test_scanner_stops_after_the_first_top_level_article(html, expected_end, chunk_size):
+    prefix = _scan(html, chunk_size)
+    assert prefix is not None and prefix.endswith(expected_end)
+    assert not prefix[len(prefix) - len(expected_end):].startswith(b'<footer')
+
+
+@pytest.mark.parametrize("html", [
+    b'<article><p>never closed',
+    b'<article><script>"</article>"',
+    b'<p>no article</p></article>',
+])
+def test_scanner_keeps_reading_until_the_article_closes(html):
+    assert _scan(html, 3) is None
+
+
+def _streamed(body, content_type='text/html'):
+    response = requests.models.Response()
+    response.status_code = 200
+    response.url = 'https://example.com/a'
+    response.headers['Content-Type'] = content_type
+    response.raw = io.BytesIO(body)
+    return response
+
+
+def test_read_bounded_stops_after_element():
+    response = _streamed(b'<article><script>"</article>"</script>body</article><footer>more</footer>')
+    read_bounded(response, stop_after_element='article')
+    assert response.content == b'<article><script>"</article>"</script>body</article>'
+    assert response.truncated == 'stop_after_element'
+
+
+def test_read_bounded_caps_bytes_and_rejects_content_types():
+    response = _streamed(b'x' * 100)
+    read_bounded(response, max_bytes=10)
+    assert response.content == b'x' * 10
+    assert response.truncated == 'max_bytes'
+    with pytest.raises(requests.exceptions.RequestException):
+        read_bounded(_streamed(b'%PDF', 'application/pdf'), content_types=('text/html',))
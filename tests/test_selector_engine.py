@@ -0,0 +1,73 @@
+import pytest
+from bs4 import BeautifulSoup
+
+import main3
+from selector_engine import compile_cascades, parse_selector
+
+
+PAGES = [
+    # Content in a later-priority selector, author and date only as meta tags.
+    '<html><head><meta name="author" content="Meta Author"><meta property="article:published_time" content="2025-01-22T10:00:00Z">'
+    '<link rel="canonical" href="https://example.com/a"></head>'
+    '<body><div class="content"><p>Body</p></div><div class="article-body"><p>Preferred body</p></div></body></html>',
+    # An empty higher-priority date element is rejected in favour of the next selector.
+    '<html><body><article><span class="author">Span Author</span><time itemprop="datePublished"></time>'
+    '<span class="date">Jan 5, 2025</span><p>Text</p></article></body></html>',
+    # Descendant and child combinators, several classes and an id.
+    '<html><body><div id="content"><div class="post-content extra"><p>Nested</p></div></div>'
+    '<p class="author">Para Author</p><a rel="author" href="/me">Link Author</a><link rel="canonical"></body></html>',
+    # Nothing matches.
+    '<html><body><p>No containers here</p></body></html>',
+]
+
+
+def _select_one_cascade(soup, selectors, accept=None):
+    """The loop the compiled cascades replace: the first selector whose select_one match is accepted."""
+    for position, selector in enumerate(selectors):
+        element = soup.select_one(selector)
+        if element is not None and (accept is None or accept(element)):
+            return position, element
+    return None, None
+
+
+@pytest.mark.parametrize("page", PAGES)
+@pytest.mark.parametrize("field, selectors, accept", [
+    ('content', main3.ARTICLE_CONTENT_SELECTORS, None),
+    ('author', main3.ARTICLE_AUTHOR_SELECTORS, None),
+    ('publish_date', main3.ARTICLE_PUBLISH_DATE_SELECTORS, main3._element_date_text),
+    ('canonical', ['link[rel="canonical"]'], main3._has_href),
+])
+def test_article_cascades_match_select_one(page, field, selectors, accept):
+    soup = BeautifulSoup(page, 'html.parser')
+    assert main3.ARTICLE_CASCADES.resolve(soup)[field] == _select_one_cascade(soup, selectors, accept)
+
+
+@pytest.mark.parametrize("page", PAGES)
+def test_learned_order_is_tried_first(page):
+    soup = BeautifulSoup(page, 'html.parser')
+    order = {'content': [9, 7], 'author': [1]}
+    resolved = main3.ARTICLE_CASCADES.resolve(soup, order)
+    for field, preferred in order.items():
+        selectors = main3.ARTICLE_CASCADES.fields[field][0]
+        positions = preferred + [position for position in range(len(selectors)) if position not in preferred]
+        position, element = _select_one_cascade(soup, [selectors[p] for p in positions])
+        assert resolved[field] == ((positions[position], element) if position is not None else (None, None))
+
+
+def test_search_item_cascades_match_select_one():
+    item = BeautifulSoup('<div class="SoaBEf"><div class="BNeawe vvjwJb AP7Wnd">Fallback title</div><div class="MBeuO">Title</div>'
+                         '<div class="NUnG9d"><span>Source</span><span>3 hours ago</span></div></div>', 'html.parser')
+    resolved = main3.SEARCH_ITEM_CASCADES.resolve(item)
+    for field, (selectors, accept) in main3.SEARCH_ITEM_CASCADES.fields.items():
+        assert resolved[field] == _select_one_cascade(item, selectors, accept)
+
+
+def test_first_match_in_document_order_wins_within_a_selector():
+    soup = BeautifulSoup('<div><span class="a">first</span><p><span class="a">second</span></p></div>', 'html.parser')
+    assert compile_cascades({'x': ['span.a']}).resolve(soup)['x'][1].get_text() == 'first'
+
+
+@pytest.mark.parametrize("selector", ['div > > p', 'div >', 'a:hover', 'div, p', ''])
+def test_unsupported_selectors_are_rejected(selector):
+    with pytest.raises(ValueError):
+        parse_selector(selector)
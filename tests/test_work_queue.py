@@ -0,0 +1,107 @@
+import pytest
+
+import work_queue
+
+
+@pytest.fixture
+def redis_broker(monkeypatch):
+    pytest.importorskip("redis")
+    fakeredis = pytest.importorskip("fakeredis")
+    pytest.importorskip("lupa")  # fakeredis runs the Lua scripts with it
+    server = fakeredis.FakeServer()
+    monkeypatch.setattr(work_queue.redis.Redis, "from_url", lambda url: fakeredis.FakeRedis(server=server))
+    broker = work_queue.RedisBroker("redis://localhost:6379/0")
+    yield broker
+    broker.close()
+
+
+def test_redis_enqueue_deduplicates(redis_broker):
+    assert redis_broker.enqueue('search', {'page': 1}, dedup_key='search:1')
+    assert not redis_broker.enqueue('search', {'page': 1}, dedup_key='search:1')
+    assert redis_broker.counts() == {'search': {'pending': 1, 'leased': 0}}
+
+
+def test_redis_expired_lease_is_requeued(redis_broker):
+    redis_broker.enqueue('article', {'link': 'https://example.com/a'})
+    first = redis_broker.lease('article', lease_seconds=-1)
+    assert first.payload == {'link': 'https://example.com/a'}
+    assert first.attempts == 1
+
+    second = redis_broker.lease('article', lease_seconds=60)
+    assert second.id == first.id
+    assert second.attempts == 2
+    assert not redis_broker.ack(first)
+    assert redis_broker.ack(second)
+    assert redis_broker.lease('article') is None
+    assert redis_broker.counts()['article'] == {'done': 1, 'pending': 0, 'leased': 0}
+
+
+def test_redis_task_fails_after_max_attempts_of_expired_leases(redis_broker):
+    redis_broker.enqueue('article', {'link': 'https://example.com/a'})
+    for attempt in range(1, 4):
+        task = redis_broker.lease('article', lease_seconds=-1, max_attempts=3)
+        assert task.attempts == attempt
+    assert redis_broker.lease('article', max_attempts=3) is None
+    assert redis_broker.counts()['article'] == {'failed': 1, 'pending': 0, 'leased': 0}
+
+
+def test_redis_nack_requeues_until_max_attempts(redis_broker):
+    redis_broker.enqueue('search', {'page': 1})
+    task = redis_broker.lease('search')
+    assert redis_broker.nack(task, max_attempts=2) == 'pending'
+    task = redis_broker.lease('search')
+    assert task.attempts == 2
+    assert redis_broker.nack(task, max_attempts=2) == 'failed'
+    assert redis_broker.lease('search') is None
+
+
+def test_redis_reserve_slot_spaces_uses(redis_broker):
+    delays = [redis_broker.reserve_slot('search', 2.0) for _ in range(3)]
+    assert delays[0] == pytest.approx(0.0, abs=0.1)
+    assert delays[1] == pytest.approx(2.0, abs=0.1)
+    assert delays[2] == pytest.approx(4.0, abs=0.1)
+
+
+def test_sqlite_reserve_slot_is_shared_between_connections(tmp_path):
+    path = str(tmp_path / "queue.sqlite")
+    first, second = work_queue.SqliteBroker(path), work_queue.SqliteBroker(path)
+    assert first.reserve_slot('search', 2.0) == pytest.approx(0.0, abs=0.1)
+    assert second.reserve_slot('search', 2.0) == pytest.approx(2.0, abs=0.1)
+    first.close()
+    second.close()
+
+
+@pytest.fixture
+def sqlite_broker(tmp_path):
+    broker = work_queue.SqliteBroker(str(tmp_path / "queue.sqlite"))
+    yield broker
+    broker.close()
+
+
+def test_sqlite_expired_lease_is_requeued(sqlite_broker):
+    sqlite_broker.enqueue('article', {'link': 'https://example.com/a'}, dedup_key='a')
+    assert not sqlite_broker.enqueue('article', {'link': 'https://example.com/a'}, dedup_key='a')
+    first = sqlite_broker.lease('article', lease_seconds=-1)
+    assert first.attempts == 1
+
+    second = sqlite_broker.lease('article', lease_seconds=60)
+    assert second.id == first.id
+    assert second.attempts == 2
+    assert not sqlite_broker.ack(first)
+    assert sqlite_broker.ack(second)
+    assert sqlite_broker.lease('article') is None
+    assert sqlite_broker.counts() == {'article': {'done': 1}}
+
+
+def test_sqlite_unexpired_lease_is_not_handed_out_again(sqlite_broker):
+    sqlite_broker.enqueue('article', {'n': 1})
+    assert sqlite_broker.lease('article', lease_seconds=60) is not None
+    assert sqlite_broker.lease('article') is None
+
+
+def test_sqlite_task_fails_after_max_attempts_of_expired_leases(sqlite_broker):
+    sqlite_broker.enqueue('article', {'n': 1})
+    for attempt in range(1, 4):
+        assert sqlite_broker.lease('article', lease_seconds=-1, max_attempts=3).attempts == attempt
+    assert sqlite_broker.lease('article', max_attempts=3) is None
+    assert sqlite_broker.counts() == {'article': {'failed': 1}}
@@ -0,0 +1,103 @@
+import argparse
+import os
+import tempfile
+import time
+
+import http_client
+import main3
+import metrics
+from replay import FixtureStore, ReplayServer, FIXTURES_DIR
+from selector_profile import SelectorProfile
+from sinks import open_sink
+
+
+BENCHMARK_SCENARIOS = {
+    'fast': {'latency': (0.0, 0.01), 'error_rate': 0.0},
+    'baseline': {'latency': (0.05, 0.25), 'error_rate': 0.0},
+    'flaky': {'latency': (0.05, 0.25), 'error_rate': 0.05},
+}
+CPU_STAGES = ['search_fetch', 'search_parse', 'fetch', 'parse', 'write']
+WORKER_STAGES = ['extract_worker']
+
+
+def run_scenario(store, manifest, latency, error_rate, output_format='csv', seed=1, **scraper_options):
+    """
+    Replays one recorded scrape against a local ReplayServer and returns (records, wall seconds,
+    process CPU seconds, stage stats). Records are written to a throwaway sink of output_format.
+    Every scenario starts from an empty selector profile and skips the link memo, so runs stay
+    comparable and only request recorded URLs.
+    """
+    metrics.reset()
+    records = 0
+    with tempfile.TemporaryDirectory() as output_dir, ReplayServer(store, port=0, latency=latency, error_rate=error_rate, seed=seed) as server:
+        http_client.set_url_rewriter(server.url_for)
+        selector_profile = SelectorProfile(main3.ARTICLE_CASCADES, os.path.join(output_dir, "selector_profile.sqlite"))
+        try:
+            wall_started = time.perf_counter()
+            cpu_started = time.process_time()
+            with open_sink(os.path.join(output_dir, f"benchmark.{output_format}")) as sink:
+                for record in main3.iter_google_news(manifest['keywords'], manifest['num_articles_limit'],
+                                                     language=manifest['language'], country=manifest['country'],
+                                                     use_cache=False, incremental=False, selector_profile=selector_profile, use_link_memo=False,
+                                                     **scraper_options):
+                    with metrics.timed('write'):
+                        sink.write(record)
+                    records += 1
+            wall = time.perf_counter() - wall_started
+            cpu = time.process_time() - cpu_started
+        finally:
+            http_client.set_url_rewriter(None)
+            selector_profile.close()
+    return records, wall, cpu, metrics.STAGES.stats()
+
+def print_report(name, records, wall, cpu, stats):
+    p50 = metrics.STAGES.percentile('article', 0.50)
+    p95 = metrics.STAGES.percentile('article', 0.95)
+    print(f"\n[{name}] {records} articles in {wall:.2f}s: {records / wall if wall else 0:.2f} articles/sec")
+    if p50 is not None:
+        print(f"Per-article latency: p50 {p50 * 1000:.1f} ms, p95 {p95 * 1000:.1f} ms")
+    print(f"{'stage':<14}{'calls':>8}{'wall s':>10}{'cpu s':>10}{'cpu %':>8}")
+    for stage in CPU_STAGES:
+        entry = stats.get(stage)
+        if entry is None:
+            continue
+        share = 100 * entry['cpu'] / cpu if cpu else 0
+        print(f"{stage:<14}{entry['count']:>8}{entry['wall']:>10.2f}{entry['cpu']:>10.3f}{share:>7.1f}%")
+    other = cpu - sum(stats[stage]['cpu'] for stage in CPU_STAGES if stage in stats)
+    print(f"{'other':<14}{'':>8}{'':>10}{other:>10.3f}{100 * other / cpu if cpu else 0:>7.1f}%")
+    print(f"{'process total':<14}{'':>8}{'':>10}{cpu:>10.3f}")
+    for stage in WORKER_STAGES:
+        entry = stats.get(stage)
+        if entry is not None:
+            print(f"{stage:<14}{entry['count']:>8}{entry['wall']:>10.2f}{entry['cpu']:>10.3f}  (in worker processes)")
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure scraper throughput offline by replaying recorded fixtures through a local server.")
+    parser.add_argument('fixtures', nargs='?', default=FIXTURES_DIR, help="directory written by 'replay.py record'")
+    parser.add_argument('--scenarios', nargs='+', default=list(BENCHMARK_SCENARIOS), choices=list(BENCHMARK_SCENARIOS))
+    parser.add_argument('--workers', type=int, default=main3.MAX_FETCH_WORKERS)
+    parser.add_argument('--per-domain', type=int, default=main3.MAX_FETCH_PER_DOMAIN)
+    parser.add_argument('--processes', type=int, default=main3.EXTRACTION_PROCESSES, help="extraction worker processes (0 = parse on the extract threads)")
+    parser.add_argument('--extract-workers', type=int, help="threads of the extract stage (default: max(EXTRACT_WORKERS, processes))")
+    parser.add_argument('--queue-size', type=int, default=main3.STAGE_QUEUE_SIZE, help="capacity of the queues between pipeline stages")
+    parser.add_argument('--format', default='csv', choices=['csv', 'jsonl', 'parquet'], help="sink used for the write stage")
+    parser.add_argument('--rate-limit', action='store_true', help="keep the per-host adaptive rate limiter on (off by default so pacing does not dominate)")
+    args = parser.parse_args()
+
+    store = FixtureStore(args.fixtures)
+    manifest = store.read_manifest()
+    http_client.RATE_LIMITING_ENABLED = args.rate_limit
+    main3.REQUEST_DELAY_MIN = main3.REQUEST_DELAY_MAX = 0
+    print(f"Replaying {len(store)} recorded responses from {args.fixtures}")
+
+    for name in args.scenarios:
+        scenario = BENCHMARK_SCENARIOS[name]
+        records, wall, cpu, stats = run_scenario(store, manifest, scenario['latency'], scenario['error_rate'], args.format,
+                                                 max_workers=args.workers, max_per_domain=args.per_domain,
+                                                 extraction_processes=args.processes, extract_workers=args.extract_workers,
+                                                 queue_size=args.queue_size)
+        print_report(name, records, wall, cpu, stats)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+from urllib.parse import urljoin, urlsplit, urlunsplit, parse_qsl, urlencode
+
+
+DEFAULT_PORTS = {'http': 80, 'https': 443}
+TRACKING_PARAM_PREFIXES = ('utm_',)
+TRACKING_PARAMS = {'gclid', 'dclid', 'fbclid', 'msclkid', 'yclid', 'igshid', 'mc_cid', 'mc_eid', '_ga', '_gl',
+                   'ocid', 'cmpid', 'ref_src', 'ref_url', 'spm', 'sr_share', 'smid', 'taid', 'ito', 'cid_source'}
+REDIRECT_PATHS = {'/url': ('q', 'url'), '/aclk': ('adurl',)}
+GOOGLE_BASE_URL = "https://www.google.com"
+
+
+def _is_tracking_param(name):
+    name = name.lower()
+    return name in TRACKING_PARAMS or name.startswith(TRACKING_PARAM_PREFIXES)
+
+def normalize_url(url):
+    """
+    Normalizes a URL so equivalent spellings map to the same key.
+    Lowercases scheme and host, drops default ports, fragments and tracking parameters, and sorts
+    the remaining query parameters.
+    """
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or '').lower()
+    if parts.port and parts.port != DEFAULT_PORTS.get(scheme):
+        host = f"{host}:{parts.port}"
+    path = parts.path or '/'
+    query = urlencode(sorted((name, value) for name, value in parse_qsl(parts.query, keep_blank_values=True) if not _is_tracking_param(name)))
+    return urlunsplit((scheme, host, path, query, ''))
+
+def strip_tracking_params(url):
+    """Removes utm_* and other click-tracking parameters (and the fragment), keeping everything else as written."""
+    parts = urlsplit(url)
+    params = parse_qsl(parts.query, keep_blank_values=True)
+    kept = [(name, value) for name, value in params if not _is_tracking_param(name)]
+    query = urlencode(kept) if len(kept) != len(params) else parts.query
+    return urlunsplit((parts.scheme, parts.netloc, parts.path, query, ''))
+
+def unwrap_redirect(url):
+    """Returns the target of a Google /url?q= (or /aclk?adurl=) redirect link, or None for any other URL."""
+    parts = urlsplit(url)
+    host = (parts.hostname or '').lower()
+    if host and not (host == 'google.com' or host.startswith('google.') or '.google.' in host):
+        return None
+    names = REDIRECT_PATHS.get(parts.path)
+    if not names:
+        return None
+    params = dict(parse_qsl(parts.query))
+    for name in names:
+        target = params.get(name, '')
+        if target.startswith(('http://', 'https://')):
+            return target
+    return None
+
+def clean_link(href, base=GOOGLE_BASE_URL):
+    """
+    Turns a search result href into the publisher URL without a network round trip: relative links
+    are made absolute against base, Google redirect links are unwrapped and tracking parameters removed.
+    """
+    link = urljoin(base + '/', href.strip())
+    return strip_tracking_params(unwrap_redirect(link) or link)
+
+def is_plausible_canonical(url, canonical):
+    """
+    Rejects rel=canonical values that cannot stand in for the article: non-HTTP URLs and links to
+    a site's front page (a common misconfiguration) when the article itself is not a front page.
+    """
+    parts = urlsplit(canonical)
+    if parts.scheme not in ('http', 'https') or not parts.hostname:
+        return False
+    return parts.path.strip('/') != '' or urlsplit(url).path.strip('/') == ''
@@ -0,0 +1,296 @@
+import json
+import logging
+import sqlite3
+import time
+import uuid
+
+try:
+    import redis
+except ImportError:
+    redis = None
+
+
+QUEUE_PATH = "work_queue.sqlite"
+LEASE_SECONDS = 300
+MAX_ATTEMPTS = 3
+
+
+class Task:
+    """A leased unit of work. token identifies this particular lease, so a worker whose lease expired cannot ack a re-leased task."""
+
+    __slots__ = ('id', 'queue', 'payload', 'attempts', 'token')
+
+    def __init__(self, id, queue, payload, attempts, token):
+        self.id = id
+        self.queue = queue
+        self.payload = payload
+        self.attempts = attempts
+        self.token = token
+
+
+class SqliteBroker:
+    """
+    Work queue in a local SQLite file, safe to share between processes on one machine.
+    Every task has an optional dedup key; enqueueing a key that was ever enqueued before is a no-op,
+    so done tasks keep their key (with the payload dropped) to deduplicate later crawls too.
+    Leased tasks whose lease expires without an ack become available again, unless they have already
+    been leased max_attempts times: a task that keeps killing or hanging its worker is marked failed.
+    reserve_slot paces a shared resource (such as Google search) across every process using the queue.
+    """
+
+    def __init__(self, path=QUEUE_PATH):
+        self.path = path
+        self._conn = sqlite3.connect(path, timeout=60, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS tasks (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                queue TEXT NOT NULL,
+                dedup_key TEXT UNIQUE,
+                payload TEXT NOT NULL,
+                state TEXT NOT NULL DEFAULT 'pending',
+                attempts INTEGER NOT NULL DEFAULT 0,
+                lease_token TEXT,
+                lease_expires REAL,
+                updated_at REAL NOT NULL
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS tasks_queue_state ON tasks (queue, state, id)")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS slots (name TEXT PRIMARY KEY, next_at REAL NOT NULL)")
+
+    def enqueue(self, queue, payload, dedup_key=None):
+        """Adds a task; returns False when dedup_key was already enqueued."""
+        cursor = self._conn.execute(
+            "INSERT OR IGNORE INTO tasks (queue, dedup_key, payload, updated_at) VALUES (?, ?, ?, ?)",
+            (queue, dedup_key, json.dumps(payload), time.time())
+        )
+        return cursor.rowcount == 1
+
+    def lease(self, queue, lease_seconds=LEASE_SECONDS, max_attempts=MAX_ATTEMPTS):
+        """Takes the oldest available task of queue for lease_seconds, or returns None."""
+        now = time.time()
+        token = uuid.uuid4().hex
+        self._conn.execute("BEGIN IMMEDIATE")
+        try:
+            abandoned = self._conn.execute(
+                "UPDATE tasks SET state = 'failed', lease_token = NULL, updated_at = ? "
+                "WHERE queue = ? AND state = 'leased' AND lease_expires < ? AND attempts >= ?",
+                (now, queue, now, max_attempts)
+            ).rowcount
+            if abandoned:
+                logging.warning(f"{abandoned} {queue} tasks failed: their lease expired on each of {max_attempts} attempts.")
+            row = self._conn.execute(
+                "SELECT id, payload, attempts FROM tasks WHERE queue = ? AND "
+                "(state = 'pending' OR (state = 'leased' AND lease_expires < ?)) ORDER BY id LIMIT 1",
+                (queue, now)
+            ).fetchone()
+            if row is None:
+                self._conn.execute("COMMIT")
+                return None
+            self._conn.execute(
+                "UPDATE tasks SET state = 'leased', attempts = attempts + 1, lease_token = ?, lease_expires = ?, updated_at = ? WHERE id = ?",
+                (token, now + lease_seconds, now, row[0])
+            )
+            self._conn.execute("COMMIT")
+        except BaseException:
+            self._conn.execute("ROLLBACK")
+            raise
+        return Task(row[0], queue, json.loads(row[1]), row[2] + 1, token)
+
+    def ack(self, task):
+        """Marks a leased task done. Returns False if the lease was lost to another worker."""
+        cursor = self._conn.execute(
+            "UPDATE tasks SET state = 'done', payload = '', lease_token = NULL, updated_at = ? WHERE id = ? AND lease_token = ?",
+            (time.time(), task.id, task.token)
+        )
+        return cursor.rowcount == 1
+
+    def nack(self, task, max_attempts=MAX_ATTEMPTS):
+        """Returns a failed task to the queue, or marks it failed after max_attempts."""
+        state = 'pending' if task.attempts < max_attempts else 'failed'
+        self._conn.execute(
+            "UPDATE tasks SET state = ?, lease_token = NULL, updated_at = ? WHERE id = ? AND lease_token = ?",
+            (state, time.time(), task.id, task.token)
+        )
+        return state
+
+    def reserve_slot(self, name, interval):
+        """
+        Reserves the next use of the resource name, spaced interval seconds after the previous one
+        reserved by any process. Returns how many seconds to wait before using it.
+        """
+        now = time.time()
+        self._conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = self._conn.execute("SELECT next_at FROM slots WHERE name = ?", (name,)).fetchone()
+            slot = max(now, row[0]) if row else now
+            self._conn.execute("INSERT OR REPLACE INTO slots (name, next_at) VALUES (?, ?)", (name, slot + interval))
+            self._conn.execute("COMMIT")
+        except BaseException:
+            self._conn.execute("ROLLBACK")
+            raise
+        return slot - now
+
+    def counts(self):
+        """Returns {queue: {state: count}}."""
+        counts = {}
+        for queue, state, count in self._conn.execute("SELECT queue, state, COUNT(*) FROM tasks GROUP BY queue, state"):
+            counts.setdefault(queue, {})[state] = count
+        return counts
+
+    def close(self):
+        self._conn.close()
+
+
+_REDIS_LEASE_SCRIPT = """
+local expired = redis.call('ZRANGEBYSCORE', KEYS[2], '-inf', ARGV[1])
+for _, id in ipairs(expired) do
+    redis.call('ZREM', KEYS[2], id)
+    redis.call('HDEL', KEYS[4], id)
+    if tonumber(redis.call('HGET', KEYS[3], id) or '0') >= tonumber(ARGV[4]) then
+        redis.call('HDEL', KEYS[3], id)
+        redis.call('HDEL', KEYS[5], id)
+        redis.call('HINCRBY', KEYS[6], 'failed', 1)
+    else
+        redis.call('RPUSH', KEYS[1], id)
+    end
+end
+local id = redis.call('LPOP', KEYS[1])
+if not id then
+    return nil
+end
+redis.call('ZADD', KEYS[2], ARGV[2], id)
+local attempts = redis.call('HINCRBY', KEYS[3], id, 1)
+redis.call('HSET', KEYS[4], id, ARGV[3])
+return {id, redis.call('HGET', KEYS[5], id), attempts}
+"""
+
+# Uses the Redis server's clock, so workers on machines with skewed clocks still share one pace.
+_REDIS_RESERVE_SCRIPT = """
+local time = redis.call('TIME')
+local now = tonumber(time[1]) + tonumber(time[2]) / 1000000
+local slot = math.max(now, tonumber(redis.call('GET', KEYS[1]) or '0'))
+redis.call('SET', KEYS[1], tostring(slot + tonumber(ARGV[1])))
+return tostring(slot - now)
+"""
+
+_REDIS_RELEASE_SCRIPT = """
+if redis.call('HGET', KEYS[2], ARGV[1]) ~= ARGV[2] then
+    return 0
+end
+redis.call('ZREM', KEYS[1], ARGV[1])
+redis.call('HDEL', KEYS[2], ARGV[1])
+if ARGV[3] == 'pending' then
+    redis.call('RPUSH', KEYS[3], ARGV[1])
+else
+    redis.call('HDEL', KEYS[4], ARGV[1])
+    redis.call('HDEL', KEYS[5], ARGV[1])
+    redis.call('HINCRBY', KEYS[6], ARGV[3], 1)
+end
+return 1
+"""
+
+
+class RedisBroker:
+    """
+    The same work queue on Redis, for workers spread over several machines (needs `pip install redis`).
+    Each queue is a pending list plus a sorted set of leases keyed by expiry; leasing and releasing
+    run as Lua scripts so they are atomic. Dedup keys are kept in a set under the prefix, and the
+    names of all queues in another, so counts() also lists queues whose pending list is empty.
+    """
+
+    def __init__(self, url, prefix="scraper"):
+        if redis is None:
+            raise ImportError("RedisBroker needs the redis package: pip install redis")
+        self._redis = redis.Redis.from_url(url)
+        self._prefix = prefix
+        self._lease_script = self._redis.register_script(_REDIS_LEASE_SCRIPT)
+        self._release_script = self._redis.register_script(_REDIS_RELEASE_SCRIPT)
+        self._reserve_script = self._redis.register_script(_REDIS_RESERVE_SCRIPT)
+
+    def _key(self, *parts):
+        return ':'.join((self._prefix,) + parts)
+
+    def _release_keys(self, queue):
+        return [self._key(queue, 'leased'), self._key(queue, 'tokens'), self._key(queue, 'pending'),
+                self._key(queue, 'payloads'), self._key(queue, 'attempts'), self._key(queue, 'finished')]
+
+    def enqueue(self, queue, payload, dedup_key=None):
+        if dedup_key is not None and not self._redis.sadd(self._key('dedup'), dedup_key):
+            return False
+        task_id = str(self._redis.incr(self._key('next_id')))
+        pipeline = self._redis.pipeline()
+        pipeline.sadd(self._key('queues'), queue)
+        pipeline.hset(self._key(queue, 'payloads'), task_id, json.dumps(payload))
+        pipeline.rpush(self._key(queue, 'pending'), task_id)
+        pipeline.execute()
+        return True
+
+    def lease(self, queue, lease_seconds=LEASE_SECONDS, max_attempts=MAX_ATTEMPTS):
+        now = time.time()
+        token = uuid.uuid4().hex
+        result = self._lease_script(
+            keys=[self._key(queue, 'pending'), self._key(queue, 'leased'), self._key(queue, 'attempts'),
+                  self._key(queue, 'tokens'), self._key(queue, 'payloads'), self._key(queue, 'finished')],
+            args=[now, now + lease_seconds, token, max_attempts])
+        if not result:
+            return None
+        task_id, payload, attempts = result
+        return Task(task_id.decode(), queue, json.loads(payload), int(attempts), token)
+
+    def ack(self, task):
+        return bool(self._release_script(keys=self._release_keys(task.queue), args=[task.id, task.token, 'done']))
+
+    def nack(self, task, max_attempts=MAX_ATTEMPTS):
+        state = 'pending' if task.attempts < max_attempts else 'failed'
+        self._release_script(keys=self._release_keys(task.queue), args=[task.id, task.token, state])
+        return state
+
+    def reserve_slot(self, name, interval):
+        return float(self._reserve_script(keys=[self._key('slots', name)], args=[interval]))
+
+    def counts(self):
+        counts = {}
+        for queue in sorted(member.decode() for member in self._redis.smembers(self._key('queues'))):
+            finished = {state.decode(): int(count) for state, count in self._redis.hgetall(self._key(queue, 'finished')).items()}
+            counts[queue] = dict(finished, pending=self._redis.llen(self._key(queue, 'pending')), leased=self._redis.zcard(self._key(queue, 'leased')))
+        return counts
+
+    def close(self):
+        self._redis.close()
+
+
+def open_broker(url=QUEUE_PATH):
+    """Opens a broker from a redis:// URL, or treats anything else as a SQLite queue file path."""
+    if url.startswith(('redis://', 'rediss://', 'unix://')):
+        return RedisBroker(url)
+    return SqliteBroker(url[len('sqlite:///'):] if url.startswith('sqlite:///') else url)
+
+
+class BrokerSink:
+    """
+    A sink (same interface as sinks.py) that enqueues records on a broker queue for a collector to write out.
+    A record whose dedup_field value was already enqueued under the same dedup_prefix is dropped.
+    """
+
+    def __init__(self, broker, queue='results', dedup_field='search_link', dedup_prefix=None):
+        self.broker = broker
+        self.queue = queue
+        self.dedup_field = dedup_field
+        self.dedup_prefix = dedup_prefix or queue
+        self.rows_written = 0
+
+    def write(self, record):
+        if self.broker.enqueue(self.queue, record, dedup_key=f"{self.dedup_prefix}:{record.get(self.dedup_field)}"):
+            self.rows_written += 1
+        else:
+            logging.info(f"Result for {record.get(self.dedup_field)} was already enqueued; dropping duplicate.")
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()